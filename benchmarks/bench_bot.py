@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк горячих путей бота без сети.
+
+Импортирует bot/main.py с тестовым токеном и временным сайтом (на tmpfs,
+если есть /dev/shm), подменяет сессию Bot на фейковую (ответы Bot API
+собираются в памяти, скачивание фото отдает заранее сгенерированные
+JPEG) и гоняет через Dispatcher.feed_update синтетические обновления:
+
+  • search  - текстовые запросы пользователей (handle_text_messages)
+  • wizard  - полный мастер CarCreationStates от /add_car до публикации
+  • photos  - CarManager.save_photo (нарезка вариантов в пуле процессов)
+  • publish - CarManager.create_car_listing
+
+Лимиты частоты (throttling) на время замера снимаются. Результаты
+пишутся в JSON; с --compare печатается изменение относительно прошлого
+прогона (например, с другого коммита).
+
+Использование:
+    python bench_bot.py
+    python bench_bot.py --output results/bot.json
+    python bench_bot.py --search 5000 --wizards 50 --compare results/bot.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "bot"))
+
+from bench_listing_template import make_listings  # noqa: E402
+
+BOT_ID = 42
+ADMIN_BASE = 1000
+USER_BASE = 100000
+
+# Модели из справочника (ввод принимается без вариантов исправления)
+WIZARD_MODELS = ["Camry", "Corolla", "RAV4", "Highlander", "Land Cruiser", "Prado", "Yaris"]
+
+SEARCH_QUERIES = [
+    "камри", "bmw x5", "тойота до 2 млн", "kia rio 2018+", "внедорожник до 3 млн",
+    "мерседес", "лада веста", "седан белый", "тайота камри", "кроссовер 2015-2020",
+]
+
+
+def configure_environment(site_path: Path, admins: int):
+    """Переменные окружения для импорта bot/main.py (до импорта config)"""
+    os.environ.update({
+        "BOT_TOKEN": f"{BOT_ID}:TEST",
+        "HUGO_SITE_PATH": str(site_path),
+        "ADMIN_IDS": ",".join(str(ADMIN_BASE + i) for i in range(admins)),
+        "FSM_STORAGE": "memory",
+        "BOT_MODE": "polling",
+        "HUGO_AUTO_BUILD": "false",
+        "METRICS_ENABLED": "false",
+        "DADATA_API_KEY": "",
+        # Лимиты Telegram в бенчмарке не нужны - меряем сам бот
+        "THROTTLE_RATE": "1e9",
+        "THROTTLE_BURST": "1000000000",
+        "SEND_GLOBAL_RATE": "1e9",
+        "SEND_CHAT_RATE": "1e9",
+    })
+
+
+def seed_catalog(site_path: Path, count: int):
+    """Синтетический каталог в content/cars"""
+    from listing_template import render_listing, stable_slug
+
+    content_path = site_path / "content" / "cars"
+    content_path.mkdir(parents=True, exist_ok=True)
+    for listing in make_listings(count):
+        slug = stable_slug(listing)
+        (content_path / f"{slug}.md").write_text(render_listing(listing.with_changes(slug=slug)), encoding="utf-8")
+
+
+def make_photos(count: int, seed: int = 7) -> List[bytes]:
+    """Разные JPEG (разное содержимое - иначе хранилище фото их дедуплицирует)"""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    base = Image.new("RGB", (1600, 1200), (120, 130, 140))
+    photos = []
+    for _ in range(count):
+        image = base.copy()
+        image.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (0, 0, 400, 300))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Harness:
+    """bot/main.py с фейковой сессией Bot API"""
+
+    def __init__(self, photos: List[bytes]):
+        from aiogram.client.session.base import BaseSession
+        from aiogram.methods import GetFile, GetMe
+        from aiogram.types import Chat, File, Message, User
+
+        import main as bot_main
+
+        self.main = bot_main
+        self.bot = bot_main.bot
+        self.dp = bot_main.dp
+        self.car_manager = bot_main.car_manager
+        self.photos: Dict[str, bytes] = {f"photo-{i}": data for i, data in enumerate(photos)}
+        self.calls: Dict[str, int] = {}
+        self._message_id = 0
+        harness = self
+
+        class FakeSession(BaseSession):
+            """Отвечает на методы Bot API без сети"""
+
+            async def make_request(self, bot, method, timeout=None):
+                name = type(method).__name__
+                harness.calls[name] = harness.calls.get(name, 0) + 1
+                if isinstance(method, GetFile):
+                    return File(file_id=method.file_id, file_unique_id=method.file_id,
+                                file_path=f"photos/{method.file_id}.jpg")
+                if isinstance(method, GetMe):
+                    return User(id=BOT_ID, is_bot=True, first_name="Bench")
+                if getattr(method, "__returning__", None) is Message:
+                    harness._message_id += 1
+                    return Message(message_id=harness._message_id, date=datetime.now(),
+                                   chat=Chat(id=method.chat_id, type="private"),
+                                   text=getattr(method, "text", None))
+                return True
+
+            async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536,
+                                     raise_for_status=True) -> AsyncGenerator[bytes, None]:
+                file_id = url.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+                yield harness.photos[file_id]
+
+            async def close(self):
+                pass
+
+        # Middleware исходящих запросов (SendScheduler) остаются в цепочке
+        session = FakeSession()
+        session.middleware = self.bot.session.middleware
+        self.bot.session = session
+        self._update_id = 0
+
+    # ---------- Синтетические обновления ----------
+
+    def _user(self, user_id: int) -> Dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "language_code": "ru"}
+
+    def _message(self, user_id: int, **fields) -> Dict[str, Any]:
+        self._message_id += 1
+        return {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            **fields,
+        }
+
+    def _update(self, **payload):
+        from aiogram.types import Update
+
+        self._update_id += 1
+        return Update.model_validate({"update_id": self._update_id, **payload}, context={"bot": self.bot})
+
+    def text(self, user_id: int, text: str):
+        fields: Dict[str, Any] = {"text": text}
+        if text.startswith("/"):
+            fields["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return self._update(message=self._message(user_id, **fields))
+
+    def photo(self, user_id: int, file_id: str):
+        return self._update(message=self._message(user_id, photo=[
+            {"file_id": file_id, "file_unique_id": file_id, "width": 1600, "height": 1200},
+        ]))
+
+    def callback(self, user_id: int, data: str):
+        return self._update(callback_query={
+            "id": str(self._update_id),
+            "from": self._user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": BOT_ID, "is_bot": True, "first_name": "Bench"},
+                "text": "Всё верно?",
+            },
+        })
+
+    async def feed(self, update):
+        await self.dp.feed_update(self.bot, update)
+
+    async def close(self):
+        self.car_manager.photos.shutdown()
+        await self.dp.storage.close()
+        await self.bot.session.close()
+
+
+def wizard_steps(harness: Harness, user_id: int, number: int, photo_ids: List[str]):
+    """Обновления полного мастера добавления объявления"""
+    steps = [
+        harness.text(user_id, "/add_car"),
+        harness.text(user_id, "Toyota"),
+        # Разные модель и год - у объявлений, созданных в одну секунду, разные slug
+        harness.text(user_id, WIZARD_MODELS[number % len(WIZARD_MODELS)]),
+        harness.text(user_id, str(2000 + number // len(WIZARD_MODELS) % 25)),
+        harness.text(user_id, str(1_000_000 + number * 1000)),
+        harness.text(user_id, str(10_000 + number)),
+        harness.text(user_id, "2.5"),
+        harness.text(user_id, "Бензин"),
+        harness.text(user_id, "AT"),
+        harness.text(user_id, "Передний"),
+        harness.text(user_id, "Седан"),
+        harness.text(user_id, "Отличное"),
+        harness.text(user_id, "Белый"),
+        harness.text(user_id, f"Синтетическое объявление №{number}"),
+    ]
+    steps.extend(harness.photo(user_id, file_id) for file_id in photo_ids)
+    steps.append(harness.text(user_id, "✅ Готово"))
+    steps.append(harness.callback(user_id, "confirm_car"))
+    return steps
+
+
+def result(operations: int, seconds: float, unit: str, **extra) -> Dict[str, Any]:
+    return {"operations": operations, "seconds": round(seconds, 4),
+            "per_second": round(operations / seconds, 2) if seconds else None, "unit": unit, **extra}
+
+
+async def bench_search(harness: Harness, count: int, concurrency: int) -> Dict[str, Any]:
+    rng = random.Random(1)
+    updates = [harness.text(USER_BASE + i % 500, rng.choice(SEARCH_QUERIES)) for i in range(count)]
+    started = time.perf_counter()
+    for start in range(0, count, concurrency):
+        await asyncio.gather(*(harness.feed(update) for update in updates[start:start + concurrency]))
+    return result(count, time.perf_counter() - started, "updates")
+
+
+async def bench_wizard(harness: Harness, wizards: int, photos_per_car: int, photo_ids: List[str]) -> Dict[str, Any]:
+    listings_before = harness.car_manager.index.count()
+    runs = [
+        wizard_steps(harness, ADMIN_BASE + i, i, photo_ids[i * photos_per_car:(i + 1) * photos_per_car])
+        for i in range(wizards)
+    ]
+
+    async def run(steps):
+        for update in steps:
+            await harness.feed(update)
+
+    started = time.perf_counter()
+    # Мастера разных администраторов идут параллельно, шаги одного - по порядку
+    await asyncio.gather(*(run(steps) for steps in runs))
+    elapsed = time.perf_counter() - started
+
+    updates = sum(len(steps) for steps in runs)
+    published = harness.car_manager.index.count() - listings_before
+    return result(updates, elapsed, "updates", wizards=wizards, wizards_per_second=round(wizards / elapsed, 2),
+                  published=published)
+
+
+async def bench_photos(harness: Harness, photos: List[bytes]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    urls = await asyncio.gather(*(harness.car_manager.save_photo(data) for data in photos))
+    elapsed = time.perf_counter() - started
+    return result(len(urls), elapsed, "photos", megabytes=round(sum(map(len, photos)) / 1024 / 1024, 1))
+
+
+async def bench_publish(harness: Harness, count: int, images: List[Dict[str, str]]) -> Dict[str, Any]:
+    cars = []
+    for i in range(count):
+        variants = images[i % len(images)]
+        cars.append({
+            "brand": "Kia", "model": f"Rio {i}", "year": 2015 + i % 9, "price": 900_000 + i,
+            "mileage": 50_000 + i, "engine_volume": 1.6, "fuel_type": "Бензин", "transmission": "AT",
+            "drive_type": "Передний", "body_type": "Седан", "condition": "Хорошее", "color": "Серый",
+            "description": f"Объявление №{i}", "images": [variants["full"]],
+            "images_card": [variants["card"]], "images_thumb": [variants["thumb"]],
+        })
+    started = time.perf_counter()
+    for car in cars:
+        await harness.car_manager.create_car_listing(car)
+    return result(count, time.perf_counter() - started, "listings")
+
+
+def print_comparison(results: Dict[str, Any], baseline_path: Path):
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    print(f"\n📊 Сравнение с {baseline_path.name} (коммит {baseline.get('commit') or '?'}):")
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("per_second") or not current.get("per_second"):
+            continue
+        change = (current["per_second"] / previous["per_second"] - 1) * 100
+        mark = "🟢" if change >= -5 else "🔴"
+        print(f"   {mark} {name}: {previous['per_second']:,.1f} -> {current['per_second']:,.1f} "
+              f"{current['unit']}/с ({change:+.1f}%)")
+
+
+async def run(args) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    photo_count = max(args.photos, args.wizards * args.photos_per_car)
+    print(f"🖼 Генерация {photo_count} фото...")
+    photos = make_photos(photo_count)
+
+    harness = Harness(photos)
+    try:
+        results = {}
+        print(f"🔎 Поиск: {args.search} запросов...")
+        results["search"] = await bench_search(harness, args.search, args.concurrency)
+
+        print(f"🧙 Мастер: {args.wizards} объявлений по {args.photos_per_car} фото...")
+        results["wizard"] = await bench_wizard(harness, args.wizards, args.photos_per_car, list(harness.photos))
+
+        # Фото, не загруженные мастером (иначе хранилище вернет их без обработки)
+        fresh = make_photos(args.photos, seed=11)
+        print(f"📸 save_photo: {len(fresh)} фото...")
+        results["photos"] = await bench_photos(harness, fresh)
+
+        images = [await harness.car_manager.save_photo(data) for data in fresh[:5]]
+        print(f"📝 create_car_listing: {args.publish} объявлений...")
+        results["publish"] = await bench_publish(harness, args.publish, images)
+
+        return results, dict(sorted(harness.calls.items()))
+    finally:
+        await harness.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк бота (Dispatcher + CarManager) без сети")
+    parser.add_argument("--catalog", type=int, default=2000, help="Объявлений в синтетическом каталоге")
+    parser.add_argument("--search", type=int, default=2000, help="Поисковых запросов")
+    parser.add_argument("--concurrency", type=int, default=50, help="Одновременно обрабатываемых запросов")
+    parser.add_argument("--wizards", type=int, default=20, help="Прогонов мастера добавления")
+    parser.add_argument("--photos-per-car", type=int, default=3, help="Фото в одном объявлении мастера")
+    parser.add_argument("--photos", type=int, default=30, help="Фото для замера save_photo")
+    parser.add_argument("--publish", type=int, default=200, help="Вызовов create_car_listing")
+    parser.add_argument("--workdir", default=None, help="Директория для временного сайта (по умолчанию /dev/shm)")
+    parser.add_argument("--output", default=None, help="Файл для результатов в JSON")
+    parser.add_argument("--compare", default=None, help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    workdir = args.workdir or ("/dev/shm" if os.access("/dev/shm", os.W_OK) else None)
+    with tempfile.TemporaryDirectory(prefix="bench-bot-", dir=workdir) as tmp:
+        site_path = Path(tmp) / "hugo-site"
+        configure_environment(site_path, admins=args.wizards)
+        print(f"🚗 Каталог: {args.catalog} объявлений в {site_path}")
+        seed_catalog(site_path, args.catalog)
+
+        results, calls = asyncio.run(run(args))
+
+    report = {
+        "benchmark": "bot",
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+        "bot_api_calls": calls,
+    }
+
+    print()
+    for name, data in results.items():
+        print(f"⏱ {name}: {data['operations']} {data['unit']} за {data['seconds']:.2f} с - "
+              f"{data['per_second']:,.1f} {data['unit']}/с")
+    if "wizard" in results:
+        wizard = results["wizard"]
+        print(f"   мастер: {wizard['wizards_per_second']} объявлений/с, опубликовано {wizard['published']}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 Результаты: {output}")
+
+    if args.compare:
+        print_comparison(report, Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
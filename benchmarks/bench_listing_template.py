@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк шаблона объявления.
+
+Рендерит N синтетических объявлений (front matter + текст) и печатает
+скорость. С --min-rate завершается с кодом 1, если скорость ниже порога
+(для CI).
+
+Использование:
+    python bench_listing_template.py
+    python bench_listing_template.py -n 50000 --min-rate 5000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from listing import BodyType, FuelType, Listing, Transmission, format_date  # noqa: E402
+from listing_template import render_listing  # noqa: E402
+
+BRANDS = [("Toyota", "Camry"), ("BMW", "X5"), ("Лада", "Веста"), ("Kia", "Rio"), ("Mercedes-Benz", "E-Класс")]
+
+
+def make_listings(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    listings = []
+    for i in range(count):
+        brand, model = rng.choice(BRANDS)
+        listings.append(Listing(
+            brand=brand,
+            model=model,
+            year=rng.randint(2005, 2024),
+            price=rng.randint(300_000, 9_000_000),
+            mileage=rng.randint(0, 300_000),
+            engine_volume=rng.choice([1.4, 1.6, 2.0, 2.5, 3.0]),
+            fuel_type=rng.choice(list(FuelType)),
+            transmission=rng.choice(list(Transmission)),
+            body_type=rng.choice(list(BodyType)),
+            color="Белый",
+            description=f"Машина №{i}: \"один владелец\"\nобслуживание у дилера | без ДТП",
+            images=tuple(f"images/cars/{i:02x}/{n}.jpg" for n in range(5)),
+        ))
+    return listings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость рендера объявлений")
+    parser.add_argument("-n", "--count", type=int, default=20000, help="Количество объявлений")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество прогонов (берется лучший)")
+    parser.add_argument("--min-rate", type=float, default=0, help="Минимальная скорость, объявлений/с")
+    args = parser.parse_args()
+
+    listings = make_listings(args.count)
+    date = format_date()
+
+    best = float("inf")
+    size = 0
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        size = sum(len(render_listing(listing, date)) for listing in listings)
+        best = min(best, time.perf_counter() - started)
+
+    rate = args.count / best
+    print(f"📝 {args.count} объявлений за {best:.3f} с: {rate:,.0f} объявлений/с, "
+          f"{best / args.count * 1e6:.1f} мкс на объявление, {size / 1024 / 1024:.1f} МБ")
+
+    if args.min_rate and rate < args.min_rate:
+        print(f"❌ Ниже порога {args.min_rate:,.0f} объявлений/с")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
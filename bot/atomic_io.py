@@ -0,0 +1,53 @@
+"""
+Атомарная запись файлов
+
+Данные пишутся во временный файл в той же директории, сбрасываются
+на диск (fsync) и переименовываются в итоговый путь. Читатель видит
+либо старую версию файла, либо новую целиком - обрезанных файлов нет.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+
+def fsync_dir(path: Union[str, Path]):
+    """Сбрасывает на диск запись директории (новые имена файлов после rename)"""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Union[str, Path], data: bytes, sync_dir: bool = False):
+    """Атомарно записывает байты в файл"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp создает файл с правами 0600 - сайту нужны обычные 0644
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    if sync_dir:
+        fsync_dir(path.parent)
+
+
+def atomic_write_text(path: Union[str, Path], text: str, sync_dir: bool = False):
+    """Атомарно записывает текст (UTF-8) в файл"""
+    atomic_write_bytes(path, text.encode("utf-8"), sync_dir=sync_dir)
@@ -5,7 +5,10 @@
 
 import os
 from typing import Dict, Any, Optional
+from urllib.parse import quote, urlencode
 from config import WEBAPP_URL, is_admin
+from catalog_shards import shard_url
+from listing import BodyType, Condition, DriveType, FuelType, Transmission, choice_values
 
 def get_start_message() -> Dict[str, Any]:
     """Возвращает данные для стартового сообщения"""
@@ -95,6 +98,9 @@ def get_search_message() -> Dict[str, Any]:
 • Марку (например: BMW, Toyota)
 • Модель (например: X5, Camry)
 • Ценовой диапазон (например: до 2 млн)
+• Год выпуска (например: 2018+)
+
+Можно всё сразу: _камри до 2 млн 2018+_
 
 **Или используйте расширенный поиск в каталоге!**
     """
@@ -213,8 +219,90 @@ def get_callback_response(callback_data: str) -> Optional[Dict[str, Any]]:
         "parse_mode": "Markdown"
     }
 
-def search_by_text(query: str) -> Dict[str, Any]:
-    """Поиск автомобилей по тексту"""
+def _escape_markdown(text: str) -> str:
+    """Экранирует спецсимволы Markdown в пользовательских данных"""
+    for char in ('_', '*', '`', '['):
+        text = text.replace(char, '\\' + char)
+    return text
+
+
+def _listing_url(slug: str) -> str:
+    """URL страницы объявления на сайте"""
+    return f"{WEBAPP_URL}/cars/{quote(slug.lower())}/"
+
+
+def _catalog_url(brand: Optional[str], ranges: Dict, shards=None) -> str:
+    """URL каталога с фильтрами из поискового запроса"""
+    # Только марка - готовая страница марки вместо фильтра после загрузки
+    has_ranges = any(field in ("price", "year") for field in ranges)
+    url = None if has_ranges else shard_url(WEBAPP_URL, shards, brand)
+    if url:
+        return url
+
+    params = {}
+    if brand:
+        params["brand"] = brand
+    for field, (low, high) in ranges.items():
+        if field not in ("price", "year"):
+            continue
+        if low:
+            params[f"{field}_from"] = low
+        if high:
+            params[f"{field}_to"] = high
+    return f"{WEBAPP_URL}/cars/" + (f"?{urlencode(params)}" if params else "")
+
+
+def search_by_text(query: str, catalog=None, shards=None) -> Dict[str, Any]:
+    """
+    Поиск автомобилей по тексту (по каталогу, если передан CatalogSearch).
+
+    shards (CatalogShards) - ссылки на марку ведут на ее готовую страницу.
+    """
+
+    if catalog is not None:
+        found = catalog.search(query, limit=5)
+        if found["results"]:
+            return _format_search_results(found, shards)
+
+    return _search_by_brand_keyword(query, shards)
+
+
+def _format_search_results(found: Dict[str, Any], shards=None) -> Dict[str, Any]:
+    """Формирует сообщение с ранжированной выдачей"""
+
+    results = found["results"]
+    lines = [f"🔍 **Найдено автомобилей: {found['total']}**\n"]
+    buttons = []
+
+    for number, car in enumerate(results, 1):
+        title = _escape_markdown(f"{car.brand} {car.model}")
+        lines.append(
+            f"{number}. **{title}**, {car.year} — {car.price:,} ₽, {car.mileage:,} км".replace(",", " ")
+        )
+        buttons.append({
+            "text": f"🚗 {car.brand} {car.model}, {car.year}",
+            "web_app_url": _listing_url(car.slug)
+        })
+
+    if found["total"] > len(results):
+        lines.append(f"\n…и ещё {found['total'] - len(results)} в каталоге")
+
+    brands = {car.brand for car in results}
+    brand = brands.pop() if len(brands) == 1 else None
+    buttons.append({
+        "text": "🔍 Все результаты в каталоге",
+        "web_app_url": _catalog_url(brand, found["ranges"], shards)
+    })
+
+    return {
+        "text": "\n".join(lines),
+        "buttons": buttons,
+        "parse_mode": "Markdown"
+    }
+
+
+def _search_by_brand_keyword(query: str, shards=None) -> Dict[str, Any]:
+    """Поиск по ключевым словам марок (когда в каталоге ничего не нашлось)"""
 
     query_lower = query.lower()
 
@@ -240,7 +328,7 @@ def search_by_text(query: str) -> Dict[str, Any]:
             break
 
     if found_brand:
-        search_url = f"{WEBAPP_URL}/cars/?brand={found_brand}"
+        search_url = shard_url(WEBAPP_URL, shards, found_brand) or f"{WEBAPP_URL}/cars/?brand={found_brand}"
 
         text = f"🔍 **Поиск: {found_brand}**\n\nНайдены автомобили марки {found_brand}.\nОткройте каталог для просмотра!"
 
@@ -367,8 +455,8 @@ def get_admin_help_message() -> Dict[str, Any]:
 
 
 # Словари для выбора параметров автомобиля
-FUEL_TYPES = ["Бензин", "Дизель", "Гибрид", "Электро", "Газ"]
-TRANSMISSIONS = ["MT", "AT", "AMT", "CVT", "Робот"]
-DRIVE_TYPES = ["Передний", "Задний", "Полный"]
-BODY_TYPES = ["Седан", "Хэтчбек", "Универсал", "Внедорожник", "Купе", "Минивэн", "Пикап", "Кабриолет"]
-CONDITIONS = ["Отличное", "Хорошее", "Среднее", "Требует ремонта"]
+FUEL_TYPES = choice_values(FuelType)
+TRANSMISSIONS = choice_values(Transmission)
+DRIVE_TYPES = choice_values(DriveType)
+BODY_TYPES = choice_values(BodyType)
+CONDITIONS = choice_values(Condition)
@@ -1,23 +1,36 @@
 """
 Справочники марок и моделей автомобилей с поддержкой Dadata API
-Обновление данных: 1 раз в день
+Обновление данных: 1 раз в день (фоновая задача run_brands_refresher)
+
+Обработчики читают неизменяемый снимок справочника (BrandsSnapshot):
+сортированный список марок и клавиатуры строятся один раз на снимок,
+а обновление подменяет снимок целиком.
 """
 
 import os
 import json
+import random
+import asyncio
 import aiohttp
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Tuple
+
+from atomic_io import atomic_write_text
 
 
-# Настройки Dadata API
+# Настройки Dadata API (URL переопределяется для локальной заглушки tools/dadata_stub.py)
 DADATA_API_KEY = os.getenv("DADATA_API_KEY", "")
-DADATA_BRANDS_URL = "https://suggestions.dadata.ru/suggestions/api/4_1/rs/suggest/car_brand"
+DADATA_BRANDS_URL = os.getenv(
+    "DADATA_BRANDS_URL",
+    "https://suggestions.dadata.ru/suggestions/api/4_1/rs/suggest/car_brand"
+)
 
 # Путь к файлу кэша
 CACHE_FILE = Path(__file__).parent / "car_brands_cache.json"
 CACHE_DURATION = timedelta(days=1)  # Обновлять раз в день
+CACHE_SCHEMA = "car-brands"
+CACHE_VERSION = 2
 
 
 # Локальный справочник (фоллбек если API не работает)
@@ -77,39 +90,99 @@ LOCAL_CAR_BRANDS = {
 }
 
 
+def _dump_cache(brands: Dict[str, List[str]], last_update: Optional[datetime]) -> str:
+    """Компактный JSON кэша с заголовком схемы"""
+    return json.dumps({
+        "schema": CACHE_SCHEMA,
+        "version": CACHE_VERSION,
+        "last_update": last_update.isoformat() if last_update else None,
+        "brands": brands,
+    }, ensure_ascii=False, separators=(",", ":"))
+
+
+def _read_cache_file(path: Path) -> Tuple[Dict[str, List[str]], Optional[datetime]]:
+    """Читает и проверяет файл кэша; ValueError - если формат не тот"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("кэш справочника должен быть объектом JSON")
+
+    # Версия 1 - формат без заголовка (json с отступами)
+    version = data.get("version", 1) if data.get("schema", CACHE_SCHEMA) == CACHE_SCHEMA else None
+    if version not in (1, CACHE_VERSION):
+        raise ValueError(f"неизвестный формат кэша: {data.get('schema')} v{data.get('version')}")
+
+    brands = data.get("brands")
+    if not isinstance(brands, dict) or not all(
+        isinstance(models, list) and all(isinstance(model, str) for model in models)
+        for models in brands.values()
+    ):
+        raise ValueError("некорректный список марок в кэше")
+
+    last_update = data.get("last_update")
+    return brands, datetime.fromisoformat(last_update) if last_update else None
+
+
+class BrandsSnapshot:
+    """Неизменяемый снимок справочника с вычисленными один раз производными"""
+
+    __slots__ = ("brands", "sorted_brands", "last_update", "_memo")
+
+    def __init__(self, brands: Dict[str, List[str]], last_update: Optional[datetime] = None):
+        self.brands: Dict[str, Tuple[str, ...]] = {brand: tuple(models) for brand, models in brands.items()}
+        self.sorted_brands: Tuple[str, ...] = tuple(sorted(self.brands))
+        self.last_update = last_update
+        self._memo: Dict[Any, Any] = {}
+
+    def models(self, brand: str) -> Tuple[str, ...]:
+        """Модели марки"""
+        return self.brands.get(brand, ())
+
+    def memo(self, key: Any, factory: Callable[[], Any]) -> Any:
+        """Значение, вычисленное один раз для этого снимка (например, клавиатура марок)"""
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = factory()
+            return value
+
+
 class CarBrandsManager:
     """Менеджер справочников с кэшированием и API"""
 
-    def __init__(self):
+    def __init__(self, cache_duration: timedelta = CACHE_DURATION):
         self.brands_cache: Dict[str, List[str]] = {}
         self.cache_loaded = False
         self.last_update: Optional[datetime] = None
+        self.cache_duration = cache_duration
+        self.snapshot = BrandsSnapshot(LOCAL_CAR_BRANDS)
+        self._session: Optional[aiohttp.ClientSession] = None
 
-    def _load_cache(self):
-        """Загружает кэш из файла"""
+    def _publish_snapshot(self):
+        """Подменяет снимок справочника (одно присваивание - читатели видят старый или новый целиком)"""
+        self.snapshot = BrandsSnapshot(self.brands_cache or LOCAL_CAR_BRANDS, self.last_update)
+
+    async def _load_cache(self):
+        """Загружает кэш из файла (чтение и разбор - в потоке, цикл событий не блокируется)"""
         try:
-            if CACHE_FILE.exists():
-                with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.brands_cache = data.get('brands', {})
-                    last_update_str = data.get('last_update')
-                    if last_update_str:
-                        self.last_update = datetime.fromisoformat(last_update_str)
-                    self.cache_loaded = True
-                    print(f"✅ Кэш загружен из файла. Последнее обновление: {self.last_update}")
+            loaded = await asyncio.to_thread(_read_cache_file, CACHE_FILE)
+        except FileNotFoundError:
+            return
         except Exception as e:
+            # Поврежденный или чужой файл: работаем по локальному справочнику,
+            # кэш перезапишется при следующем обновлении
             print(f"⚠️ Ошибка загрузки кэша: {e}")
             self.brands_cache = LOCAL_CAR_BRANDS.copy()
+            self.last_update = None
+            return
+
+        self.brands_cache, self.last_update = loaded
+        print(f"✅ Кэш загружен из файла. Последнее обновление: {self.last_update}")
 
-    def _save_cache(self):
-        """Сохраняет кэш в файл"""
+    async def _save_cache(self):
+        """Сохраняет кэш в файл (атомарно, в потоке)"""
+        payload = _dump_cache(self.brands_cache, self.last_update)
         try:
-            data = {
-                'brands': self.brands_cache,
-                'last_update': self.last_update.isoformat() if self.last_update else None
-            }
-            with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            await asyncio.to_thread(atomic_write_text, CACHE_FILE, payload)
             print(f"✅ Кэш сохранен в файл")
         except Exception as e:
             print(f"⚠️ Ошибка сохранения кэша: {e}")
@@ -118,7 +191,7 @@ class CarBrandsManager:
         """Проверяет, устарел ли кэш"""
         if not self.last_update:
             return True
-        return datetime.now() - self.last_update > CACHE_DURATION
+        return datetime.now() - self.last_update > self.cache_duration
 
     async def _fetch_brands_from_api(self) -> List[str]:
         """Получает список марок из Dadata API"""
@@ -134,26 +207,33 @@ class CarBrandsManager:
 
             data = {"query": "", "count": 200}
 
+            if self._session is not None:
+                return await self._post_brands(self._session, headers, data)
             async with aiohttp.ClientSession() as session:
-                async with session.post(DADATA_BRANDS_URL, json=data, headers=headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        brands = [item["value"] for item in result.get("suggestions", [])]
-                        print(f"✅ Получено {len(brands)} марок из Dadata API")
-                        return brands
-                    else:
-                        print(f"⚠️ Ошибка Dadata API: {response.status}")
-                        return []
+                return await self._post_brands(session, headers, data)
 
         except Exception as e:
             print(f"⚠️ Ошибка при запросе к Dadata: {e}")
             return []
 
+    async def _post_brands(self, session: aiohttp.ClientSession, headers: Dict, data: Dict) -> List[str]:
+        async with session.post(DADATA_BRANDS_URL, json=data, headers=headers) as response:
+            if response.status == 200:
+                result = await response.json()
+                brands = [item["value"] for item in result.get("suggestions", [])]
+                print(f"✅ Получено {len(brands)} марок из Dadata API")
+                return brands
+            else:
+                print(f"⚠️ Ошибка Dadata API: {response.status}")
+                return []
+
     async def update_cache_if_needed(self):
         """Обновляет кэш если он устарел (раз в день)"""
         # Загружаем кэш из файла если еще не загружен
         if not self.cache_loaded:
-            self._load_cache()
+            await self._load_cache()
+            self.cache_loaded = True
+            self._publish_snapshot()
 
         # Проверяем нужно ли обновление
         if not self._is_cache_expired():
@@ -178,25 +258,65 @@ class CarBrandsManager:
 
             self.brands_cache = new_cache
             self.last_update = datetime.now()
-            self._save_cache()
+            await self._save_cache()
+            self._publish_snapshot()
             print(f"✅ Справочник обновлен! Марок: {len(self.brands_cache)}")
         else:
             # Если API не сработал - используем локальный справочник
             if not self.brands_cache:
                 self.brands_cache = LOCAL_CAR_BRANDS.copy()
                 self.last_update = datetime.now()
-                self._save_cache()
+                await self._save_cache()
+                self._publish_snapshot()
                 print("⚠️ Используем локальный справочник (API недоступен)")
 
+    async def run_refresher(self, jitter: float = 0.1, retry_delay: float = 300):
+        """
+        Фоновое обновление справочника по расписанию.
+
+        Одна ClientSession на все запросы; к интервалу добавляется случайная
+        задержка до jitter * cache_duration, чтобы несколько экземпляров
+        бота не ходили в API одновременно.
+        """
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            self._session = session
+            try:
+                while True:
+                    try:
+                        await self.update_cache_if_needed()
+                    except Exception as e:
+                        print(f"⚠️ Ошибка обновления справочника марок: {e}")
+                    await asyncio.sleep(self._next_refresh_delay(jitter, retry_delay))
+            finally:
+                self._session = None
+
+    def _next_refresh_delay(self, jitter: float, retry_delay: float) -> float:
+        interval = self.cache_duration.total_seconds()
+        if self.last_update is None:
+            return retry_delay
+        remaining = (self.last_update + self.cache_duration - datetime.now()).total_seconds()
+        if remaining <= 0:
+            # Кэш устарел, а обновить не вышло - повторяем раньше, чем через сутки
+            return retry_delay
+        return remaining + random.uniform(0, jitter * interval)
+
     def get_all_brands(self) -> List[str]:
         """Возвращает список всех марок"""
-        if not self.brands_cache:
-            self.brands_cache = LOCAL_CAR_BRANDS.copy()
-        return sorted(self.brands_cache.keys())
+        return list(self.snapshot.sorted_brands)
 
     def get_models_for_brand(self, brand: str) -> List[str]:
         """Возвращает список моделей для марки"""
-        return self.brands_cache.get(brand, [])
+        return list(self.snapshot.models(brand))
+
+    def add_brand(self, brand: str) -> bool:
+        """Добавляет марку, введенную вручную (новый снимок); False - если уже есть"""
+        if brand in self.snapshot.brands:
+            return False
+        brands = dict(self.snapshot.brands)
+        brands[brand] = ()
+        self.brands_cache = {name: list(models) for name, models in brands.items()}
+        self.snapshot = BrandsSnapshot(brands, self.last_update)
+        return True
 
 
 # Глобальный экземпляр менеджера
@@ -219,5 +339,22 @@ def get_models_for_brand(brand: str) -> List[str]:
     return _manager.get_models_for_brand(brand)
 
 
+def get_brands_snapshot() -> BrandsSnapshot:
+    """Текущий снимок справочника"""
+    return _manager.snapshot
+
+
+def add_brand(brand: str) -> bool:
+    """Добавляет марку, введенную вручную"""
+    return _manager.add_brand(brand)
+
+
+async def run_brands_refresher(interval: Optional[timedelta] = None, jitter: float = 0.1):
+    """Фоновая задача обновления справочника (запускается из main)"""
+    if interval is not None:
+        _manager.cache_duration = interval
+    await _manager.run_refresher(jitter=jitter)
+
+
 # Для обратной совместимости
 CAR_BRANDS = LOCAL_CAR_BRANDS
@@ -2,19 +2,34 @@
 Менеджер для создания и управления объявлениями автомобилей
 """
 
+import asyncio
 import os
-import re
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
-import aiofiles
 import aiohttp
 
+from listing import Listing
+from listing_index import ListingIndex
+from listing_template import render_listing
+from publish_journal import PublishJournal
+from photo_pipeline import PhotoPipeline, VARIANTS
+from image_store import ImageStore, content_digest
+from catalog_facets import CatalogFacets
+from catalog_feed import CatalogFeed
+from catalog_search import CatalogSearch
+from catalog_shards import CatalogShards
+from models_data import ModelsData
+from fuzzy_match import CatalogNames
+from metrics import LISTING_SECONDS
+from translit import slugify
+
 
 class CarManager:
     """Класс для управления объявлениями автомобилей"""
 
-    def __init__(self, hugo_site_path: str = "../hugo-site"):
+    def __init__(self, hugo_site_path: str = "../hugo-site",
+                 photo_downloads: int = 4, photo_workers: Optional[int] = None):
         self.hugo_site_path = Path(hugo_site_path)
         self.content_path = self.hugo_site_path / "content" / "cars"
         self.images_path = self.hugo_site_path / "static" / "images" / "cars"
@@ -23,154 +38,113 @@ class CarManager:
         self.content_path.mkdir(parents=True, exist_ok=True)
         self.images_path.mkdir(parents=True, exist_ok=True)
 
+        # Доводим или откатываем публикации, прерванные сбоем
+        self.journal = PublishJournal(self.hugo_site_path)
+        self.journal.recover()
+
+        # Скачивание и нарезка фотографий
+        self.photos = PhotoPipeline(max_downloads=photo_downloads, workers=photo_workers)
+
+        # Хранилище фото с адресацией по содержимому (дедупликация)
+        self.images = ImageStore(self.images_path)
+
+        # Индекс объявлений в памяти (один разбор front matter при старте)
+        self.index = ListingIndex(self.content_path)
+        # Поиск, марки/модели каталога и счетчики ссылок на фото подписываются на индекс до загрузки
+        self.search = CatalogSearch(self.index)
+        self.names = CatalogNames()
+        self.names.track(self.index)
+        self.images.track(self.index)
+        # Данные для сайта в static/cars: каталог для фильтра, счетчики фильтров,
+        # марки/модели для главной, страницы марок для ссылок из бота
+        site_data_path = self.hugo_site_path / "static" / "cars"
+        self.shards = CatalogShards(site_data_path)
+        self.site_exports = [CatalogFeed(site_data_path), CatalogFacets(site_data_path),
+                             ModelsData(site_data_path), self.shards]
+        for export in self.site_exports:
+            export.track(self.index)
+        self.index.load()
+        for export in self.site_exports:
+            export.write()
+
     def slugify(self, text: str) -> str:
         """Создает slug из текста (для имен файлов)"""
-        # Транслитерация
-        translit_dict = {
-            'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-            'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-            'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-            'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-            'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya'
-        }
-
-        text = text.lower()
-        result = []
-        for char in text:
-            if char in translit_dict:
-                result.append(translit_dict[char])
-            elif char.isalnum() or char in ['-', '_']:
-                result.append(char)
-            elif char == ' ':
-                result.append('-')
-
-        slug = ''.join(result)
-        # Удаляем повторяющиеся дефисы
-        slug = re.sub(r'-+', '-', slug)
-        return slug.strip('-')
-
-    async def save_photo(self, photo_data: bytes, filename: str) -> str:
-        """Сохраняет фотографию и возвращает путь"""
-        filepath = self.images_path / filename
-
-        async with aiofiles.open(filepath, 'wb') as f:
-            await f.write(photo_data)
-
-        # Возвращаем путь относительно static
-        return f"images/cars/{filename}"
+        return slugify(text)
+
+    async def save_photo(self, photo_data: bytes) -> Dict[str, str]:
+        """
+        Сохраняет фотографию в нескольких размерах (JPEG + WebP рядом)
+        и возвращает пути вариантов относительно static: {"thumb", "card", "full"}
+
+        Имена файлов - хэш содержимого: повторно загруженное фото
+        не обрабатывается и не записывается второй раз.
+        """
+        digest = content_digest(photo_data)
+        formats = [(name, ext) for name in VARIANTS for ext in ("jpg", "webp")]
+
+        if not self.images.exists(digest, formats):
+            variants = await self.photos.render(photo_data)
+            await asyncio.gather(*(
+                self.images.put(digest, name, ext, variants[name][ext])
+                for name, ext in formats
+            ))
+
+        return {name: self.images.url_for(digest, name) for name in VARIANTS}
 
     async def create_car_listing(self, car_data: Dict) -> str:
         """Создает объявление автомобиля (markdown файл для Hugo)"""
+        with LISTING_SECONDS.timer():
+            return await self._create_car_listing(car_data)
 
-        # Генерируем имя файла
-        brand = car_data.get('brand', 'unknown')
-        model = car_data.get('model', 'unknown')
-        year = car_data.get('year', datetime.now().year)
-
-        # Добавляем timestamp для уникальности
+    async def _create_car_listing(self, car_data: Dict) -> str:
+        # Генерируем имя файла (timestamp для уникальности)
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        slug = f"{self.slugify(brand)}-{self.slugify(model)}-{year}-{timestamp}"
-        filename = f"{slug}.md"
-        filepath = self.content_path / filename
-
-        # Формируем заголовок
-        title = f"{brand} {model} {car_data.get('engine_volume', '')} {car_data.get('transmission', '')}, {year}"
-        if car_data.get('mileage'):
-            title += f", {car_data.get('mileage')} км"
-
-        # Формируем список изображений
-        images = car_data.get('images', [])
-        images_str = ', '.join([f'"{img}"' for img in images])
-
-        # Формируем front matter
-        front_matter = f"""---
-title: "{title}"
-date: {datetime.now().strftime('%Y-%m-%dT%H:%M:%S+03:00')}
-draft: false
-image: "{images[0] if images else ''}"
-images: [{images_str}]
-
-# Данные для фильтрации
-brand: "{car_data.get('brand', '')}"
-model: "{car_data.get('model', '')}"
-
-year: {car_data.get('year', datetime.now().year)}
-price: {car_data.get('price', 0)}
-mileage: {car_data.get('mileage', 0)}
-engine_volume: {car_data.get('engine_volume', 0)}
-fuel_type: "{car_data.get('fuel_type', 'Бензин')}"
-transmission: "{car_data.get('transmission', 'MT')}"
-drive_type: "{car_data.get('drive_type', 'Передний')}"
-body_type: "{car_data.get('body_type', 'Седан')}"
-color: "{car_data.get('color', 'Не указан')}"
-condition: "{car_data.get('condition', 'Хорошее')}"
-vin: "{car_data.get('vin', 'Не указан')}"
-owners_count: {car_data.get('owners_count', 1)}
-pts_original: {str(car_data.get('pts_original', True)).lower()}
-customs_cleared: true
-exchange_possible: {str(car_data.get('exchange_possible', False)).lower()}
-credit_available: {str(car_data.get('credit_available', True)).lower()}
-description: "{car_data.get('description', '').replace('"', '\\"')}"
-source_url: ""
-tags: ["автомобиль", "telegram"]
-weight: 1
----
-
-## Характеристики {brand} {model} {year}
-
-| Параметр | Значение |
-|----------|----------|
-| **Марка** | {car_data.get('brand', '')} |
-| **Модель** | {car_data.get('model', '')} |
-| **Год выпуска** | {year} |
-| **Цена** | {car_data.get('price', 0):,} ₽ |
-| **Пробег** | {car_data.get('mileage', 0):,} км |
-| **Объем двигателя** | {car_data.get('engine_volume', 0)} л |
-| **Тип топлива** | {car_data.get('fuel_type', 'Бензин')} |
-| **Коробка передач** | {car_data.get('transmission', 'MT')} |
-| **Тип кузова** | {car_data.get('body_type', 'Седан')} |
-| **Цвет** | {car_data.get('color', 'Не указан')} |
-| **Состояние** | {car_data.get('condition', 'Хорошее')} |
-
-## Описание
-
-{car_data.get('description', 'Описание отсутствует.')}
-
-### Контакты
-- Телефон: +7 (999) 123-45-67
-- Email: info@auto-lombard.ru
-
-**Возможен обмен, кредит, лизинг.**
-"""
+        brand = car_data.get('brand') or 'unknown'
+        model = car_data.get('model') or 'unknown'
+        year = car_data.get('year') or datetime.now().year
+        slug = f"{self.slugify(str(brand))}-{self.slugify(str(model))}-{year}-{timestamp}"
+        filepath = self.content_path / f"{slug}.md"
+
+        listing = Listing.from_dict(car_data, slug=slug)
+        content = render_listing(listing)
+
+        # Фото уже лежат в хранилище (записаны атомарно при загрузке);
+        # объявление не публикуем, если какого-то из них нет
+        static_path = self.hugo_site_path / "static"
+        missing = [path for path in listing.all_images() if not (static_path / path).exists()]
+        if missing:
+            raise FileNotFoundError(f"Не найдены фото объявления: {', '.join(missing)}")
+
+        # Транзакционная запись: staging + журнал, markdown переносится на место последним
+        await self.journal.publish([(filepath, content.encode('utf-8'))])
 
-        # Сохраняем файл
-        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-            await f.write(front_matter)
+        self.index.refresh_file(filepath)
 
         return str(filepath)
 
     def format_car_summary(self, car_data: Dict) -> str:
         """Форматирует краткую информацию об автомобиле для предпросмотра"""
+        listing = Listing.from_dict(car_data)
 
         summary = f"""
-🚗 **{car_data.get('brand', '')} {car_data.get('model', '')}**
+🚗 **{listing.brand} {listing.model}**
 
-📅 Год: {car_data.get('year', '')}
-💰 Цена: {car_data.get('price', 0):,} ₽
-🛣 Пробег: {car_data.get('mileage', 0):,} км
+📅 Год: {listing.year}
+💰 Цена: {listing.price:,} ₽
+🛣 Пробег: {listing.mileage:,} км
 
-⚙️ Двигатель: {car_data.get('engine_volume', '')} л, {car_data.get('fuel_type', '')}
-🔧 КПП: {car_data.get('transmission', '')}
-🚙 Кузов: {car_data.get('body_type', '')}
-🎨 Цвет: {car_data.get('color', '')}
+⚙️ Двигатель: {listing.engine_volume} л, {listing.fuel_type}
+🔧 КПП: {listing.transmission}
+🚙 Кузов: {listing.body_type}
+🎨 Цвет: {listing.color}
 
-📝 Состояние: {car_data.get('condition', '')}
-👥 Владельцев: {car_data.get('owners_count', '')}
-📋 ПТС: {'Оригинал' if car_data.get('pts_original') else 'Дубликат'}
+📝 Состояние: {listing.condition}
+👥 Владельцев: {listing.owners_count}
+📋 ПТС: {'Оригинал' if listing.pts_original else 'Дубликат'}
 
-📸 Фотографий: {len(car_data.get('images', []))}
+📸 Фотографий: {len(listing.images)}
 
 💬 Описание:
-{car_data.get('description', 'Не указано')[:200]}...
+{(listing.description or 'Не указано')[:200]}...
 """
         return summary
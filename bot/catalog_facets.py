@@ -0,0 +1,132 @@
+"""
+Счетчики для фильтров каталога (static/cars/facets.json)
+
+Фильтры на сайте применяются в порядке марка -> кузов -> топливо -> КПП.
+Для каждого префикса этой цепочки, который встречается в каталоге,
+хранится число объявлений по значениям следующих полей и гистограммы
+цен и годов с фиксированными границами:
+
+    {"fields": [...], "separator": "|", "price_buckets": [...], "year_buckets": [...],
+     "facets": {"": {...}, "BMW": {...}, "BMW|Седан": {...}, ...}}
+
+    "BMW": {"count": 3, "body_type": {"Седан": 2, ...}, "fuel_type": {...},
+            "transmission": {...}, "price": [0, 1, 2, ...], "year": [...]}
+
+Счетчики строятся за один проход при загрузке индекса и дальше меняются
+на +-1 по событиям add/remove: объявление затрагивает только узлы своих
+префиксов (не больше len(FACET_FIELDS) + 1 штук). Цепочка префиксов
+обрывается на первом пустом значении - как и на сайте, где фильтры
+после невыбранного не сужают узел.
+"""
+
+import bisect
+import logging
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from listing import NOT_SPECIFIED, Listing
+from site_export import SiteExport
+
+logger = logging.getLogger(__name__)
+
+FACETS_NAME = "facets.json"
+
+# Порядок фильтров: префикс ключа узла - значения первых полей
+FACET_FIELDS = ("brand", "body_type", "fuel_type", "transmission")
+KEY_SEPARATOR = "|"
+
+# Нижние границы корзин: корзина i - от bounds[i] до bounds[i + 1]
+PRICE_BUCKETS = (0, 300_000, 500_000, 750_000, 1_000_000, 1_500_000, 2_000_000,
+                 3_000_000, 5_000_000, 10_000_000)
+YEAR_BUCKETS = (0, 2000, 2005, 2010, 2013, 2016, 2019, 2022)
+
+
+def _value(entry: Listing, field: str) -> str:
+    value = str(getattr(entry, field))
+    return "" if value == NOT_SPECIFIED else value
+
+
+def _bucket(bounds: Tuple[int, ...], value: int) -> int:
+    return max(bisect.bisect_right(bounds, value) - 1, 0)
+
+
+class FacetNode:
+    """Счетчики объявлений с общим префиксом значений FACET_FIELDS"""
+
+    __slots__ = ("depth", "count", "values", "price", "year")
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.count = 0
+        # Поля до depth зафиксированы префиксом - считаем только следующие
+        self.values: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS[depth:]}
+        self.price = [0] * len(PRICE_BUCKETS)
+        self.year = [0] * len(YEAR_BUCKETS)
+
+    def update(self, entry: Listing, values: Tuple[str, ...], delta: int):
+        self.count += delta
+        for field, value in zip(FACET_FIELDS[self.depth:], values[self.depth:]):
+            if not value:
+                continue
+            counts = self.values[field]
+            count = counts.get(value, 0) + delta
+            if count > 0:
+                counts[value] = count
+            else:
+                counts.pop(value, None)
+        self.price[_bucket(PRICE_BUCKETS, entry.price)] += delta
+        self.year[_bucket(YEAR_BUCKETS, entry.year)] += delta
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"count": self.count}
+        for field, counts in self.values.items():
+            data[field] = dict(sorted(counts.items()))
+        data["price"] = list(self.price)
+        data["year"] = list(self.year)
+        return data
+
+
+class CatalogFacets(SiteExport):
+    """Счетчики фильтров по префиксам, обновляются вместе с ListingIndex"""
+
+    def __init__(self, output_path: Path, debounce: float = 1.0):
+        super().__init__(debounce)
+        self.path = Path(output_path) / FACETS_NAME
+        self.nodes: Dict[Tuple[str, ...], FacetNode] = {}
+
+    def apply(self, event: str, entry: Listing):
+        delta = 1 if event == "add" else -1
+        values = tuple(_value(entry, field) for field in FACET_FIELDS)
+        for depth in range(len(FACET_FIELDS) + 1):
+            if depth and not values[depth - 1]:
+                # Ключ ("",) совпал бы с корнем "" в facets.json
+                break
+            key = values[:depth]
+            node = self.nodes.get(key)
+            if node is None:
+                if delta < 0:
+                    continue
+                node = self.nodes[key] = FacetNode(depth)
+            node.update(entry, values, delta)
+            if node.count <= 0 and key:
+                del self.nodes[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        facets = {KEY_SEPARATOR.join(key): node.to_dict() for key, node in sorted(self.nodes.items())}
+        if "" not in facets:
+            facets[""] = FacetNode(0).to_dict()
+        return {
+            "fields": list(FACET_FIELDS),
+            "separator": KEY_SEPARATOR,
+            "price_buckets": list(PRICE_BUCKETS),
+            "year_buckets": list(YEAR_BUCKETS),
+            "facets": facets,
+        }
+
+    def _write(self, data: Dict[str, Any]) -> bool:
+        if not self.write_json(self.path, data):
+            return False
+        logger.info(f"Счетчики фильтров обновлены: {len(data['facets'])} узлов, "
+                    f"{len(self._written[self.path]) // 1024} КБ")
+        return True
+
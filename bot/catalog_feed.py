@@ -0,0 +1,142 @@
+"""
+Каталог объявлений для WebApp в виде компактного JSON
+
+Фильтр на сайте (static/js/search-filter.js) загружает весь каталог
+одним файлом вместо разбора карточек текущей страницы. Файл колоночный:
+по массиву на поле, строки с малым числом значений (марка, КПП, кузов...)
+закодированы индексами в словари.
+
+    static/cars/index.<hash>.json      - данные (+ .gz и .br рядом)
+    static/cars/index.json             - манифест: имя актуального файла
+
+Хеш содержимого в имени позволяет кэшировать данные бессрочно, а
+маленький манифест - перезапрашивать. Файлы пишутся атомарно и
+только при изменении содержимого; предыдущая версия остается для
+клиентов, успевших загрузить старый манифест.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from atomic_io import atomic_write_bytes
+from listing import NOT_SPECIFIED, Listing
+from site_export import SiteExport
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен - без него пишется только .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+FEED_VERSION = 1
+MANIFEST_NAME = "index.json"
+
+# Поля со словарным кодированием (значения повторяются)
+DICT_FIELDS = ("brand", "model", "fuel_type", "transmission", "drive_type", "body_type", "condition", "color")
+# Поля, которые пишутся как есть
+PLAIN_FIELDS = ("year", "price", "mileage", "engine_volume")
+
+_FEED_FILE_RE = re.compile(r"^index\.[0-9a-f]{16}\.json(\.gz|\.br)?$")
+
+
+def card_image(listing: Listing) -> str:
+    """Фото для карточки: вариант card, если бот его нарезал"""
+    for images in (listing.images_card, listing.images_thumb, listing.images):
+        if images:
+            return images[0]
+    return ""
+
+
+def hugo_order(listings: Sequence[Listing]) -> List[Listing]:
+    """Порядок Hugo по умолчанию: weight (без веса - в конце), затем дата по убыванию"""
+    ordered = sorted(listings, key=lambda listing: listing.slug)
+    ordered.sort(key=lambda listing: listing.date or "", reverse=True)
+    ordered.sort(key=lambda listing: listing.weight or float("inf"))
+    return ordered
+
+
+def build_feed(listings: Sequence[Listing]) -> Dict[str, Any]:
+    """Колоночное представление каталога (новые объявления первыми, как в Hugo)"""
+    ordered = hugo_order(listings)
+
+    dicts: Dict[str, List[str]] = {}
+    columns: Dict[str, List[Any]] = {"slug": [listing.slug.lower() for listing in ordered]}
+
+    for field in DICT_FIELDS:
+        values: Dict[str, int] = {}
+        column = []
+        for listing in ordered:
+            value = str(getattr(listing, field))
+            if value == NOT_SPECIFIED:
+                value = ""
+            code = values.get(value)
+            if code is None:
+                code = values[value] = len(values)
+            column.append(code)
+        dicts[field] = list(values)
+        columns[field] = column
+
+    for field in PLAIN_FIELDS:
+        columns[field] = [getattr(listing, field) for listing in ordered]
+    columns["image"] = [card_image(listing) for listing in ordered]
+
+    return {"version": FEED_VERSION, "count": len(ordered), "dicts": dicts, "columns": columns}
+
+
+def encode_feed(feed: Dict[str, Any]) -> bytes:
+    return json.dumps(feed, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CatalogFeed(SiteExport):
+    """Файлы каталога в static/cars, обновляются вместе с ListingIndex"""
+
+    def __init__(self, output_path: Path, debounce: float = 1.0):
+        super().__init__(debounce)
+        self.output_path = Path(output_path)
+        self.current: Optional[str] = None
+
+    def _write(self, listings: List[Listing]) -> str:
+        data = encode_feed(build_feed(listings))
+        digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+        name = f"index.{digest}.json"
+
+        previous = self.current or self._read_manifest()
+        if name == previous and (self.output_path / name).exists():
+            self.current = name
+            return name
+
+        target = self.output_path / name
+        atomic_write_bytes(target, data)
+        atomic_write_bytes(target.with_name(f"{name}.gz"), gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            atomic_write_bytes(target.with_name(f"{name}.br"), brotli.compress(data))
+
+        manifest = {"version": FEED_VERSION, "file": name, "count": len(listings), "bytes": len(data)}
+        atomic_write_bytes(self.output_path / MANIFEST_NAME,
+                           json.dumps(manifest, ensure_ascii=False).encode("utf-8"), sync_dir=True)
+
+        self._cleanup(keep={name, previous})
+        self.current = name
+        logger.info(f"Каталог для сайта обновлен: {name} ({len(listings)} объявлений, {len(data) // 1024} КБ)")
+        return name
+
+    def _read_manifest(self) -> Optional[str]:
+        try:
+            return json.loads((self.output_path / MANIFEST_NAME).read_text(encoding="utf-8")).get("file")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _cleanup(self, keep: set):
+        """Удаляет старые версии, кроме текущей и предыдущей"""
+        for path in self.output_path.glob("index.*.json*"):
+            if not _FEED_FILE_RE.match(path.name):
+                continue
+            base = path.name[:-3] if path.name.endswith((".gz", ".br")) else path.name
+            if base not in keep:
+                path.unlink(missing_ok=True)
@@ -0,0 +1,272 @@
+"""
+Поиск по каталогу объявлений
+
+Инвертированный индекс token -> slug по марке, модели, цвету, кузову
+и описанию плюс отсортированные массивы цены, года и пробега.
+Строится из ListingIndex и обновляется вместе с ним.
+"""
+
+import bisect
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from fuzzy_match import FuzzyIndex
+from listing import NOT_SPECIFIED, Listing
+from listing_index import ListingIndex
+from translit import normalize_token
+
+
+# Вес совпадения по полю (чем выше, тем выше объявление в выдаче)
+FIELD_WEIGHTS = {
+    "brand": 5.0,
+    "model": 4.0,
+    "body_type": 2.0,
+    "color": 1.5,
+    "description": 0.5,
+}
+
+NUMERIC_FIELDS = ("price", "year", "mileage")
+
+MIN_PREFIX_LENGTH = 3
+
+# Опечатки ("camri", "тайота") ищутся среди слов каталога с таким порогом сходства
+MIN_FUZZY_LENGTH = 4
+FUZZY_THRESHOLD = 0.7
+FUZZY_WEIGHT = 0.6
+
+STOP_WORDS = {
+    "до", "от", "с", "со", "и", "в", "на", "за", "по", "не", "или", "после",
+    "года", "год", "г", "гв", "руб", "рублей", "р", "км", "млн", "тыс",
+    "пробег", "пробегом", "машина", "машину", "авто", "автомобиль",
+    "купить", "ищу", "нужен", "нужна", "хочу", "есть",
+}
+
+_TOKEN_RE = re.compile(r"[0-9a-zа-яё]+")
+
+_MULTIPLIERS = {"млн": 1_000_000, "м": 1_000_000, "тыс": 1_000, "т": 1_000, "к": 1_000}
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+_UNIT = r"\s*(?:(млн|тыс|м|т|к)(?![а-яa-z])\.?)?"
+
+# После числа нет единиц цены или пробега: "до 2020" - год, "до 2000 тыс" - цена
+_NO_UNIT = r"(?!\s*(?:(?:млн|тыс|руб)[а-я]*|[мткр]|км)(?![а-яa-z])|\s*₽)"
+
+_YEAR_PLUS_RE = re.compile(r"\b((?:19|20)\d\d)\s*\+")
+_YEAR_RANGE_RE = re.compile(r"\b((?:19|20)\d\d)\s*[-–]\s*((?:19|20)\d\d)\b")
+_YEAR_FROM_RE = re.compile(r"\b(?:с|от|после|не старше)\s+((?:19|20)\d\d)\b" + _NO_UNIT)
+_YEAR_TO_RE = re.compile(r"\bдо\s+((?:19|20)\d\d)\b" + _NO_UNIT)
+_MILEAGE_TO_RE = re.compile(r"(?:пробег\w*\s+)?до\s+" + _NUMBER + _UNIT + r"\s*км\b")
+_PRICE_FROM_RE = re.compile(r"\bот\s+" + _NUMBER + _UNIT + r"(?!\s*км)")
+_PRICE_TO_RE = re.compile(r"\bдо\s+" + _NUMBER + _UNIT + r"(?!\s*км)")
+_YEAR_RE = re.compile(r"\b((?:19|20)\d\d)\b")
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на нормализованные токены без стоп-слов"""
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        token = normalize_token(word)
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def _amount(number: str, unit: Optional[str]) -> int:
+    value = float(number.replace(",", "."))
+    if unit:
+        return int(value * _MULTIPLIERS[unit])
+    # "до 2" без единиц - это миллионы, "до 2500000" - рубли
+    if value < 100:
+        return int(value * 1_000_000)
+    return int(value)
+
+
+def parse_query(query: str) -> Tuple[str, Dict[str, Tuple[Optional[int], Optional[int]]]]:
+    """
+    Извлекает из запроса числовые условия.
+
+    Возвращает остаток текста и диапазоны {field: (min, max)}:
+    "камри до 2 млн 2018+" -> ("камри", {"price": (None, 2000000), "year": (2018, None)})
+    """
+    text = query.lower().replace("\xa0", " ")
+    ranges: Dict[str, List[Optional[int]]] = {}
+
+    def set_range(field: str, low: Optional[int] = None, high: Optional[int] = None):
+        current = ranges.setdefault(field, [None, None])
+        if low is not None:
+            current[0] = low
+        if high is not None:
+            current[1] = high
+
+    def consume(pattern, handler):
+        nonlocal text
+        match = pattern.search(text)
+        while match:
+            handler(match)
+            text = text[:match.start()] + " " + text[match.end():]
+            match = pattern.search(text)
+
+    consume(_YEAR_RANGE_RE, lambda m: set_range("year", int(m.group(1)), int(m.group(2))))
+    consume(_YEAR_PLUS_RE, lambda m: set_range("year", low=int(m.group(1))))
+    consume(_YEAR_FROM_RE, lambda m: set_range("year", low=int(m.group(1))))
+    consume(_YEAR_TO_RE, lambda m: set_range("year", high=int(m.group(1))))
+    consume(_MILEAGE_TO_RE, lambda m: set_range("mileage", high=_amount(m.group(1), m.group(2))))
+    consume(_PRICE_FROM_RE, lambda m: set_range("price", low=_amount(m.group(1), m.group(2))))
+    consume(_PRICE_TO_RE, lambda m: set_range("price", high=_amount(m.group(1), m.group(2))))
+    # Одиночный год ("камри 2018") - точное совпадение
+    consume(_YEAR_RE, lambda m: set_range("year", int(m.group(1)), int(m.group(1))))
+
+    return text, {field: (low, high) for field, (low, high) in ranges.items()}
+
+
+class CatalogSearch:
+    """Поисковый движок по объявлениям из ListingIndex"""
+
+    def __init__(self, index: ListingIndex):
+        self.index = index
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._fuzzy = FuzzyIndex()
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._numeric: Dict[str, List[Tuple[int, str]]] = {field: [] for field in NUMERIC_FIELDS}
+
+        for entry in index.entries.values():
+            self._add(entry)
+        index.add_listener(self._on_index_event)
+
+    # ---------- Обновление ----------
+
+    def _on_index_event(self, event: str, entry: Listing):
+        if event == "add":
+            self._add(entry)
+        elif event == "remove":
+            self._remove(entry)
+
+    def _add(self, entry: Listing):
+        doc_tokens = set()
+        for field, weight in FIELD_WEIGHTS.items():
+            value = getattr(entry, field)
+            if value == NOT_SPECIFIED:
+                continue
+            for token in tokenize(value):
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = {}
+                    self._vocabulary_dirty = True
+                    if not token.isdigit():
+                        self._fuzzy.add(token)
+                if postings.get(entry.slug, 0) < weight:
+                    postings[entry.slug] = weight
+                doc_tokens.add(token)
+        self._doc_tokens[entry.slug] = doc_tokens
+
+        for field in NUMERIC_FIELDS:
+            bisect.insort(self._numeric[field], (getattr(entry, field), entry.slug))
+
+    def _remove(self, entry: Listing):
+        for token in self._doc_tokens.pop(entry.slug, ()):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(entry.slug, None)
+            if not postings:
+                del self.postings[token]
+                self._vocabulary_dirty = True
+                if not token.isdigit():
+                    self._fuzzy.remove(token)
+
+        for field in NUMERIC_FIELDS:
+            values = self._numeric[field]
+            key = (getattr(entry, field), entry.slug)
+            pos = bisect.bisect_left(values, key)
+            if pos < len(values) and values[pos] == key:
+                del values[pos]
+
+    # ---------- Поиск ----------
+
+    def search(self, query: str, limit: int = 5) -> Dict:
+        """
+        Ищет объявления по свободному тексту.
+
+        Возвращает {"total": int, "results": [Listing], "ranges": {...}};
+        results отсортированы по релевантности, затем по году и цене.
+        """
+        text, ranges = parse_query(query)
+        tokens = tokenize(text)
+
+        candidates: Optional[Dict[str, float]] = None
+        for token in tokens:
+            matches = self._match_token(token)
+            if not matches:
+                # Незнакомые слова не обнуляют выдачу
+                continue
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates = {
+                    slug: score + matches[slug]
+                    for slug, score in candidates.items() if slug in matches
+                }
+            if not candidates:
+                break
+
+        if candidates is None:
+            if not ranges:
+                return {"total": 0, "results": [], "ranges": ranges}
+            candidates = {slug: 0.0 for slug in self.index.entries}
+
+        for field, (low, high) in ranges.items():
+            if not candidates:
+                break
+            allowed = self._numeric_range(field, low, high)
+            candidates = {slug: score for slug, score in candidates.items() if slug in allowed}
+
+        entries = self.index.entries
+        ranked = sorted(
+            (slug for slug in candidates if slug in entries),
+            key=lambda slug: (-candidates[slug], -entries[slug].year, entries[slug].price),
+        )
+        return {
+            "total": len(ranked),
+            "results": [entries[slug] for slug in ranked[:limit]],
+            "ranges": ranges,
+        }
+
+    def _match_token(self, token: str) -> Dict[str, float]:
+        """
+        Точное совпадение токена, совпадение по префиксу ("кам" -> "kamri")
+        или, если их нет, ближайшие по написанию слова каталога ("kamr1" -> "kamri")
+        """
+        exact = self.postings.get(token)
+        if exact is not None or len(token) < MIN_PREFIX_LENGTH:
+            return dict(exact or {})
+
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_dirty = False
+
+        matches: Dict[str, float] = {}
+        pos = bisect.bisect_left(self._vocabulary, token)
+        while pos < len(self._vocabulary) and self._vocabulary[pos].startswith(token):
+            for slug, weight in self.postings[self._vocabulary[pos]].items():
+                # Совпадение по префиксу весит меньше точного
+                weight *= 0.8
+                if matches.get(slug, 0) < weight:
+                    matches[slug] = weight
+            pos += 1
+
+        if not matches and len(token) >= MIN_FUZZY_LENGTH and not token.isdigit():
+            for similar, score in self._fuzzy.lookup(token, limit=3, threshold=FUZZY_THRESHOLD):
+                for slug, weight in self.postings.get(similar, {}).items():
+                    weight *= FUZZY_WEIGHT * score
+                    if matches.get(slug, 0) < weight:
+                        matches[slug] = weight
+        return matches
+
+    def _numeric_range(self, field: str, low: Optional[int], high: Optional[int]) -> Set[str]:
+        values = self._numeric[field]
+        start = 0 if low is None else bisect.bisect_left(values, (low, ""))
+        end = len(values) if high is None else bisect.bisect_right(values, (high, "\uffff"))
+        return {slug for _, slug in values[start:end]}
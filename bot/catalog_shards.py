@@ -0,0 +1,280 @@
+"""
+Готовые страницы каталога по марке и по марке + кузову (static/cars/b/)
+
+Ссылки из бота ("Смотреть BMW") раньше открывали /cars/?brand=BMW: WebApp
+загружал общий список и фильтровал его уже после загрузки. Теперь на
+каждую марку и пару марка + кузов пишется отдельный шард:
+
+    static/cars/b/<марка>/index.html          - страница, готовая к показу
+    static/cars/b/<марка>/cards.html          - фрагмент с карточками
+    static/cars/b/<марка>/cars.json           - данные в формате catalog_feed
+    static/cars/b/<марка>/<кузов>/...         - то же для марки + кузова
+
+Состав шардов ведется по событиям ListingIndex; перезаписываются только
+шарды, в которых менялись объявления, и только если изменилось содержимое.
+"""
+
+import html
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from atomic_io import atomic_write_bytes
+from catalog_feed import build_feed, card_image, encode_feed, hugo_order
+from listing import NOT_SPECIFIED, Listing
+from site_export import SiteExport
+from translit import slugify
+
+logger = logging.getLogger(__name__)
+
+SHARDS_DIR = "b"
+SHARD_FILES = ("index.html", "cards.html", "cars.json")
+
+# Карточек на странице шарда; остальные - по ссылке в полный каталог
+SHARD_PAGE_SIZE = 48
+
+ShardKey = Tuple[str, ...]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
+    <link href="{root}css/style.css" rel="stylesheet">
+</head>
+<body>
+<section class="cars-grid py-4">
+    <div class="container">
+        <nav aria-label="breadcrumb">
+            <ol class="breadcrumb">
+                <li class="breadcrumb-item"><a href="{root}">Главная</a></li>
+                <li class="breadcrumb-item"><a href="{root}cars/">Каталог</a></li>
+                {breadcrumbs}
+            </ol>
+        </nav>
+        <h1 class="h3 fw-bold mb-2">{title}</h1>
+        <p class="text-muted mb-3">{count} · <a href="{catalog_url}">Открыть в каталоге с фильтрами</a></p>
+        {links}
+        <div class="row g-4" id="cars-container">
+{cards}
+        </div>
+        {more}
+    </div>
+</section>
+</body>
+</html>
+"""
+
+CARD_TEMPLATE = """            <div class="col-lg-4 col-md-6">
+                <div class="car-card card h-100 border-0 shadow-sm">
+                    <div class="car-image-wrapper position-relative overflow-hidden">
+                        <img src="{image}" class="card-img-top" alt="{title}" loading="lazy">
+                        <div class="price-badge position-absolute top-0 end-0 m-3">
+                            <span class="badge bg-primary fs-6 fw-bold">{price} ₽</span>
+                        </div>
+                    </div>
+                    <div class="card-body p-4">
+                        <h5 class="card-title mb-2">
+                            <a href="{url}" class="text-decoration-none text-dark">{title}</a>
+                        </h5>
+                        <p class="text-muted mb-3">{brand} {model} • {year} год</p>
+                        <p class="text-muted small mb-3">{mileage} км • {fuel_type} • {transmission}</p>
+                        <a href="{url}" class="btn btn-primary w-100">Подробнее</a>
+                    </div>
+                </div>
+            </div>
+"""
+
+
+def _format_number(value: int) -> str:
+    return f"{value:,}".replace(",", " ")
+
+
+def _plural_cars(count: int) -> str:
+    if count % 10 == 1 and count % 100 != 11:
+        word = "автомобиль"
+    elif 2 <= count % 10 <= 4 and not 12 <= count % 100 <= 14:
+        word = "автомобиля"
+    else:
+        word = "автомобилей"
+    return f"{count} {word}"
+
+
+def shard_keys(entry: Listing) -> List[ShardKey]:
+    """Шарды, в которые входит объявление"""
+    if not entry.brand or entry.brand == NOT_SPECIFIED or not slugify(entry.brand):
+        return []
+    keys: List[ShardKey] = [(entry.brand,)]
+    body_type = str(entry.body_type)
+    if body_type != NOT_SPECIFIED and slugify(body_type):
+        keys.append((entry.brand, body_type))
+    return keys
+
+
+def shard_path(*key: str) -> str:
+    """Путь шарда от корня сайта: cars/b/<марка>/[<кузов>/]"""
+    return "/".join(("cars", SHARDS_DIR) + tuple(slugify(part) for part in key)) + "/"
+
+
+class CatalogShards(SiteExport):
+    """Шарды каталога по марке и марке + кузову, обновляются вместе с ListingIndex"""
+
+    def __init__(self, output_path: Path, debounce: float = 1.0):
+        super().__init__(debounce)
+        self.root = Path(output_path) / SHARDS_DIR
+        self.members: Dict[ShardKey, Dict[str, Listing]] = {}
+        self._changed: Set[ShardKey] = set()
+        # Первая запись проверяет все шарды и удаляет оставшиеся от прошлых запусков
+        self._full = True
+
+    def has(self, *key: str) -> bool:
+        return tuple(key) in self.members
+
+    def apply(self, event: str, entry: Listing):
+        for key in shard_keys(entry):
+            members = self.members.setdefault(key, {})
+            if event == "add":
+                members[entry.slug] = entry
+            else:
+                members.pop(entry.slug, None)
+            if not members:
+                del self.members[key]
+            self._changed.add(key)
+
+    def snapshot(self) -> Tuple[Dict[ShardKey, List[Listing]], Dict[str, Dict[str, int]], bool]:
+        keys = set(self.members) if self._full else self._changed
+        shards = {key: list(self.members.get(key, {}).values()) for key in keys}
+        # Кузова марки - ссылки на вложенные шарды со страницы марки
+        bodies: Dict[str, Dict[str, int]] = {}
+        for key, members in self.members.items():
+            if len(key) == 2 and (key[0],) in shards:
+                bodies.setdefault(key[0], {})[key[1]] = len(members)
+        full = self._full
+        self._changed = set()
+        self._full = False
+        return shards, bodies, full
+
+    def _log_failure(self, task):
+        super()._log_failure(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._full = True
+
+    def _write(self, snapshot) -> int:
+        shards, bodies, full = snapshot
+        written = 0
+        # Кузова раньше марок: пустой каталог марки удаляется после вложенных шардов
+        for key, listings in sorted(shards.items(), key=lambda item: -len(item[0])):
+            directory = self.root.joinpath(*(slugify(part) for part in key))
+            if not listings:
+                self._remove(directory)
+                continue
+            files = self._render(key, listings, bodies.get(key[0], {}) if len(key) == 1 else {})
+            if self._save(directory, files):
+                written += 1
+        if full:
+            self._remove_stale({self.root.joinpath(*(slugify(part) for part in key)) for key in shards})
+        if written:
+            logger.info(f"Шарды каталога обновлены: {written} из {len(shards)}")
+        return written
+
+    def _render(self, key: ShardKey, listings: List[Listing], bodies: Dict[str, int]) -> Dict[str, bytes]:
+        ordered = hugo_order(listings)
+        root = "../" * (len(key) + 2)
+        shown = ordered[:SHARD_PAGE_SIZE]
+
+        cards = "".join(self._render_card(listing, root) for listing in shown)
+        title = " ".join(key)
+        catalog_url = html.escape(f"{root}cars/?" + urlencode(dict(zip(("brand", "body_type"), key))))
+
+        if len(key) == 1:
+            breadcrumbs = f'<li class="breadcrumb-item active">{html.escape(key[0])}</li>'
+            links = " ".join(
+                f'<a href="{html.escape(slugify(body))}/" class="btn btn-sm btn-outline-secondary mb-2">'
+                f'{html.escape(body)} ({count})</a>'
+                for body, count in sorted(bodies.items())
+            )
+            links = f'<div class="mb-4">{links}</div>' if links else ""
+        else:
+            breadcrumbs = (f'<li class="breadcrumb-item"><a href="../">{html.escape(key[0])}</a></li>'
+                           f'<li class="breadcrumb-item active">{html.escape(key[1])}</li>')
+            links = ""
+
+        more = ""
+        if len(ordered) > len(shown):
+            more = (f'<div class="text-center mt-4"><a href="{catalog_url}" class="btn btn-outline-primary">'
+                    f'Показать все {_plural_cars(len(ordered))}</a></div>')
+
+        page = PAGE_TEMPLATE.format(
+            title=html.escape(title), root=root, breadcrumbs=breadcrumbs, count=_plural_cars(len(ordered)),
+            catalog_url=catalog_url, links=links, cards=cards.rstrip("\n"), more=more,
+        )
+        return {
+            "index.html": page.encode("utf-8"),
+            "cards.html": cards.encode("utf-8"),
+            "cars.json": encode_feed(build_feed(ordered)),
+        }
+
+    @staticmethod
+    def _render_card(listing: Listing, root: str) -> str:
+        image = card_image(listing) or "images/cars/placeholder.svg"
+        return CARD_TEMPLATE.format(
+            image=html.escape(root + image.lstrip("/")),
+            url=html.escape(f"{root}cars/{listing.slug.lower()}/"),
+            title=html.escape(listing.title),
+            price=_format_number(listing.price),
+            brand=html.escape(listing.brand),
+            model=html.escape(listing.model),
+            year=listing.year,
+            mileage=_format_number(listing.mileage),
+            fuel_type=html.escape(str(listing.fuel_type)),
+            transmission=html.escape(str(listing.transmission)),
+        )
+
+    @staticmethod
+    def _save(directory: Path, files: Dict[str, bytes]) -> bool:
+        """Записывает файлы шарда, содержимое которых изменилось"""
+        changed = False
+        for name, data in files.items():
+            path = directory / name
+            try:
+                if path.read_bytes() == data:
+                    continue
+            except OSError:
+                pass
+            atomic_write_bytes(path, data)
+            changed = True
+        return changed
+
+    def _remove(self, directory: Path):
+        for name in SHARD_FILES:
+            (directory / name).unlink(missing_ok=True)
+        # Каталог марки остается, пока в нем есть шарды кузовов
+        try:
+            directory.rmdir()
+        except OSError:
+            pass
+
+    def _remove_stale(self, keep: Set[Path]):
+        if not self.root.is_dir():
+            return
+        # Снизу вверх: сначала шарды кузовов, потом освободившиеся каталоги марок
+        for dirpath, _, _ in os.walk(self.root, topdown=False):
+            directory = Path(dirpath)
+            if directory != self.root and directory not in keep:
+                self._remove(directory)
+
+
+def shard_url(base_url: str, shards: Optional[CatalogShards], brand: Optional[str],
+              body_type: Optional[str] = None) -> Optional[str]:
+    """URL шарда, если он есть в каталоге"""
+    if shards is None or not brand:
+        return None
+    key = (brand, body_type) if body_type else (brand,)
+    if not shards.has(*key):
+        return None
+    return f"{base_url.rstrip('/')}/{shard_path(*key)}"
@@ -21,8 +21,16 @@ WEBAPP_URL = os.getenv("WEBAPP_URL", "http://localhost:1313")
 # Путь к Hugo сайту
 HUGO_SITE_PATH = os.getenv("HUGO_SITE_PATH", "../hugo-site")
 
+# Автоматическая сборка сайта после добавления объявлений
+HUGO_AUTO_BUILD = os.getenv("HUGO_AUTO_BUILD", "false").lower() == "true"
+HUGO_BIN = os.getenv("HUGO_BIN", "hugo")
+HUGO_PUBLISH_DIR = os.getenv("HUGO_PUBLISH_DIR", "")
+HUGO_BUILD_DEBOUNCE = float(os.getenv("HUGO_BUILD_DEBOUNCE", "10"))
+
 # Dadata API ключ для справочников
 DADATA_API_KEY = os.getenv("DADATA_API_KEY", "")
+# Интервал фонового обновления справочника марок (часы)
+BRANDS_REFRESH_HOURS = float(os.getenv("BRANDS_REFRESH_HOURS", "24"))
 
 # ID администраторов (кто может добавлять объявления)
 ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "")
@@ -35,6 +43,48 @@ if ADMIN_IDS_STR:
         print("⚠️ Ошибка при парсинге ADMIN_IDS. Проверьте .env файл")
 
 
+# Обработка фотографий: параллельные загрузки и процессы для ресайза
+PHOTO_DOWNLOAD_CONCURRENCY = int(os.getenv("PHOTO_DOWNLOAD_CONCURRENCY", "4"))
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "0")) or None
+
+
+# Защита от флуда: запросов пользователя в секунду и размер "пачки"
+THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", "1"))
+THROTTLE_BURST = int(os.getenv("THROTTLE_BURST", "5"))
+
+# Исходящие сообщения: лимиты Telegram (всего в секунду / в один чат в секунду)
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "25"))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "3"))
+
+
+# Метрики Prometheus на http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+
+# Хранилище FSM состояний: memory | redis | sqlite
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+FSM_SQLITE_PATH = os.getenv("FSM_SQLITE_PATH", str(Path(__file__).parent / "fsm_storage.sqlite3"))
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "0.05"))
+
+
+# Режим получения обновлений: polling | webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+
+# Webhook (BOT_MODE=webhook)
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "16"))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "30"))
+
+
 # Настройки логирования
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
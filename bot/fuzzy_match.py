@@ -0,0 +1,235 @@
+"""
+Нечеткое сопоставление марок и моделей
+
+Опечатки и написания кириллицей/латиницей ("мерс", "тайота", "camri")
+сводятся к названию из справочника. Ключ названия - транслит плюс
+фонетическое сближение (translit.normalize_token), поиск - по индексу
+триграмм ключей: запрос сравнивается только с ключами, у которых есть
+общие триграммы, поэтому время не растет с размером справочника.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from listing import Listing
+from listing_index import ListingIndex
+from translit import normalize_token
+
+# Разговорные и сокращенные названия марок, которые не выводятся транслитом
+BRAND_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "Mercedes-Benz": ("мерс", "мерседес", "мерин", "mercedes", "mb"),
+    "BMW": ("бэха", "беха", "бумер"),
+    "Volkswagen": ("фольксваген", "фольц", "vw", "фв"),
+    "ВАЗ (LADA)": ("лада", "ваз", "lada", "vaz", "жигули"),
+    "Hyundai": ("хендай", "хундай", "хёндэ", "хюндай"),
+    "Mitsubishi": ("мицубиси", "митсубиши", "митсубиси"),
+    "Chevrolet": ("шевроле", "шеви"),
+    "Peugeot": ("пежо",),
+    "Renault": ("рено",),
+    "Land Rover": ("ленд ровер", "рендж ровер", "range rover"),
+    "Porsche": ("порш",),
+    "УАЗ": ("uaz",),
+}
+
+# Совпадение не ниже этого порога исправляется без вопросов
+AUTO_ACCEPT_SCORE = 0.8
+# Ниже этого порога вариант не предлагается
+SUGGEST_SCORE = 0.45
+
+_WORD_RE = re.compile(r"[0-9a-zа-яё]+")
+
+Match = Tuple[Hashable, float]
+
+
+def normalize_key(text: str) -> str:
+    """Ключ названия: слова в транслите без пробелов и дефисов ("Land Rover" -> "landrover")"""
+    return "".join(normalize_token(word) for word in _WORD_RE.findall(str(text).lower()))
+
+
+def _edit_similarity(a: str, b: str) -> float:
+    """1 - расстояние Левенштейна / длина большего ключа"""
+    if abs(len(a) - len(b)) > 3:
+        return 0.0
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return 1.0 - previous[-1] / max(len(a), len(b))
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"^{key}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyIndex:
+    """Индекс триграмм: ключ названия -> значения (с учетом ссылок)"""
+
+    def __init__(self):
+        self._values: Dict[str, Dict[Hashable, int]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._gram_counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, text: str, value: Optional[Hashable] = None):
+        """Добавляет название (value - что вернуть при совпадении, по умолчанию само название)"""
+        key = normalize_key(text)
+        if not key:
+            return
+        values = self._values.get(key)
+        if values is None:
+            values = self._values[key] = {}
+            grams = _trigrams(key)
+            self._gram_counts[key] = len(grams)
+            for gram in grams:
+                self._grams.setdefault(gram, set()).add(key)
+        value = text if value is None else value
+        values[value] = values.get(value, 0) + 1
+
+    def remove(self, text: str, value: Optional[Hashable] = None):
+        """Убирает одну ссылку на название"""
+        key = normalize_key(text)
+        values = self._values.get(key)
+        if values is None:
+            return
+        value = text if value is None else value
+        count = values.get(value, 0) - 1
+        if count > 0:
+            values[value] = count
+            return
+        values.pop(value, None)
+        if values:
+            return
+
+        del self._values[key]
+        del self._gram_counts[key]
+        for gram in _trigrams(key):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def lookup(self, query: str, limit: int = 5, threshold: float = SUGGEST_SCORE) -> List[Match]:
+        """
+        Ближайшие значения к запросу: [(value, score)], score от 0 до 1.
+
+        score - коэффициент Дайса по триграммам ключей или, если выше,
+        сходство по расстоянию Левенштейна; точное совпадение ключа дает 1.0,
+        начало длинного названия ("мерседес" в "Mercedes-Benz") - не меньше 0.8.
+        """
+        key = normalize_key(query)
+        if not key:
+            return []
+
+        scores: Dict[str, float] = {}
+        if key in self._values:
+            scores[key] = 1.0
+
+        grams = _trigrams(key)
+        shared: Counter = Counter()
+        for gram in grams:
+            keys = self._grams.get(gram)
+            if keys:
+                shared.update(keys)
+
+        for candidate, common in shared.items():
+            if candidate == key:
+                continue
+            score = 2.0 * common / (len(grams) + self._gram_counts[candidate])
+            if score >= 0.3:
+                # Триграммы сильно штрафуют опечатку в коротком слове (тайота/toiota)
+                score = max(score, _edit_similarity(key, candidate))
+            if len(key) >= 4 and candidate.startswith(key):
+                score = max(score, AUTO_ACCEPT_SCORE + 0.15 * len(key) / len(candidate))
+            scores[candidate] = score
+
+        best: Dict[Hashable, float] = {}
+        for candidate, score in scores.items():
+            if score < threshold:
+                continue
+            for value in self._values[candidate]:
+                if score > best.get(value, 0.0):
+                    best[value] = score
+
+        return sorted(best.items(), key=lambda item: -item[1])[:limit]
+
+
+def merge_matches(*results: Iterable[Match], limit: int = 5) -> List[Match]:
+    """Объединяет выдачи нескольких индексов (лучший score на значение)"""
+    best: Dict[Hashable, float] = {}
+    for result in results:
+        for value, score in result:
+            if score > best.get(value, 0.0):
+                best[value] = score
+    return sorted(best.items(), key=lambda item: -item[1])[:limit]
+
+
+def build_brand_index(brands: Iterable[str]) -> FuzzyIndex:
+    """Индекс марок справочника вместе с разговорными названиями"""
+    index = FuzzyIndex()
+    for brand in brands:
+        index.add(brand)
+        for alias in BRAND_ALIASES.get(brand, ()):
+            index.add(alias, brand)
+    return index
+
+
+def build_model_index(models: Iterable[str]) -> FuzzyIndex:
+    """Индекс моделей одной марки"""
+    index = FuzzyIndex()
+    for model in models:
+        index.add(model)
+    return index
+
+
+class CatalogNames:
+    """Марки и модели опубликованных объявлений, обновляются вместе с ListingIndex"""
+
+    def __init__(self):
+        self.brands = FuzzyIndex()
+        self._models: Dict[str, FuzzyIndex] = {}
+
+    def track(self, index: ListingIndex):
+        for entry in index.entries.values():
+            self._on_index_event("add", entry)
+        index.add_listener(self._on_index_event)
+
+    def models(self, brand: str) -> FuzzyIndex:
+        """Индекс моделей марки из каталога"""
+        return self._models.get(brand) or FuzzyIndex()
+
+    def _on_index_event(self, event: str, entry: Listing):
+        if not entry.brand:
+            return
+        if event == "add":
+            self.brands.add(entry.brand)
+            if entry.model:
+                self._models.setdefault(entry.brand, FuzzyIndex()).add(entry.model)
+        elif event == "remove":
+            self.brands.remove(entry.brand)
+            models = self._models.get(entry.brand)
+            if models is not None and entry.model:
+                models.remove(entry.model)
+                if not len(models):
+                    del self._models[entry.brand]
+
+
+def resolve(matches: List[Match], typed: str) -> Tuple[Optional[str], List[str]]:
+    """
+    Решение по выдаче: (исправленное значение или None, варианты для выбора).
+
+    Точное или почти точное совпадение принимается сразу; иначе
+    возвращаются варианты, из которых пользователь выберет сам.
+    """
+    if matches and matches[0][1] >= AUTO_ACCEPT_SCORE:
+        # Два одинаково близких варианта - спрашиваем
+        if len(matches) == 1 or matches[1][1] < matches[0][1] or matches[0][1] == 1.0:
+            return str(matches[0][0]), []
+    return None, [str(value) for value, _ in matches if str(value) != typed]
+
@@ -0,0 +1,152 @@
+"""
+Автоматическая сборка Hugo сайта после добавления объявлений
+
+Серия create_car_listing за короткое время склеивается в одну сборку
+(debounce). hugo запускается подпроцессом, не блокируя бота, и собирает
+сайт в новую директорию релиза; публикация - атомарная замена симлинка
+publish_dir на новый релиз. Бинарник задается HUGO_BIN (в тестах -
+tools/hugo_stub.py).
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class BuildResult(NamedTuple):
+    """Результат сборки сайта"""
+    ok: bool
+    duration: float
+    listings: int
+    output: str
+
+
+BuildCallback = Callable[[BuildResult], Awaitable[None]]
+
+
+class HugoBuilder:
+    """Оркестратор сборок Hugo с debounce и атомарной публикацией"""
+
+    def __init__(
+        self,
+        site_path: str,
+        hugo_bin: str = "hugo",
+        publish_dir: Optional[str] = None,
+        debounce: float = 10.0,
+        extra_args: Sequence[str] = ("--minify",),
+        keep_releases: int = 2,
+    ):
+        self.site_path = Path(site_path).resolve()
+        self.hugo_bin = hugo_bin
+        self.publish_dir = Path(publish_dir).resolve() if publish_dir else self.site_path / "public"
+        self.releases_dir = self.publish_dir.parent / f".{self.publish_dir.name}-releases"
+        self.debounce = debounce
+        self.extra_args = list(extra_args)
+        self.keep_releases = keep_releases
+
+        self._timer: Optional[asyncio.Task] = None
+        self._callbacks: Dict[Any, BuildCallback] = {}
+        self._pending = 0
+        self._build_lock = asyncio.Lock()
+
+    def schedule(self, on_done: Optional[BuildCallback] = None, key: Any = None):
+        """
+        Запрашивает сборку; повторные запросы в течение debounce откладывают ее.
+
+        on_done вызывается после сборки; с одинаковым key (например, чат
+        администратора) уведомление придет одно на всю серию.
+        """
+        self._pending += 1
+        if on_done is not None:
+            self._callbacks[key if key is not None else id(on_done)] = on_done
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.create_task(self._build_later())
+
+    async def _build_later(self):
+        await asyncio.sleep(self.debounce)
+        self._timer = None
+
+        callbacks, self._callbacks = list(self._callbacks.values()), {}
+        listings, self._pending = self._pending, 0
+
+        result = await self.build(listings)
+        for callback in callbacks:
+            try:
+                await callback(result)
+            except Exception as e:
+                logger.error(f"Ошибка уведомления о сборке сайта: {e}")
+
+    async def build(self, listings: int = 0) -> BuildResult:
+        """Собирает сайт в новый релиз и публикует его"""
+        async with self._build_lock:
+            started = time.monotonic()
+            release = self.releases_dir / datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            release.parent.mkdir(parents=True, exist_ok=True)
+
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    self.hugo_bin,
+                    "--source", str(self.site_path),
+                    "--destination", str(release),
+                    *self.extra_args,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                )
+                stdout, _ = await process.communicate()
+                output = stdout.decode("utf-8", errors="replace").strip()
+                ok = process.returncode == 0
+            except OSError as e:
+                output, ok = f"Не удалось запустить {self.hugo_bin}: {e}", False
+
+            if ok:
+                await asyncio.to_thread(self._publish, release)
+            else:
+                await asyncio.to_thread(shutil.rmtree, release, True)
+
+            duration = time.monotonic() - started
+            if ok:
+                logger.info(f"Сайт собран и опубликован за {duration:.1f} с ({listings} изм.)")
+            else:
+                logger.error(f"Ошибка сборки сайта: {output[-500:]}")
+
+            return BuildResult(ok, duration, listings, output[-1000:])
+
+    def _publish(self, release: Path):
+        """Атомарно переключает publish_dir на новый релиз"""
+        if self.publish_dir.exists() and not self.publish_dir.is_symlink():
+            # Первый запуск: обычная директория public уходит в релизы
+            self.publish_dir.rename(self.releases_dir / "initial")
+
+        tmp_link = self.publish_dir.with_name(f".{self.publish_dir.name}.tmp")
+        if tmp_link.is_symlink() or tmp_link.exists():
+            tmp_link.unlink()
+        tmp_link.symlink_to(release, target_is_directory=True)
+        os.replace(tmp_link, self.publish_dir)
+
+        self._cleanup_releases(current=release)
+
+    def _cleanup_releases(self, current: Path):
+        releases = sorted(
+            (path for path in self.releases_dir.iterdir() if path.is_dir() and path != current),
+            key=lambda path: path.stat().st_mtime,
+        )
+        # Текущий релиз + keep_releases - 1 предыдущих для отката
+        for old in releases[:max(0, len(releases) - (self.keep_releases - 1))]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    async def close(self):
+        """Отменяет отложенную сборку и дожидается текущей"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._build_lock:
+            pass
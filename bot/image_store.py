@@ -0,0 +1,142 @@
+"""
+Хранилище изображений с адресацией по содержимому
+
+Файлы называются по хэшу исходного фото и раскладываются по шардам:
+images/cars/ab/cd/abcd...-card.webp. Одинаковые фото не пишутся повторно,
+объявления одной модели и года не перезаписывают фото друг друга.
+Счетчики ссылок строятся по индексу объявлений; сборщик мусора удаляет
+файлы, на которые не ссылается ни одно объявление.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from atomic_io import atomic_write_bytes
+from listing import Listing
+from listing_index import ListingIndex
+
+DIGEST_SIZE = 16  # байт -> 32 hex-символа
+
+_DIGEST_RE = re.compile(r"([0-9a-f]{%d})-[a-z]+\.[a-z]+$" % (DIGEST_SIZE * 2))
+_SHARD_RE = re.compile(r"^[0-9a-f]{2}$")
+
+
+def content_digest(data: bytes) -> str:
+    """Хэш содержимого исходного фото"""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def digest_from_path(path: str) -> Optional[str]:
+    """Извлекает хэш из пути варианта изображения (None для старых имен файлов)"""
+    match = _DIGEST_RE.search(path)
+    return match.group(1) if match else None
+
+
+class ImageStore:
+    """Content-addressed хранилище фотографий объявлений"""
+
+    def __init__(self, root: Path, url_prefix: str = "images/cars"):
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.refs: Dict[str, int] = {}
+
+    # ---------- Пути ----------
+
+    def relative_path(self, digest: str, variant: str, ext: str) -> str:
+        """Путь варианта относительно корня хранилища"""
+        return f"{digest[:2]}/{digest[2:4]}/{digest}-{variant}.{ext}"
+
+    def path_for(self, digest: str, variant: str, ext: str) -> Path:
+        """Путь варианта на диске"""
+        return self.root / self.relative_path(digest, variant, ext)
+
+    def url_for(self, digest: str, variant: str, ext: str = "jpg") -> str:
+        """Путь варианта относительно static (как пишется в front matter)"""
+        return f"{self.url_prefix}/{self.relative_path(digest, variant, ext)}"
+
+    # ---------- Запись ----------
+
+    def exists(self, digest: str, variants: Iterable[Tuple[str, str]]) -> bool:
+        """Есть ли уже все варианты изображения"""
+        return all(self.path_for(digest, variant, ext).exists() for variant, ext in variants)
+
+    async def put(self, digest: str, variant: str, ext: str, content: bytes) -> str:
+        """Сохраняет вариант, если его еще нет (атомарно), возвращает путь для front matter"""
+        path = self.path_for(digest, variant, ext)
+        if not path.exists():
+            await asyncio.to_thread(atomic_write_bytes, path, content)
+        return self.url_for(digest, variant, ext)
+
+    # ---------- Счетчики ссылок ----------
+
+    def track(self, index: ListingIndex):
+        """Подписывает счетчики ссылок на изменения индекса объявлений"""
+        for entry in index.entries.values():
+            self._update_refs(entry, 1)
+        index.add_listener(self._on_index_event)
+
+    def _on_index_event(self, event: str, entry: Listing):
+        self._update_refs(entry, 1 if event == "add" else -1)
+
+    def _update_refs(self, entry: Listing, delta: int):
+        for digest in {digest_from_path(path) for path in entry.all_images()} - {None}:
+            count = self.refs.get(digest, 0) + delta
+            if count > 0:
+                self.refs[digest] = count
+            else:
+                self.refs.pop(digest, None)
+
+    # ---------- Сборка мусора ----------
+
+    def gc(self, referenced: Optional[Set[str]] = None, min_age: float = 86400,
+           dry_run: bool = False) -> Tuple[int, int]:
+        """
+        Удаляет файлы хранилища, на которые не ссылается ни одно объявление.
+
+        Свежие файлы (моложе min_age секунд) не трогаем: это фото объявлений,
+        которые администратор еще не подтвердил. Возвращает (файлов, байт).
+        """
+        if referenced is None:
+            referenced = set(self.refs)
+
+        removed_files = removed_bytes = 0
+        deadline = time.time() - min_age
+
+        for shard in self._shard_dirs():
+            for subshard in self._shard_dirs(shard):
+                with os.scandir(subshard) as it:
+                    for item in it:
+                        digest = digest_from_path(item.name)
+                        if digest is None or digest in referenced:
+                            continue
+                        stat = item.stat()
+                        if stat.st_mtime > deadline:
+                            continue
+                        removed_files += 1
+                        removed_bytes += stat.st_size
+                        if not dry_run:
+                            os.unlink(item.path)
+                if not dry_run:
+                    self._remove_if_empty(subshard)
+            if not dry_run:
+                self._remove_if_empty(shard)
+
+        return removed_files, removed_bytes
+
+    def _shard_dirs(self, parent: Optional[Path] = None):
+        parent = parent or self.root
+        with os.scandir(parent) as it:
+            dirs = [Path(item.path) for item in it if item.is_dir() and _SHARD_RE.match(item.name)]
+        return dirs
+
+    @staticmethod
+    def _remove_if_empty(path: Path):
+        try:
+            path.rmdir()
+        except OSError:
+            pass
@@ -0,0 +1,125 @@
+"""
+Постраничные inline клавиатуры для длинных списков (марки, модели)
+
+Telegram ограничивает размер клавиатуры и длину callback_data (64 байта),
+а справочник из Dadata содержит сотни марок. Поэтому список режется на
+страницы, а в callback_data вместо названия передается короткий хэш имени:
+    brand:i:Xk3f9a0B   - выбор элемента с хэшем "Xk3f9a0B"
+    brand:p:3          - переход на страницу 3
+    brand:manual       - ручной ввод
+
+Хэш зависит только от имени, поэтому не меняется между перезапусками,
+обновлениями справочника и экземплярами бота. Обработчик ищет его среди
+имен, которые клавиатура могла предложить (текущий снимок справочника
+и варианты исправления из FSM); не найденный хэш - устаревшая кнопка,
+а не другой автомобиль.
+
+Клавиатуры строятся один раз на снимок справочника (BrandsSnapshot.memo)
+и общие для всех пользователей.
+"""
+
+import base64
+import hashlib
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+PAGE_SIZE = 24
+ROW_WIDTH = 2
+
+# Кнопка без действия (номер страницы)
+NOOP = "noop"
+
+ID_BYTES = 6
+
+
+def name_id(name: str) -> str:
+    """Короткий id имени для callback_data (8 символов base64url)"""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=ID_BYTES).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii")
+
+
+def id_table(names: Iterable[str]) -> Dict[str, str]:
+    """Таблица id -> имя для разбора callback_data"""
+    return {name_id(name): name for name in names}
+
+
+class PagedKeyboard:
+    """Заранее построенные страницы клавиатуры выбора из списка"""
+
+    def __init__(self, items: Sequence[str], callback_prefix: str,
+                 page_size: int = PAGE_SIZE, row_width: int = ROW_WIDTH, add_manual: bool = True):
+        self.callback_prefix = callback_prefix
+        items = list(items)
+        chunks = [items[start:start + page_size] for start in range(0, len(items), page_size)] or [[]]
+        self.pages: Tuple[InlineKeyboardMarkup, ...] = tuple(
+            self._build_page(number, len(chunks), chunk, row_width, add_manual)
+            for number, chunk in enumerate(chunks)
+        )
+
+    def page(self, number: int = 0) -> InlineKeyboardMarkup:
+        """Страница клавиатуры (номер ограничивается допустимым диапазоном)"""
+        return self.pages[min(max(number, 0), len(self.pages) - 1)]
+
+    def _build_page(self, number: int, total: int, items: List[str],
+                    row_width: int, add_manual: bool) -> InlineKeyboardMarkup:
+        prefix = self.callback_prefix
+        keyboard = []
+        row = []
+        for item in items:
+            row.append(InlineKeyboardButton(text=item, callback_data=f"{prefix}:i:{name_id(item)}"))
+            if len(row) >= row_width:
+                keyboard.append(row)
+                row = []
+        if row:
+            keyboard.append(row)
+
+        if total > 1:
+            navigation = []
+            if number > 0:
+                navigation.append(InlineKeyboardButton(text="◀️", callback_data=f"{prefix}:p:{number - 1}"))
+            navigation.append(InlineKeyboardButton(text=f"{number + 1}/{total}", callback_data=NOOP))
+            if number < total - 1:
+                navigation.append(InlineKeyboardButton(text="▶️", callback_data=f"{prefix}:p:{number + 1}"))
+            keyboard.append(navigation)
+
+        if add_manual:
+            keyboard.append([InlineKeyboardButton(text="✍️ Ввести вручную", callback_data=f"{prefix}:manual")])
+        keyboard.append([InlineKeyboardButton(text="❌ Отменить", callback_data="cancel_add_car")])
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def suggestions_keyboard(suggestions: Sequence[str], typed: str, callback_prefix: str) -> InlineKeyboardMarkup:
+    """Варианты исправления ручного ввода и кнопка, оставляющая ввод как есть"""
+    keyboard = [
+        [InlineKeyboardButton(text=item, callback_data=f"{callback_prefix}:i:{name_id(item)}")]
+        for item in suggestions
+    ]
+    keyboard.append([InlineKeyboardButton(
+        text=f"✍️ Оставить «{typed}»",
+        callback_data=f"{callback_prefix}:i:{name_id(typed)}"
+    )])
+    keyboard.append([InlineKeyboardButton(text="❌ Отменить", callback_data="cancel_add_car")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def parse_callback(data: str, *tables: Mapping[str, str]) -> Tuple[str, Optional[str]]:
+    """
+    Разбирает callback_data постраничной клавиатуры.
+
+    tables - таблицы id_table() имен, которые могли быть на кнопках.
+    Возвращает ("item", имя), ("page", номер), ("manual", None)
+    или ("stale", None) - имени больше нет среди предложенных.
+    """
+    _, _, rest = data.partition(":")
+    if rest == "manual":
+        return "manual", None
+    kind, _, value = rest.partition(":")
+    if kind == "p" and value.isdigit():
+        return "page", value
+    if kind == "i":
+        for table in tables:
+            name = table.get(value)
+            if name is not None:
+                return "item", name
+    return "stale", None
@@ -0,0 +1,389 @@
+"""
+Модель объявления об автомобиле
+
+Единый тип Listing вместо свободного словаря из FSM: значения
+по умолчанию в одном месте, справочные поля закодированы перечислениями,
+сериализация во front matter и обратно - за один проход.
+"""
+
+import json
+import re
+from dataclasses import dataclass, fields
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+
+class Choice(str, Enum):
+    """Значение справочника; в тексте и шаблонах выводится как есть"""
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class FuelType(Choice):
+    PETROL = "Бензин"
+    DIESEL = "Дизель"
+    HYBRID = "Гибрид"
+    ELECTRIC = "Электро"
+    GAS = "Газ"
+
+
+class Transmission(Choice):
+    MT = "MT"
+    AT = "AT"
+    AMT = "AMT"
+    CVT = "CVT"
+    ROBOT = "Робот"
+
+
+class DriveType(Choice):
+    FRONT = "Передний"
+    REAR = "Задний"
+    FULL = "Полный"
+
+
+class BodyType(Choice):
+    SEDAN = "Седан"
+    HATCHBACK = "Хэтчбек"
+    WAGON = "Универсал"
+    SUV = "Внедорожник"
+    COUPE = "Купе"
+    MINIVAN = "Минивэн"
+    PICKUP = "Пикап"
+    CABRIOLET = "Кабриолет"
+
+
+class Condition(Choice):
+    EXCELLENT = "Отличное"
+    GOOD = "Хорошее"
+    AVERAGE = "Среднее"
+    NEEDS_REPAIR = "Требует ремонта"
+
+
+# Написания из старых файлов и фидов дилеров
+_ALIASES: Dict[Type[Choice], Dict[str, Choice]] = {
+    FuelType: {"бензиновый": FuelType.PETROL, "дизельный": FuelType.DIESEL,
+               "электричество": FuelType.ELECTRIC, "электрический": FuelType.ELECTRIC},
+    Transmission: {"механика": Transmission.MT, "механическая": Transmission.MT,
+                   "мкпп": Transmission.MT, "автомат": Transmission.AT,
+                   "автоматическая": Transmission.AT, "акпп": Transmission.AT,
+                   "вариатор": Transmission.CVT, "робот": Transmission.ROBOT},
+    DriveType: {"передний": DriveType.FRONT, "задний": DriveType.REAR,
+                "полный": DriveType.FULL, "4wd": DriveType.FULL, "awd": DriveType.FULL},
+    BodyType: {"хетчбек": BodyType.HATCHBACK, "кроссовер": BodyType.SUV},
+    Condition: {"удовлетворительное": Condition.AVERAGE},
+}
+
+C = TypeVar("C", bound=Choice)
+
+
+def parse_choice(enum: Type[C], value: Any, default: C, strict: bool = False) -> C:
+    """Приводит строку к значению справочника; неизвестное - default или ValueError"""
+    if isinstance(value, enum):
+        return value
+    if value is None or value == "":
+        return default
+
+    text = str(value).strip()
+    try:
+        return enum(text)
+    except ValueError:
+        pass
+
+    lowered = text.lower()
+    for member in enum:
+        if member.value.lower() == lowered:
+            return member
+    alias = _ALIASES.get(enum, {}).get(lowered)
+    if alias is not None:
+        return alias
+
+    if strict:
+        allowed = ", ".join(member.value for member in enum)
+        raise ValueError(f"Недопустимое значение '{text}', ожидается одно из: {allowed}")
+    return default
+
+
+def _to_number(convert, value: Any, default, strict: bool):
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        value = value.replace(" ", "").replace("\xa0", "")
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        if strict:
+            raise ValueError(f"Ожидается число, получено '{value}'")
+        return default
+
+
+def _to_int(value: Any, default: int = 0, strict: bool = False) -> int:
+    return _to_number(lambda v: int(float(str(v).replace(",", ""))), value, default, strict)
+
+
+def _to_float(value: Any, default: float = 0.0, strict: bool = False) -> float:
+    return _to_number(lambda v: float(str(v).replace(",", ".")), value, default, strict)
+
+
+def _to_bool(value: Any, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "да", "yes")
+    return bool(value)
+
+
+def _to_tuple(value: Any) -> Tuple[str, ...]:
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(str(item) for item in value)
+
+
+NOT_SPECIFIED = "Не указан"
+# Версия схемы front matter и шаблона (см. listing_migrations.py)
+SCHEMA_VERSION = 3
+DEFAULT_TAGS = ("автомобиль", "telegram")
+
+_DECODER = json.JSONDecoder()
+
+
+def parse_front_matter(text: str) -> Dict:
+    """Разбирает YAML front matter объявления (плоские ключи, как пишет CarManager)"""
+    if not text.startswith("---"):
+        return {}
+
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}
+
+    result = {}
+    for line in text[3:end].splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or ":" not in line:
+            continue
+
+        key, raw_value = line.split(":", 1)
+        raw_value = raw_value.strip()
+        if not raw_value:
+            result[key.strip()] = ""
+            continue
+
+        result[key.strip()] = _parse_value(raw_value)
+
+    return result
+
+
+def _parse_value(raw_value: str):
+    # Строки в кавычках, числа, true/false и списки - валидный JSON
+    try:
+        value, end = _DECODER.raw_decode(raw_value)
+        rest = raw_value[end:].strip()
+        if not rest or rest.startswith("#"):
+            return value
+    except ValueError:
+        pass
+    # Даты и прочие "голые" значения оставляем строкой
+    return raw_value.split(" #", 1)[0].strip()
+
+
+# Символы, которые YAML не допускает в строке без экранирования
+_YAML_UNSAFE_RE = re.compile("[\x7f-\x84\x86-\x9f\ud800-\udfff\ufffe\uffff]")
+
+
+_encode_string = json.encoder.encode_basestring
+
+
+def _escape_unsafe(match) -> str:
+    return f"\\u{ord(match.group()):04x}"
+
+
+def _dump(value: Any) -> str:
+    # JSON - подмножество YAML: кавычки, обратные слэши и переводы строк экранируются.
+    # Разбор по типам вместо json.dumps: рендер вызывает _dump ~30 раз на объявление
+    if isinstance(value, str):
+        text = _encode_string(value)
+        if _YAML_UNSAFE_RE.search(text):
+            text = _YAML_UNSAFE_RE.sub(_escape_unsafe, text)
+        return text
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (tuple, list)):
+        return "[" + ", ".join(map(_dump, value)) + "]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+# Порядок полей во front matter
+_IMAGE_FIELDS = ("images", "images_card", "images_thumb")
+_DATA_FIELDS = (
+    "year", "price", "mileage", "engine_volume", "fuel_type", "transmission",
+    "drive_type", "body_type", "color", "condition", "vin", "owners_count",
+    "pts_original", "customs_cleared", "exchange_possible", "credit_available",
+    "description", "source_url", "tags", "weight",
+)
+
+# Шаблон собирается один раз при импорте модуля
+_FRONT_MATTER = "\n".join([
+    "---",
+    "title: {title}",
+    "date: {date}",
+    "draft: false",
+    "image: {image}",
+    *(f"{name}: {{{name}}}" for name in _IMAGE_FIELDS),
+    "",
+    "# Данные для фильтрации",
+    "brand: {brand}",
+    "model: {model}",
+    "",
+    *(f"{name}: {{{name}}}" for name in _DATA_FIELDS),
+    f"schema_version: {SCHEMA_VERSION}",
+    "---",
+    "",
+])
+_DUMPED_FIELDS = ("title", "image", "brand", "model") + _IMAGE_FIELDS + _DATA_FIELDS
+
+
+def format_date(moment: Optional[datetime] = None) -> str:
+    """Дата объявления в формате front matter"""
+    return (moment or datetime.now()).strftime("%Y-%m-%dT%H:%M:%S+03:00")
+
+
+@dataclass(frozen=True, slots=True)
+class Listing:
+    """Объявление об автомобиле"""
+
+    brand: str
+    model: str
+    year: int
+    price: int = 0
+    mileage: int = 0
+    engine_volume: float = 0.0
+    fuel_type: FuelType = FuelType.PETROL
+    transmission: Transmission = Transmission.AT
+    drive_type: DriveType = DriveType.FRONT
+    body_type: BodyType = BodyType.SEDAN
+    color: str = NOT_SPECIFIED
+    condition: Condition = Condition.GOOD
+    vin: str = NOT_SPECIFIED
+    owners_count: int = 1
+    pts_original: bool = True
+    customs_cleared: bool = True
+    exchange_possible: bool = True
+    credit_available: bool = True
+    description: str = ""
+    images: Tuple[str, ...] = ()
+    images_card: Tuple[str, ...] = ()
+    images_thumb: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = DEFAULT_TAGS
+    source_url: str = ""
+    weight: int = 1
+    date: str = ""
+    slug: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], strict: bool = False, slug: str = "") -> "Listing":
+        """
+        Создает объявление из данных FSM, строки импорта или front matter.
+
+        strict=True - неизвестные значения справочников и пустые марка/модель/год
+        вызывают ValueError (валидация импорта); иначе подставляются значения
+        по умолчанию (чтение существующих файлов).
+        """
+        brand = str(data.get("brand") or "").strip()
+        model = str(data.get("model") or "").strip()
+        year = _to_int(data.get("year"), 0, strict)
+        if strict and not (brand and model and year):
+            raise ValueError("Обязательные поля: brand, model, year")
+
+        return cls(
+            brand=brand,
+            model=model,
+            year=year,
+            price=_to_int(data.get("price"), 0, strict),
+            mileage=_to_int(data.get("mileage"), 0, strict),
+            engine_volume=_to_float(data.get("engine_volume"), 0.0, strict),
+            fuel_type=parse_choice(FuelType, data.get("fuel_type"), FuelType.PETROL, strict),
+            transmission=parse_choice(Transmission, data.get("transmission"), Transmission.AT, strict),
+            drive_type=parse_choice(DriveType, data.get("drive_type"), DriveType.FRONT, strict),
+            body_type=parse_choice(BodyType, data.get("body_type"), BodyType.SEDAN, strict),
+            color=str(data.get("color") or NOT_SPECIFIED).strip(),
+            condition=parse_choice(Condition, data.get("condition"), Condition.GOOD, strict),
+            vin=str(data.get("vin") or NOT_SPECIFIED).strip(),
+            owners_count=_to_int(data.get("owners_count"), 1, strict),
+            pts_original=_to_bool(data.get("pts_original"), True),
+            customs_cleared=_to_bool(data.get("customs_cleared"), True),
+            exchange_possible=_to_bool(data.get("exchange_possible"), True),
+            credit_available=_to_bool(data.get("credit_available"), True),
+            description=str(data.get("description") or "").strip(),
+            images=_to_tuple(data.get("images")),
+            images_card=_to_tuple(data.get("images_card")),
+            images_thumb=_to_tuple(data.get("images_thumb")),
+            tags=_to_tuple(data["tags"]) if "tags" in data else DEFAULT_TAGS,
+            source_url=str(data.get("source_url") or ""),
+            weight=_to_int(data.get("weight"), 1),
+            date=str(data.get("date") or ""),
+            slug=slug or str(data.get("slug") or ""),
+        )
+
+    @classmethod
+    def from_front_matter(cls, text: str, slug: str = "") -> "Listing":
+        """Читает объявление из markdown файла Hugo"""
+        return cls.from_dict(parse_front_matter(text), slug=slug)
+
+    def to_front_matter(self, date: Optional[str] = None) -> str:
+        """
+        Front matter объявления для Hugo (обратное к from_front_matter).
+
+        date подставляется, если у объявления еще нет даты: при массовом
+        рендере ее вычисляют один раз на всю пачку.
+        """
+        values = {name: _dump(getattr(self, name)) for name in _DUMPED_FIELDS}
+        values["date"] = self.date or date or format_date()
+        return _FRONT_MATTER.format_map(values)
+
+    @property
+    def title(self) -> str:
+        """Заголовок объявления"""
+        title = f"{self.brand} {self.model} {self.engine_volume} {self.transmission}, {self.year}"
+        if self.mileage:
+            title += f", {self.mileage} км"
+        return title
+
+    @property
+    def image(self) -> str:
+        """Главное фото объявления"""
+        return self.images[0] if self.images else ""
+
+    def all_images(self) -> Tuple[str, ...]:
+        """Все пути изображений объявления (все размеры)"""
+        return self.images + self.images_card + self.images_thumb
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Значения полей (перечисления - строками) в порядке объявления"""
+        result = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, Choice):
+                value = value.value
+            elif isinstance(value, tuple):
+                value = list(value)
+            result[field.name] = value
+        return result
+
+    def with_changes(self, **changes) -> "Listing":
+        """Копия объявления с измененными полями"""
+        data = self.to_dict()
+        data.update(changes)
+        return Listing.from_dict(data, slug=data.get("slug", ""))
+
+
+def choice_values(enum: Type[Choice]) -> List[str]:
+    """Список значений справочника для клавиатур бота"""
+    return [member.value for member in enum]
+
@@ -0,0 +1,248 @@
+"""
+Индекс объявлений в памяти
+
+Один раз разбирает front matter всех файлов content/cars при старте
+и дальше обновляется инкрементально: из CarManager.create_car_listing
+и фоновым наблюдателем за директорией.
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from listing import NOT_SPECIFIED, Listing, parse_front_matter
+
+logger = logging.getLogger(__name__)
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def duplicate_key(listing: Listing) -> Tuple:
+    """Ключ для поиска дублей (одна и та же машина, поданная дважды)"""
+    return _duplicate_key(listing.brand, listing.model, listing.year, listing.price, listing.mileage)
+
+
+def _duplicate_key(brand, model, year, price, mileage) -> Tuple:
+    return (
+        str(brand).strip().lower(),
+        str(model).strip().lower(),
+        _to_int(year),
+        _to_int(price),
+        _to_int(mileage),
+    )
+
+
+def _unlink(slugs_by_key: Dict[Hashable, Set[str]], key: Hashable, slug: str):
+    slugs = slugs_by_key.get(key)
+    if slugs is None:
+        return
+    slugs.discard(slug)
+    if not slugs:
+        del slugs_by_key[key]
+
+
+class ListingIndex:
+    """Индекс объявлений: счетчики, дубли и сортированные цены в памяти"""
+
+    def __init__(self, content_path: Path):
+        self.content_path = Path(content_path)
+        self.entries: Dict[str, Listing] = {}
+        self._mtimes: Dict[str, int] = {}
+        self.brand_counts: Dict[str, int] = {}
+        # Ключ -> все slug с этим ключом: после удаления одного дубля остальные находятся
+        self._duplicates: Dict[Tuple, Set[str]] = {}
+        self._vins: Dict[str, Set[str]] = {}
+        self._prices: List[Tuple[int, str]] = []
+        self._listeners: List[Callable[[str, Listing], None]] = []
+        self._dir_mtime_ns = 0
+
+    # ---------- Загрузка и обновление ----------
+
+    def load(self):
+        """Полная загрузка индекса (один проход по директории при старте)"""
+        self.entries.clear()
+        self._mtimes.clear()
+        self.brand_counts.clear()
+        self._duplicates.clear()
+        self._vins.clear()
+        self._prices.clear()
+
+        for path, mtime_ns in self._scan():
+            self._add_file(path, mtime_ns)
+
+        self._dir_mtime_ns = self._stat_dir()
+        logger.info(f"Индекс объявлений загружен: {len(self.entries)} шт.")
+
+    def refresh_file(self, path: Path) -> Optional[Listing]:
+        """Добавляет или переиндексирует один файл (после create_car_listing)"""
+        path = Path(path)
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.remove(path.stem)
+            return None
+
+        self.remove(path.stem)
+        return self._add_file(path, mtime_ns)
+
+    def remove(self, slug: str):
+        """Удаляет объявление из индекса"""
+        entry = self.entries.pop(slug, None)
+        self._mtimes.pop(slug, None)
+        if entry is None:
+            return
+
+        count = self.brand_counts.get(entry.brand, 0) - 1
+        if count > 0:
+            self.brand_counts[entry.brand] = count
+        else:
+            self.brand_counts.pop(entry.brand, None)
+
+        _unlink(self._duplicates, duplicate_key(entry), slug)
+        _unlink(self._vins, entry.vin, slug)
+
+        pos = bisect.bisect_left(self._prices, (entry.price, slug))
+        if pos < len(self._prices) and self._prices[pos] == (entry.price, slug):
+            del self._prices[pos]
+
+        self._notify("remove", entry)
+
+    def sync(self, scanned: Optional[List[Tuple[Path, int]]] = None) -> int:
+        """Сверяет индекс с диском: подхватывает новые, измененные и удаленные файлы"""
+        seen = set()
+        changed = 0
+
+        for path, mtime_ns in (scanned if scanned is not None else self._scan()):
+            seen.add(path.stem)
+            if self._mtimes.get(path.stem) == mtime_ns:
+                continue
+            self.remove(path.stem)
+            self._add_file(path, mtime_ns)
+            changed += 1
+
+        for slug in [slug for slug in self.entries if slug not in seen]:
+            self.remove(slug)
+            changed += 1
+
+        self._dir_mtime_ns = self._stat_dir()
+        return changed
+
+    async def watch(self, interval: float = 2.0, full_rescan_every: int = 30):
+        """
+        Фоновый наблюдатель за content/cars.
+
+        Каждые interval секунд сверяет mtime директории (добавление/удаление
+        файлов) и раз в full_rescan_every тиков проверяет mtime самих файлов
+        (правки существующих объявлений).
+        """
+        tick = 0
+        while True:
+            await asyncio.sleep(interval)
+            tick += 1
+            try:
+                if self._stat_dir() != self._dir_mtime_ns or tick % full_rescan_every == 0:
+                    # Листинг директории - в потоке, изменения индекса - в цикле событий
+                    scanned = await asyncio.to_thread(lambda: list(self._scan()))
+                    changed = self.sync(scanned)
+                    if changed:
+                        logger.info(f"Индекс объявлений обновлен: {changed} изменений")
+            except Exception as e:
+                logger.error(f"Ошибка обновления индекса объявлений: {e}")
+
+    def add_listener(self, callback: Callable[[str, Listing], None]):
+        """Подписка на изменения индекса: callback(event, entry), event = add | remove"""
+        self._listeners.append(callback)
+
+    # ---------- Запросы ----------
+
+    def count(self) -> int:
+        """Количество объявлений в каталоге"""
+        return len(self.entries)
+
+    def get(self, slug: str) -> Optional[Listing]:
+        """Возвращает запись по slug"""
+        return self.entries.get(slug)
+
+    def find_duplicate(self, car_data: Dict) -> Optional[str]:
+        """Ищет уже опубликованное объявление с теми же данными, возвращает slug"""
+        vin = str(car_data.get("vin", "")).strip()
+        if vin and vin in self._vins:
+            return min(self._vins[vin])
+
+        key = _duplicate_key(
+            car_data.get("brand", ""), car_data.get("model", ""), car_data.get("year"),
+            car_data.get("price"), car_data.get("mileage"),
+        )
+        slugs = self._duplicates.get(key)
+        return min(slugs) if slugs else None
+
+    def count_in_price_range(self, price_from: int = 0, price_to: Optional[int] = None) -> int:
+        """Количество объявлений в ценовом диапазоне (бинарный поиск)"""
+        lo = bisect.bisect_left(self._prices, (price_from, ""))
+        if price_to is None:
+            return len(self._prices) - lo
+        hi = bisect.bisect_right(self._prices, (price_to, "\uffff"))
+        return max(0, hi - lo)
+
+    def price_range(self) -> Tuple[int, int]:
+        """Минимальная и максимальная цена в каталоге"""
+        if not self._prices:
+            return 0, 0
+        return self._prices[0][0], self._prices[-1][0]
+
+    # ---------- Внутреннее ----------
+
+    def _scan(self):
+        try:
+            with os.scandir(self.content_path) as it:
+                for item in it:
+                    if not item.name.endswith(".md") or item.name == "_index.md":
+                        continue
+                    if item.is_file():
+                        yield Path(item.path), item.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+
+    def _stat_dir(self) -> int:
+        try:
+            return self.content_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _add_file(self, path: Path, mtime_ns: int) -> Optional[Listing]:
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Не удалось прочитать {path.name}: {e}")
+            return None
+
+        params = parse_front_matter(text)
+        if params.get("draft") is True:
+            return None
+
+        entry = Listing.from_dict(params, slug=path.stem)
+        self.entries[entry.slug] = entry
+        self._mtimes[entry.slug] = mtime_ns
+        self.brand_counts[entry.brand] = self.brand_counts.get(entry.brand, 0) + 1
+        self._duplicates.setdefault(duplicate_key(entry), set()).add(entry.slug)
+        if entry.vin and entry.vin != NOT_SPECIFIED:
+            self._vins.setdefault(entry.vin, set()).add(entry.slug)
+        bisect.insort(self._prices, (entry.price, entry.slug))
+
+        self._notify("add", entry)
+        return entry
+
+    def _notify(self, event: str, entry: Listing):
+        for callback in self._listeners:
+            try:
+                callback(event, entry)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика индекса объявлений: {e}")
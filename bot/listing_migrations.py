@@ -0,0 +1,64 @@
+"""
+Версионные миграции front matter объявлений
+
+Каждая миграция переводит данные объявления (словарь из
+parse_front_matter) с версии N-1 на версию N. Файлы без schema_version
+считаются версией 0. Тексты переписываются текущим шаблоном
+(tools/rerender_catalog.py), поэтому миграция нужна только для изменений
+данных; смена шаблона - просто новая версия без преобразования.
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+from listing import NOT_SPECIFIED, SCHEMA_VERSION
+
+Migration = Callable[[Dict], Dict]
+
+MIGRATIONS: Dict[int, Migration] = {}
+
+
+def migration(version: int):
+    """Регистрирует миграцию на версию version"""
+    def decorator(func: Migration) -> Migration:
+        MIGRATIONS[version] = func
+        return func
+    return decorator
+
+
+@migration(1)
+def _legacy_add_cars(params: Dict) -> Dict:
+    """Файлы старого tools/add_cars.py: фото только в image, VIN-заглушка"""
+    if not params.get("images") and params.get("image"):
+        params["images"] = [params["image"]]
+    vin = str(params.get("vin", ""))
+    if vin and set(vin) == {"X"}:
+        params["vin"] = NOT_SPECIFIED
+    return params
+
+
+@migration(2)
+def _drive_type_and_contacts(params: Dict) -> Dict:
+    """Шаблон v2: привод в таблице, контакты из параметров сайта (шорткод)"""
+    return params
+
+
+@migration(3)
+def _escape_html(params: Dict) -> Dict:
+    """Шаблон v3: HTML в тексте объявления экранируется"""
+    return params
+
+
+def migrate(params: Dict) -> Tuple[Dict, List[int]]:
+    """Применяет недостающие миграции, возвращает (данные, примененные версии)"""
+    try:
+        version = int(params.get("schema_version") or 0)
+    except (TypeError, ValueError):
+        version = 0
+
+    applied = []
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        params = MIGRATIONS[target](params)
+        applied.append(target)
+
+    params["schema_version"] = SCHEMA_VERSION
+    return params, applied
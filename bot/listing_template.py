@@ -0,0 +1,136 @@
+"""
+Шаблон markdown файла объявления для Hugo
+
+Общий для бота (CarManager.create_car_listing) и инструментов
+(tools/add_cars.py, tools/import_cars.py). Шаблон разбирается один раз
+при импорте; значения экранируются: front matter - как строки YAML
+(см. Listing.to_front_matter), текст - для Markdown, HTML и шорткодов
+Hugo (goldmark с unsafe = true публикует HTML из текста как есть).
+
+Изменения шаблона сопровождаются увеличением SCHEMA_VERSION (listing.py),
+существующие файлы переписывает tools/rerender_catalog.py.
+"""
+
+import hashlib
+import html
+import re
+from string import Formatter
+from typing import Callable, Dict, Optional
+
+from listing import NOT_SPECIFIED, Listing
+from translit import slugify
+
+
+def md_inline(text: str) -> str:
+    """Текст для заголовка или ячейки таблицы: одна строка, без разделителей колонок и HTML"""
+    text = html.escape(" ".join(str(text).split()), quote=False)
+    return text.replace("\\", "\\\\").replace("|", "\\|").replace("{{", "&#123;&#123;")
+
+
+def md_block(text: str) -> str:
+    """Многострочный текст (описание): нормализует переводы строк, гасит HTML и шорткоды Hugo"""
+    text = str(text).replace("\r\n", "\n").replace("\r", "\n").strip()
+    text = html.escape(text, quote=False)
+    # Строка "---" внутри текста превратилась бы в заголовок (setext)
+    text = re.sub(r"(?m)^(\s*)(-{3,}|={3,})\s*$", r"\1\\\2", text)
+    return text.replace("{{", "&#123;&#123;")
+
+
+class ListingTemplate:
+    """Шаблон с полями {name}, разобранный один раз"""
+
+    def __init__(self, text: str):
+        self.text = text
+        # Проверяем шаблон при создании, а не на первом объявлении
+        self.fields = tuple(
+            field for _, field, _, _ in Formatter().parse(text) if field is not None
+        )
+        self._render: Callable[[Dict], str] = text.format_map
+
+    def render(self, values: Dict) -> str:
+        return self._render(values)
+
+
+BODY = ListingTemplate("""
+## Характеристики {heading}
+
+| Параметр | Значение |
+|----------|----------|
+| **Марка** | {brand} |
+| **Модель** | {model} |
+| **Год выпуска** | {year} |
+| **Цена** | {price:,} ₽ |
+| **Пробег** | {mileage:,} км |
+| **Объем двигателя** | {engine_volume} л |
+| **Тип топлива** | {fuel_type} |
+| **Коробка передач** | {transmission} |
+| **Привод** | {drive_type} |
+| **Тип кузова** | {body_type} |
+| **Цвет** | {color} |
+| **Состояние** | {condition} |
+
+## Описание
+
+{description}
+{sections}
+### Контакты
+{{{{% contacts %}}}}
+
+**Возможен обмен, кредит, лизинг.**
+""")
+
+_INLINE_FIELDS = ("brand", "model", "color")
+_PLAIN_FIELDS = ("year", "price", "mileage", "engine_volume",
+                 "fuel_type", "transmission", "drive_type", "body_type", "condition")
+
+
+def render_body(listing: Listing, sections: Optional[Dict[str, str]] = None) -> str:
+    """
+    Текст объявления под front matter.
+
+    sections - дополнительные разделы {заголовок: текст} перед контактами
+    (комплектация, техническое состояние и т.п.).
+    """
+    values = {name: md_inline(getattr(listing, name)) for name in _INLINE_FIELDS}
+    for name in _PLAIN_FIELDS:
+        values[name] = getattr(listing, name)
+    values["heading"] = f"{values['brand']} {values['model']} {listing.year}"
+    values["description"] = md_block(listing.description) or "Описание отсутствует."
+    values["sections"] = "".join(
+        f"\n### {md_inline(title)}:\n{md_block(text)}\n" for title, text in (sections or {}).items()
+    )
+    return BODY.render(values)
+
+
+_SECTION_RE = re.compile(r"^### (.+?):\n(.*?)(?=^###|^\*\*|\Z)", re.M | re.S)
+
+
+def extract_sections(body: str) -> Dict[str, str]:
+    """Дополнительные разделы из текста объявления (обратное к sections в render_body)"""
+    # Текст снова пройдет через md_block - снимаем экранирование HTML
+    return {title.strip(): html.unescape(text.strip()) for title, text in _SECTION_RE.findall(body)}
+
+
+def render_listing(listing: Listing, date: Optional[str] = None,
+                   sections: Optional[Dict[str, str]] = None) -> str:
+    """Полный markdown файл объявления: front matter + текст"""
+    return listing.to_front_matter(date) + render_body(listing, sections)
+
+
+def stable_slug(listing: Listing) -> str:
+    """
+    Детерминированный slug для импорта: марка-модель-год-хэш.
+
+    Хэш берется от VIN (или от ключевых полей, если VIN не указан), поэтому
+    разные машины одной модели и года не перезаписывают друг друга, а
+    повторный импорт той же строки попадает в тот же файл.
+    """
+    if listing.vin and listing.vin != NOT_SPECIFIED:
+        key = listing.vin.upper()
+    else:
+        key = "|".join(str(value) for value in (
+            listing.brand, listing.model, listing.year, listing.price, listing.mileage,
+            listing.color, listing.engine_volume, listing.description,
+        ))
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{slugify(listing.brand)}-{slugify(listing.model)}-{listing.year}-{digest}"
@@ -9,12 +9,12 @@ import logging
 import os
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -27,10 +27,26 @@ from aiogram.types import (
 
 # Импортируем наши модули
 try:
-    from config import BOT_TOKEN, WEBAPP_URL, is_admin, ADMIN_IDS, get_admin_info, HUGO_SITE_PATH
+    from config import (
+        BOT_TOKEN, WEBAPP_URL, is_admin, ADMIN_IDS, get_admin_info, HUGO_SITE_PATH, BOT_MODE,
+        PHOTO_DOWNLOAD_CONCURRENCY, PHOTO_WORKERS,
+        HUGO_AUTO_BUILD, HUGO_BIN, HUGO_PUBLISH_DIR, HUGO_BUILD_DEBOUNCE,
+        BRANDS_REFRESH_HOURS,
+        THROTTLE_RATE, THROTTLE_BURST, SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_MAX_RETRIES,
+        METRICS_ENABLED, METRICS_HOST, METRICS_PORT
+    )
     from states import CarCreationStates
+    from storage import create_storage
+    from media_groups import AlbumMiddleware
+    from throttling import SendScheduler, ThrottlingMiddleware
+    from metrics import (
+        PHOTO_BYTES, PHOTO_SECONDS, HandlerMetricsMiddleware, UpdateMetricsMiddleware, start_metrics_server
+    )
+    from hugo_builder import HugoBuilder, BuildResult
     from car_manager import CarManager
-    from car_brands import CAR_BRANDS  # Локальный справочник марок и моделей
+    from car_brands import add_brand, get_brands_snapshot, run_brands_refresher
+    from fuzzy_match import build_brand_index, build_model_index, merge_matches, resolve
+    from keyboards import NOOP, PagedKeyboard, id_table, parse_callback, suggestions_keyboard
     from bot_functions import (
         get_start_message, get_catalog_message, get_search_message,
         get_callback_response, search_by_text, get_menu_button_config,
@@ -53,9 +69,36 @@ logger = logging.getLogger(__name__)
 # Инициализация бота
 if BOT_TOKEN and BOT_TOKEN != "YOUR_BOT_TOKEN_HERE":
     bot = Bot(token=BOT_TOKEN)
-    storage = MemoryStorage()
+    # Исходящие запросы - в пределах лимитов Telegram, с повтором после 429
+    bot.session.middleware(SendScheduler(
+        global_rate=SEND_GLOBAL_RATE,
+        chat_rate=SEND_CHAT_RATE,
+        max_retries=SEND_MAX_RETRIES
+    ))
+    storage = create_storage()
     dp = Dispatcher(storage=storage)
-    car_manager = CarManager(hugo_site_path=HUGO_SITE_PATH)
+    # Альбомы из нескольких фото обрабатываем одним вызовом
+    dp.message.middleware(AlbumMiddleware())
+    # Лимит запросов на пользователя (после сборки альбома - альбом считается одним запросом)
+    throttling = ThrottlingMiddleware(rate=THROTTLE_RATE, burst=THROTTLE_BURST, exempt=is_admin)
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+    if METRICS_ENABLED:
+        # Без METRICS_ENABLED middleware не подключаются вовсе
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+        dp.message.middleware(HandlerMetricsMiddleware())
+        dp.callback_query.middleware(HandlerMetricsMiddleware())
+    car_manager = CarManager(
+        hugo_site_path=HUGO_SITE_PATH,
+        photo_downloads=PHOTO_DOWNLOAD_CONCURRENCY,
+        photo_workers=PHOTO_WORKERS
+    )
+    hugo_builder = HugoBuilder(
+        HUGO_SITE_PATH,
+        hugo_bin=HUGO_BIN,
+        publish_dir=HUGO_PUBLISH_DIR or None,
+        debounce=HUGO_BUILD_DEBOUNCE
+    ) if HUGO_AUTO_BUILD else None
 else:
     logger.error("BOT_TOKEN не установлен! Проверьте .env файл")
     sys.exit(1)
@@ -112,38 +155,43 @@ def create_selection_keyboard(options: list, row_width: int = 2):
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 
-def create_inline_keyboard(items: list, callback_prefix: str, row_width: int = 2, add_manual: bool = True):
-    """Создает inline клавиатуру для выбора из списка"""
-    keyboard = []
-    row = []
+def brands_keyboard() -> PagedKeyboard:
+    """Клавиатура марок (строится один раз на снимок справочника)"""
+    snapshot = get_brands_snapshot()
+    return snapshot.memo("brands", lambda: PagedKeyboard(snapshot.sorted_brands, "brand"))
 
-    for item in items:
-        button = InlineKeyboardButton(
-            text=item,
-            callback_data=f"{callback_prefix}:{item}"
-        )
-        row.append(button)
-        if len(row) >= row_width:
-            keyboard.append(row)
-            row = []
 
-    if row:
-        keyboard.append(row)
+def models_keyboard(brand: str) -> PagedKeyboard:
+    """Клавиатура моделей марки (строится один раз на снимок справочника)"""
+    snapshot = get_brands_snapshot()
+    return snapshot.memo(("models", brand), lambda: PagedKeyboard(snapshot.models(brand), "model"))
 
-    # Добавляем кнопку "Ввести вручную"
-    if add_manual:
-        keyboard.append([InlineKeyboardButton(
-            text="✍️ Ввести вручную",
-            callback_data=f"{callback_prefix}:manual"
-        )])
 
-    # Добавляем кнопку отмены
-    keyboard.append([InlineKeyboardButton(
-        text="❌ Отменить",
-        callback_data="cancel_add_car"
-    )])
+def brand_ids() -> Dict[str, str]:
+    """id -> марка для кнопок клавиатуры марок текущего снимка"""
+    snapshot = get_brands_snapshot()
+    return snapshot.memo("brand_ids", lambda: id_table(snapshot.sorted_brands))
+
+
+def model_ids(brand: str) -> Dict[str, str]:
+    """id -> модель для кнопок клавиатуры моделей текущего снимка"""
+    snapshot = get_brands_snapshot()
+    return snapshot.memo(("model_ids", brand), lambda: id_table(snapshot.models(brand)))
+
+
+def match_brand(text: str) -> Tuple[Optional[str], List[str]]:
+    """Марка по ручному вводу: (исправленная марка или None, варианты для выбора)"""
+    snapshot = get_brands_snapshot()
+    directory = snapshot.memo("brand_index", lambda: build_brand_index(snapshot.sorted_brands))
+    return resolve(merge_matches(directory.lookup(text), car_manager.names.brands.lookup(text)), text)
+
+
+def match_model(brand: str, text: str) -> Tuple[Optional[str], List[str]]:
+    """Модель марки по ручному вводу: (исправленная модель или None, варианты для выбора)"""
+    snapshot = get_brands_snapshot()
+    directory = snapshot.memo(("model_index", brand), lambda: build_model_index(snapshot.models(brand)))
+    return resolve(merge_matches(directory.lookup(text), car_manager.names.models(brand).lookup(text)), text)
 
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
 # ========== КОМАНДЫ ==========
@@ -243,9 +291,8 @@ async def cmd_add_car(message: types.Message, state: FSMContext):
 
     await state.set_state(CarCreationStates.brand)
 
-    # Создаем inline кнопки с марками (загружаются из API или кеша)
-    brands = await get_all_brands()
-    keyboard = create_inline_keyboard(brands, "brand", row_width=2)
+    # Inline кнопки с марками (справочник обновляется в фоне из API или кеша)
+    keyboard = brands_keyboard().page(0)
 
     await message.answer(
         "➕ **Добавление нового автомобиля**\n\n"
@@ -268,9 +315,22 @@ async def process_brand(message: types.Message, state: FSMContext):
 
     brand_input = message.text.strip()
 
+    # Опечатки и разговорные названия ("тайота", "мерс") исправляем по справочнику
+    corrected, suggestions = match_brand(brand_input)
+    if corrected:
+        brand_input = corrected
+    elif suggestions:
+        # Варианты могут быть не из справочника (каталог, ввод) - кнопки разбираются по ним
+        await state.update_data(brand_choices=[*suggestions, brand_input])
+        await message.answer(
+            f"🤔 Марка **{brand_input}** не найдена в справочнике. Возможно, вы имели в виду:",
+            parse_mode="Markdown",
+            reply_markup=suggestions_keyboard(suggestions, brand_input, "brand")
+        )
+        return
+
     # Добавляем марку в справочник, если её там нет
-    if brand_input not in CAR_BRANDS:
-        CAR_BRANDS[brand_input] = []
+    if add_brand(brand_input):
         logger.info(f"Добавлена новая марка: {brand_input}")
 
     await state.update_data(brand=brand_input)
@@ -298,7 +358,20 @@ async def process_model(message: types.Message, state: FSMContext):
     data = await state.get_data()
     brand = data.get('brand', '')
 
-    # Принимаем любую модель (Dadata API не поддерживает справочник моделей)
+    # Модель сверяем со справочником и каталогом, но принимаем любую
+    # (Dadata API не поддерживает справочник моделей)
+    corrected, suggestions = match_model(brand, model_input)
+    if corrected:
+        model_input = corrected
+    elif suggestions:
+        await state.update_data(model_choices=[*suggestions, model_input])
+        await message.answer(
+            f"🤔 Модель **{model_input}** не найдена у марки {brand}. Возможно, вы имели в виду:",
+            parse_mode="Markdown",
+            reply_markup=suggestions_keyboard(suggestions, model_input, "model")
+        )
+        return
+
     await state.update_data(model=model_input)
     await state.set_state(CarCreationStates.year)
 
@@ -575,11 +648,11 @@ async def process_description(message: types.Message, state: FSMContext):
     await state.set_state(CarCreationStates.photos)
 
     # Устанавливаем счетчик фотографий
-    await state.update_data(images=[])
+    await state.update_data(images=[], images_card=[], images_thumb=[])
 
     await message.answer(
         "📸 Загрузите фотографии автомобиля (до 10 шт):\n\n"
-        "Отправляйте фото по одному.\n"
+        "Можно отправить по одному или альбомом.\n"
         "Когда загрузите все фото, напишите 'Готово'",
         reply_markup=ReplyKeyboardMarkup(
             keyboard=[[KeyboardButton(text="✅ Готово")], [KeyboardButton(text="❌ Отменить")]],
@@ -589,46 +662,56 @@ async def process_description(message: types.Message, state: FSMContext):
 
 
 @dp.message(CarCreationStates.photos, F.photo)
-async def process_photo(message: types.Message, state: FSMContext):
-    """Обработка загрузки фотографий"""
+async def process_photo(message: types.Message, state: FSMContext, album: Optional[List[types.Message]] = None):
+    """Обработка загрузки фотографий (одиночных и альбомом)"""
 
-    try:
-        data = await state.get_data()
-        images = data.get('images', [])
+    messages = album or [message]
+    data = await state.get_data()
+    images = data.get('images', [])
 
-        if len(images) >= 10:
-            await message.answer("❌ Можно загрузить максимум 10 фотографий. Напишите 'Готово' для продолжения.")
-            return
+    free_slots = 10 - len(images)
+    if free_slots <= 0:
+        await message.answer("❌ Можно загрузить максимум 10 фотографий. Напишите 'Готово' для продолжения.")
+        return
 
-        # Получаем файл фото
-        photo = message.photo[-1]  # Берем самое большое фото
-        file = await bot.get_file(photo.file_id)
+    async def save_one(photo_message: types.Message):
+        # Скачиваем самое большое фото и нарезаем варианты для сайта
+        photo = photo_message.photo[-1]
+        with PHOTO_SECONDS.timer():
+            photo_data = await car_manager.photos.download(bot, photo.file_id)
+        PHOTO_BYTES.inc(amount=len(photo_data))
+        return await car_manager.save_photo(photo_data)
+
+    accepted = messages[:free_slots]
+    results = await asyncio.gather(
+        *(save_one(photo_message) for photo_message in accepted),
+        return_exceptions=True
+    )
 
-        # Генерируем имя файла
-        brand = data.get('brand', 'car').lower().replace(' ', '-')
-        model = data.get('model', 'model').lower().replace(' ', '-')
-        year = data.get('year', 2024)
-        filename = f"{brand}-{model}-{year}-{len(images)}.jpg"
+    images_card = data.get('images_card', [])
+    images_thumb = data.get('images_thumb', [])
+    failed = 0
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Ошибка при загрузке фото: {result}")
+            failed += 1
+            continue
+        images.append(result["full"])
+        images_card.append(result["card"])
+        images_thumb.append(result["thumb"])
 
-        # Скачиваем и сохраняем фото
-        file_path = car_manager.images_path / filename
-        await bot.download_file(file.file_path, file_path)
+    # Одно обновление состояния на весь альбом
+    await state.update_data(images=images, images_card=images_card, images_thumb=images_thumb)
 
-        # Добавляем путь к изображению
-        image_path = f"images/cars/{filename}"
-        images.append(image_path)
+    saved = len(accepted) - failed
+    text = f"✅ Загружено фото: {saved}. Всего {len(images)}/10.\n"
+    if failed:
+        text += f"❌ Не удалось загрузить: {failed}. Попробуйте отправить их еще раз.\n"
+    if len(messages) > len(accepted):
+        text += f"⚠️ Пропущено {len(messages) - len(accepted)} фото сверх лимита в 10 шт.\n"
+    text += "Загрузите ещё или напишите 'Готово'"
 
-        await state.update_data(images=images)
-
-        await message.answer(
-            f"✅ Фото {len(images)}/10 загружено.\n"
-            f"Загрузите ещё или напишите 'Готово'"
-        )
-    except Exception as e:
-        logger.error(f"Ошибка при загрузке фото: {e}")
-        await message.answer(
-            f"❌ Ошибка при загрузке фото. Попробуйте еще раз или напишите 'Готово' для продолжения без этого фото."
-        )
+    await message.answer(text)
 
 
 @dp.message(CarCreationStates.photos, F.text)
@@ -666,6 +749,10 @@ async def process_photos_done(message: types.Message, state: FSMContext):
     car_data = await state.get_data()
     summary = car_manager.format_car_summary(car_data)
 
+    duplicate = car_manager.index.find_duplicate(car_data)
+    if duplicate:
+        summary += f"\n⚠️ Похожее объявление уже есть в каталоге: `{duplicate}`\n"
+
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(text="✅ Опубликовать", callback_data="confirm_car"),
@@ -696,9 +783,8 @@ async def callback_admin_add_car(callback: types.CallbackQuery, state: FSMContex
 
     await state.set_state(CarCreationStates.brand)
 
-    # Создаем inline кнопки с марками из справочника
-    brands = sorted(CAR_BRANDS.keys())
-    keyboard = create_inline_keyboard(brands, "brand", row_width=2)
+    # Inline кнопки с марками из справочника
+    keyboard = brands_keyboard().page(0)
 
     await callback.message.answer(
         "➕ **Добавление нового автомобиля**\n\n"
@@ -713,9 +799,24 @@ async def callback_admin_add_car(callback: types.CallbackQuery, state: FSMContex
 async def callback_brand_selected(callback: types.CallbackQuery, state: FSMContext):
     """Обработка выбора марки через inline кнопку"""
 
-    brand = callback.data.split(":", 1)[1]
+    data = await state.get_data()
+    action, brand = parse_callback(callback.data, brand_ids(), id_table(data.get('brand_choices', ())))
+
+    if action == "page":
+        await callback.message.edit_reply_markup(reply_markup=brands_keyboard().page(int(brand)))
+        await callback.answer()
+        return
+
+    if action == "stale":
+        # Кнопка с маркой, которой больше нет в справочнике
+        await callback.message.edit_text(
+            "🚗 Список марок обновился, выберите марку еще раз:",
+            reply_markup=brands_keyboard().page(0)
+        )
+        await callback.answer()
+        return
 
-    if brand == "manual":
+    if action == "manual":
         # Пользователь хочет ввести марку вручную
         await callback.message.edit_text(
             "📝 Введите марку автомобиля вручную:",
@@ -724,13 +825,16 @@ async def callback_brand_selected(callback: types.CallbackQuery, state: FSMConte
         await callback.answer()
         return
 
+    # Марка из вариантов исправления могла быть введена вручную
+    if add_brand(brand):
+        logger.info(f"Добавлена новая марка: {brand}")
+
     # Сохраняем выбранную марку
     await state.update_data(brand=brand)
     await state.set_state(CarCreationStates.model)
 
-    # Получаем модели для выбранной марки
-    models = CAR_BRANDS.get(brand, [])
-    keyboard = create_inline_keyboard(models, "model", row_width=2)
+    # Клавиатура моделей выбранной марки
+    keyboard = models_keyboard(brand).page(0)
 
     await callback.message.edit_text(
         f"✅ Марка: **{brand}**\n\n"
@@ -745,9 +849,24 @@ async def callback_brand_selected(callback: types.CallbackQuery, state: FSMConte
 async def callback_model_selected(callback: types.CallbackQuery, state: FSMContext):
     """Обработка выбора модели через inline кнопку"""
 
-    model = callback.data.split(":", 1)[1]
+    data = await state.get_data()
+    brand = data.get('brand', '')
+    action, model = parse_callback(callback.data, model_ids(brand), id_table(data.get('model_choices', ())))
 
-    if model == "manual":
+    if action in ("page", "stale"):
+        keyboard = models_keyboard(brand)
+        if action == "page":
+            await callback.message.edit_reply_markup(reply_markup=keyboard.page(int(model)))
+        else:
+            # Кнопка с моделью, которой больше нет в справочнике
+            await callback.message.edit_text(
+                "🚗 Список моделей обновился, выберите модель еще раз:",
+                reply_markup=keyboard.page(0)
+            )
+        await callback.answer()
+        return
+
+    if action == "manual":
         # Пользователь хочет ввести модель вручную
         data = await state.get_data()
         brand = data.get('brand', '')
@@ -775,6 +894,12 @@ async def callback_model_selected(callback: types.CallbackQuery, state: FSMConte
     await callback.answer()
 
 
+@dp.callback_query(F.data == NOOP)
+async def callback_noop(callback: types.CallbackQuery):
+    """Кнопка без действия (номер страницы клавиатуры)"""
+    await callback.answer()
+
+
 @dp.callback_query(F.data == "cancel_add_car")
 async def callback_cancel_add_car(callback: types.CallbackQuery, state: FSMContext):
     """Отмена создания объявления через inline кнопку"""
@@ -800,11 +925,29 @@ async def callback_confirm_car(callback: types.CallbackQuery, state: FSMContext)
         # Очищаем состояние
         await state.clear()
 
+        if hugo_builder is not None:
+            chat_id = callback.message.chat.id
+
+            async def notify_build(result: BuildResult):
+                if result.ok:
+                    text = f"🌐 Сайт обновлен за {result.duration:.1f} с (объявлений в сборке: {result.listings})"
+                else:
+                    text = f"⚠️ Ошибка сборки сайта:\n{result.output[-500:]}"
+                await bot.send_message(chat_id, text)
+
+            # Серия объявлений подряд - одна сборка и одно уведомление в чат
+            hugo_builder.schedule(notify_build, key=chat_id)
+            publish_note = "Сайт пересоберется автоматически, я сообщу, когда он обновится."
+        else:
+            publish_note = (
+                "Автомобиль появится на сайте после следующего деплоя.\n"
+                "Для немедленного появления выполните `hugo` в папке hugo-site."
+            )
+
         await callback.message.edit_text(
             f"✅ **Объявление успешно создано!**\n\n"
             f"Файл: `{Path(filepath).name}`\n\n"
-            f"Автомобиль появится на сайте после следующего деплоя.\n"
-            f"Для немедленного появления выполните `hugo` в папке hugo-site.",
+            f"{publish_note}",
             parse_mode="Markdown"
         )
 
@@ -835,15 +978,17 @@ async def callback_admin_stats(callback: types.CallbackQuery):
         await callback.answer("⛔️ У вас нет доступа к этой функции", show_alert=True)
         return
 
-    # Подсчитываем количество объявлений
-    content_path = Path(HUGO_SITE_PATH) / "content" / "cars"
-    car_files = list(content_path.glob("*.md"))
-    # Исключаем _index.md
-    car_count = len([f for f in car_files if f.name != "_index.md"])
+    # Статистика из индекса объявлений (без сканирования директории)
+    index = car_manager.index
+    car_count = index.count()
+    brands_count = len(index.brand_counts)
+    price_min, price_max = index.price_range()
 
     await callback.message.edit_text(
         f"📊 **Статистика:**\n\n"
         f"🚗 Автомобилей в каталоге: {car_count}\n"
+        f"🏷 Марок: {brands_count}\n"
+        f"💰 Цены: {price_min:,} - {price_max:,} ₽\n"
         f"👤 Администраторов: {len(ADMIN_IDS)}\n"
         f"🌐 Сайт: {WEBAPP_URL}",
         parse_mode="Markdown"
@@ -894,7 +1039,7 @@ async def handle_callbacks(callback: types.CallbackQuery):
 async def handle_text_messages(message: types.Message):
     """Обработка текстовых сообщений вне FSM (поиск)"""
 
-    search_data = search_by_text(message.text)
+    search_data = search_by_text(message.text, catalog=car_manager.search, shards=car_manager.shards)
     keyboard = create_keyboard_from_buttons(search_data["buttons"])
 
     await message.answer(
@@ -914,15 +1059,37 @@ async def main():
     logger.info("=" * 50)
     logger.info(f"Web App URL: {WEBAPP_URL}")
     logger.info(f"Hugo Site Path: {HUGO_SITE_PATH}")
+    logger.info(f"Режим: {BOT_MODE}")
     logger.info(get_admin_info())
     logger.info("=" * 50)
 
-    # Запускаем polling
+    # Следим за изменениями content/cars (правки вручную, git pull)
+    index_watcher = asyncio.create_task(car_manager.index.watch())
+    # Справочник марок: загрузка кэша и обновление из API по расписанию
+    brands_refresher = asyncio.create_task(
+        run_brands_refresher(timedelta(hours=BRANDS_REFRESH_HOURS))
+    )
+    metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT) if METRICS_ENABLED else None
+
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if BOT_MODE == "webhook":
+            from webhook import run_webhook
+            await run_webhook(dp, bot)
+        else:
+            # Webhook мог остаться от запуска в режиме webhook - polling с ним не работает
+            await bot.delete_webhook()
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     except Exception as e:
         logger.error(f"Ошибка при запуске бота: {e}")
     finally:
+        index_watcher.cancel()
+        brands_refresher.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        car_manager.photos.shutdown()
+        if hugo_builder is not None:
+            await hugo_builder.close()
+        await dp.storage.close()
         await bot.session.close()
 
 
@@ -0,0 +1,51 @@
+"""
+Сборка альбомов (media group) в одно событие
+
+Telegram присылает альбом из N фото как N отдельных сообщений с общим
+media_group_id. Middleware копит их в течение короткого окна и вызывает
+обработчик один раз - для первого сообщения, с полным списком в data["album"].
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+
+
+class AlbumMiddleware(BaseMiddleware):
+    """Буферизует сообщения альбома по media_group_id"""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+        self._albums: Dict[str, List[Message]] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any],
+    ) -> Any:
+        group_id = event.media_group_id
+        if not group_id:
+            return await handler(event, data)
+
+        album = self._albums.get(group_id)
+        if album is not None:
+            # Альбом уже собирает первое сообщение группы
+            album.append(event)
+            return None
+
+        album = self._albums[group_id] = [event]
+        try:
+            # Ждем, пока части альбома перестанут приходить
+            received = 0
+            while received != len(album):
+                received = len(album)
+                await asyncio.sleep(self.latency)
+        finally:
+            del self._albums[group_id]
+
+        album.sort(key=lambda message: message.message_id)
+        data["album"] = album
+        return await handler(event, data)
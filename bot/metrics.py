@@ -0,0 +1,225 @@
+"""
+Метрики бота в текстовом формате Prometheus
+
+Счетчики и гистограммы в памяти процесса, отдаются по HTTP на /metrics
+(METRICS_ENABLED=true). При выключенных метриках middleware не
+подключаются, а observe()/inc()/timer() возвращаются сразу, не трогая
+таблицы значений.
+
+Собирается:
+  • bot_updates_total{type}                     - обновления по типу
+  • bot_handler_seconds{handler}                - время обработчиков
+  • bot_handler_errors_total{handler}           - исключения в обработчиках
+  • bot_fsm_transitions_total{from,to}          - переходы FSM
+  • bot_photo_download_bytes_total / _seconds   - скачивание фото
+  • bot_listing_create_seconds                  - CarManager.create_car_listing
+"""
+
+import bisect
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self.enabled = False
+        self._metrics: List["Metric"] = []
+
+    def register(self, metric: "Metric") -> "Metric":
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        registry.register(self)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Монотонный счетчик"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        if not registry.enabled:
+            return
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_number(value)}"
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счетчики по корзинам (последняя - +Inf), сумма]
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, *labels: str):
+        if not registry.enabled:
+            return
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        # Корзина - только одна, накопительные суммы считаются при выдаче
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    @contextmanager
+    def timer(self, *labels: str):
+        """Замеряет время блока with"""
+        if not registry.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+# ---------- Метрики бота ----------
+
+UPDATES = Counter("bot_updates_total", "Обновления Telegram по типу", ["type"])
+HANDLER_SECONDS = Histogram("bot_handler_seconds", "Время работы обработчика", ["handler"])
+HANDLER_ERRORS = Counter("bot_handler_errors_total", "Исключения в обработчиках", ["handler"])
+FSM_TRANSITIONS = Counter("bot_fsm_transitions_total", "Переходы между состояниями FSM", ["from", "to"])
+PHOTO_BYTES = Counter("bot_photo_download_bytes_total", "Скачано байт фотографий")
+PHOTO_SECONDS = Histogram("bot_photo_download_seconds", "Время скачивания фотографии")
+LISTING_SECONDS = Histogram("bot_listing_create_seconds", "Время публикации объявления")
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Счетчик обновлений по типу (outer middleware на dp.update)"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        UPDATES.inc(event.event_type)
+        return await handler(event, data)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время обработчиков, ошибки и переходы FSM (inner middleware на наблюдателях)"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        state = data.get("state")
+        # Состояние до обработчика уже прочитано FSMContextMiddleware
+        before = data.get("raw_state")
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, name)
+            if state is not None:
+                # Одно чтение хранилища на обновление (redis/sqlite - запрос)
+                after = await state.get_state()
+                if after != before:
+                    FSM_TRANSITIONS.inc(before or "none", after or "none")
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(
+        body=registry.render().encode("utf-8"),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Включает сбор метрик и поднимает HTTP сервер с /metrics"""
+    registry.enabled = True
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Метрики: http://{host}:{port}/metrics")
+    return runner
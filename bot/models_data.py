@@ -0,0 +1,68 @@
+"""
+Марки и модели каталога с количеством объявлений (static/cars/models-data.json)
+
+Файл читает селектор марки/модели на главной странице сайта. Раньше его
+строил шаблон Hugo перебором всех страниц при каждой сборке; теперь
+счетчики ведутся по событиям ListingIndex, а файл перезаписывается
+атомарно и только при изменении:
+
+    {"brands": {"BMW": {"count": 3, "models": {"X5": 2, "2 серия": 1}}}}
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict
+
+from listing import NOT_SPECIFIED, Listing
+from site_export import SiteExport
+
+logger = logging.getLogger(__name__)
+
+MODELS_DATA_NAME = "models-data.json"
+
+
+class ModelsData(SiteExport):
+    """Счетчики марка -> модель -> объявления, обновляются вместе с ListingIndex"""
+
+    def __init__(self, output_path: Path, debounce: float = 1.0):
+        super().__init__(debounce)
+        self.path = Path(output_path) / MODELS_DATA_NAME
+        self.brands: Dict[str, int] = {}
+        self.models: Dict[str, Dict[str, int]] = {}
+
+    def apply(self, event: str, entry: Listing):
+        if not entry.brand or entry.brand == NOT_SPECIFIED:
+            return
+        delta = 1 if event == "add" else -1
+        brand, model = entry.brand, entry.model
+
+        count = self.brands.get(brand, 0) + delta
+        if count > 0:
+            self.brands[brand] = count
+        else:
+            self.brands.pop(brand, None)
+
+        if not model or model == NOT_SPECIFIED:
+            return
+        models = self.models.setdefault(brand, {})
+        count = models.get(model, 0) + delta
+        if count > 0:
+            models[model] = count
+        else:
+            models.pop(model, None)
+            if not models:
+                del self.models[brand]
+
+    def snapshot(self) -> Dict:
+        return {
+            "brands": {
+                brand: {"count": count, "models": dict(sorted(self.models.get(brand, {}).items()))}
+                for brand, count in sorted(self.brands.items())
+            }
+        }
+
+    def _write(self, data: Dict) -> bool:
+        if not self.write_json(self.path, data):
+            return False
+        logger.info(f"Марки и модели для сайта обновлены: {len(data['brands'])} марок")
+        return True
@@ -0,0 +1,78 @@
+"""
+Обработка фотографий объявлений
+
+Скачивание из Telegram с ограничением параллельности и нарезка
+вариантов (миниатюра, карточка, полный размер) в JPEG и WebP
+в пуле процессов. EXIF удаляется, ориентация применяется к пикселям.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+
+# Варианты изображения: имя -> максимальная сторона в пикселях
+VARIANTS = {
+    "thumb": 320,
+    "card": 800,
+    "full": 1600,
+}
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def render_variants(data: bytes) -> Dict[str, Dict[str, bytes]]:
+    """
+    Нарезает варианты изображения (выполняется в процессе пула).
+
+    Возвращает {variant: {"jpg": bytes, "webp": bytes}}.
+    Метаданные не копируются, поэтому EXIF (GPS, модель телефона) не попадает на сайт.
+    """
+    with Image.open(BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+
+    result = {}
+    for name, size in VARIANTS.items():
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.LANCZOS)
+
+        jpeg = BytesIO()
+        variant.save(jpeg, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        webp = BytesIO()
+        variant.save(webp, "WEBP", quality=WEBP_QUALITY, method=4)
+
+        result[name] = {"jpg": jpeg.getvalue(), "webp": webp.getvalue()}
+    return result
+
+
+class PhotoPipeline:
+    """Скачивание и обработка фотографий"""
+
+    def __init__(self, max_downloads: int = 4, workers: Optional[int] = None):
+        self._downloads = asyncio.Semaphore(max_downloads)
+        self._workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def download(self, bot, file_id: str) -> bytes:
+        """Скачивает файл из Telegram (не больше max_downloads одновременно)"""
+        async with self._downloads:
+            file = await bot.get_file(file_id)
+            buffer = await bot.download_file(file.file_path)
+            return buffer.getvalue()
+
+    async def render(self, data: bytes) -> Dict[str, Dict[str, bytes]]:
+        """Нарезает варианты изображения в пуле процессов, не блокируя цикл событий"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, render_variants, data)
+
+    def shutdown(self):
+        """Останавливает пул процессов"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,125 @@
+"""
+Транзакционная публикация файлов объявления
+
+Файлы сначала пишутся в staging-директорию (на той же файловой системе,
+что и сайт) и сбрасываются на диск. Затем на диск пишется журнал
+транзакции со списком переименований, и файлы по порядку переносятся
+на место через os.replace: фото первыми, markdown последним. Так
+объявление не появляется в каталоге раньше своих фото.
+
+После сбоя при старте вызывается recover():
+  • журнал есть - staging был полностью записан, переименования
+    доделываются (roll forward);
+  • журнала нет - транзакция не дошла до фиксации, staging удаляется
+    (roll back).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import List, Sequence, Tuple, Union
+
+from atomic_io import atomic_write_text, fsync_dir
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+class PublishJournal:
+    """Журнал публикаций в директории сайта"""
+
+    def __init__(self, site_path: PathLike):
+        self.site_path = Path(site_path)
+        self.staging_path = self.site_path / ".staging"
+        self.journal_path = self.site_path / ".publish-journal"
+
+    async def publish(self, files: Sequence[Tuple[PathLike, bytes]]) -> str:
+        """
+        Публикует файлы одной транзакцией, возвращает ее id.
+
+        files - пары (итоговый путь, содержимое) в порядке переименования:
+        зависимости (фото) первыми, markdown объявления - последним.
+        """
+        return await asyncio.to_thread(self.publish_sync, files)
+
+    def publish_sync(self, files: Sequence[Tuple[PathLike, bytes]]) -> str:
+        tx_id = uuid.uuid4().hex
+        staging = self.staging_path / tx_id
+        staging.mkdir(parents=True)
+
+        renames: List[Tuple[str, str]] = []
+        try:
+            # 1. Пишем все файлы в staging и сбрасываем на диск
+            for number, (target, content) in enumerate(files):
+                staged = staging / f"{number:04d}{Path(target).suffix}"
+                with open(staged, "wb") as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(staged, 0o644)
+                renames.append((str(staged), str(Path(target).resolve())))
+            fsync_dir(staging)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # 2. Фиксация: журнал на диске - с этого момента транзакция будет доведена до конца
+        journal = self.journal_path / f"{tx_id}.json"
+        atomic_write_text(journal, json.dumps({"id": tx_id, "renames": renames}), sync_dir=True)
+
+        # 3. Переименования в заданном порядке и очистка
+        self._apply(renames)
+        self._finish(tx_id)
+        return tx_id
+
+    def recover(self) -> Tuple[int, int]:
+        """Доводит или откатывает прерванные публикации, возвращает (доделано, откачено)"""
+        rolled_forward = rolled_back = 0
+
+        if self.journal_path.is_dir():
+            for journal in sorted(self.journal_path.glob("*.json")):
+                try:
+                    data = json.loads(journal.read_text(encoding="utf-8"))
+                except (OSError, ValueError) as e:
+                    # Журнал пишется атомарно, поврежденный - не наш файл
+                    logger.error(f"Не удалось прочитать журнал публикации {journal.name}: {e}")
+                    continue
+                self._apply(data["renames"])
+                self._finish(data["id"])
+                rolled_forward += 1
+                logger.warning(f"Публикация {data['id']} доведена до конца после сбоя")
+
+        if self.staging_path.is_dir():
+            for staging in self.staging_path.iterdir():
+                if not (self.journal_path / f"{staging.name}.json").exists():
+                    shutil.rmtree(staging, ignore_errors=True)
+                    rolled_back += 1
+                    logger.warning(f"Незавершенная публикация {staging.name} отменена")
+
+        return rolled_forward, rolled_back
+
+    def _apply(self, renames: Sequence[Tuple[str, str]]):
+        target_dirs = set()
+        for staged, target in renames:
+            # Повторный проход после сбоя: уже перенесенные файлы пропускаем
+            if not os.path.exists(staged):
+                continue
+            target_dir = os.path.dirname(target)
+            os.makedirs(target_dir, exist_ok=True)
+            os.replace(staged, target)
+            target_dirs.add(target_dir)
+        # Журнал удаляется только после того, как новые имена на диске
+        for target_dir in target_dirs:
+            fsync_dir(target_dir)
+
+    def _finish(self, tx_id: str):
+        shutil.rmtree(self.staging_path / tx_id, ignore_errors=True)
+        try:
+            os.unlink(self.journal_path / f"{tx_id}.json")
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,94 @@
+"""
+Файлы сайта, которые бот поддерживает в актуальном состоянии
+
+Выгрузка подписывается на ListingIndex, обновляет свое состояние на
+каждое событие и с задержкой (debounce) перезаписывает файлы в отдельном
+потоке: серия изменений (sync после git pull) - одна запись. Без цикла
+событий (инструменты в tools/) файлы пишутся явным write().
+"""
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from atomic_io import atomic_write_bytes
+from listing import Listing
+from listing_index import ListingIndex
+
+logger = logging.getLogger(__name__)
+
+
+class SiteExport:
+    """Базовый класс выгрузки: apply() - состояние, snapshot() и _write() - файлы"""
+
+    def __init__(self, debounce: float = 1.0):
+        self.debounce = debounce
+        self.index: Optional[ListingIndex] = None
+        self._dirty = True
+        self._pending: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        # Последнее записанное содержимое файлов (write_json)
+        self._written: Dict[Path, bytes] = {}
+
+    def track(self, index: ListingIndex):
+        """Подписывается на изменения индекса (до его загрузки)"""
+        self.index = index
+        index.add_listener(self._on_index_event)
+
+    def _on_index_event(self, event: str, entry: Listing):
+        self.apply(event, entry)
+        self._dirty = True
+        self._schedule()
+
+    def apply(self, event: str, entry: Listing):
+        """Обновляет состояние выгрузки по событию индекса (add | remove)"""
+
+    def snapshot(self) -> Any:
+        """Данные для записи; вызывается в цикле событий - индекс меняется только в нем"""
+        return list(self.index.entries.values()) if self.index is not None else []
+
+    def _write(self, snapshot: Any) -> Any:
+        raise NotImplementedError
+
+    def write_json(self, path: Path, data: Any) -> bool:
+        """Записывает JSON атомарно и только если содержимое изменилось"""
+        encoded = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if path not in self._written and path.exists():
+            self._written[path] = path.read_bytes()
+        if encoded == self._written.get(path):
+            return False
+        atomic_write_bytes(path, encoded)
+        self._written[path] = encoded
+        return True
+
+    def _schedule(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._pending is None:
+            self._pending = loop.call_later(self.debounce, self._start_write)
+
+    def _start_write(self):
+        self._pending = None
+        if self._task is not None and not self._task.done():
+            # Запись еще идет - следующая будет запланирована после нее
+            self._task.add_done_callback(lambda _: self._schedule())
+            return
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._task = asyncio.ensure_future(asyncio.to_thread(self._write, self.snapshot()))
+        self._task.add_done_callback(self._log_failure)
+
+    def _log_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self._dirty = True
+            logger.error(f"❌ {type(self).__name__}: ошибка записи: {task.exception()}")
+
+    def write(self) -> Any:
+        """Записывает файлы сразу (синхронно)"""
+        self._dirty = False
+        return self._write(self.snapshot())
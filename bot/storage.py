@@ -0,0 +1,198 @@
+"""
+Хранилища FSM состояний
+
+Выбор хранилища - через FSM_STORAGE в config.py:
+- memory - MemoryStorage aiogram (состояние теряется при перезапуске)
+- redis  - RedisStorage aiogram, общее для нескольких процессов бота
+           (REDIS_URL=fakeredis:// - локальная замена для тестов)
+- sqlite - встроенная база в режиме WAL с пакетной записью
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import FSM_STORAGE, REDIS_URL, FSM_SQLITE_PATH, FSM_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def _key_to_str(key: StorageKey) -> str:
+    """Сериализует ключ хранилища (бот, чат, пользователь, тред, destiny)"""
+    return ":".join(str(part) for part in (
+        key.bot_id, key.chat_id, key.user_id,
+        key.thread_id or "",
+        getattr(key, "business_connection_id", None) or "",
+        key.destiny,
+    ))
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM хранилище в SQLite (WAL).
+
+    Записи копятся в памяти и сбрасываются одной транзакцией раз в
+    flush_interval секунд (или при накоплении batch_size изменений).
+    Чтение идет из буфера, затем из базы, поэтому несколько процессов
+    с одним файлом видят общее состояние с задержкой не больше flush_interval.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.05, batch_size: int = 100):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # Все обращения к sqlite - из одного потока
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-sqlite")
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending_states: Dict[str, Optional[str]] = {}
+        self._pending_data: Dict[str, str] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self._executor.submit(self._connect).result()
+
+    # ---------- Работа с базой (в потоке executor'а) ----------
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fsm ("
+            "key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL DEFAULT '{}')"
+        )
+
+    def _read(self, key: str, column: str) -> Optional[str]:
+        row = self._db.execute(f"SELECT {column} FROM fsm WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _write_batch(self, states: Dict[str, Optional[str]], data: Dict[str, str]):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT INTO fsm (key, state) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET state = excluded.state",
+                states.items(),
+            )
+            self._db.executemany(
+                "INSERT INTO fsm (key, data) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+                data.items(),
+            )
+            # Пустые записи (state сброшен, данных нет) не храним
+            self._db.execute("DELETE FROM fsm WHERE state IS NULL AND data = '{}'")
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # ---------- Пакетная запись ----------
+
+    def _schedule_flush(self):
+        if len(self._pending_states) + len(self._pending_data) >= self.batch_size:
+            asyncio.create_task(self.flush())
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Сбрасывает накопленные изменения в базу одной транзакцией"""
+        if not self._pending_states and not self._pending_data:
+            return
+
+        states, self._pending_states = self._pending_states, {}
+        data, self._pending_data = self._pending_data, {}
+        try:
+            await self._run(self._write_batch, states, data)
+        except Exception as e:
+            logger.error(f"Ошибка записи FSM в SQLite: {e}")
+            # Возвращаем в буфер то, что не перезаписали новые изменения
+            for key, value in states.items():
+                self._pending_states.setdefault(key, value)
+            for key, value in data.items():
+                self._pending_data.setdefault(key, value)
+            self._schedule_flush()
+
+    # ---------- Интерфейс BaseStorage ----------
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._pending_states[_key_to_str(key)] = state.state if isinstance(state, State) else state
+        self._schedule_flush()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        str_key = _key_to_str(key)
+        if str_key in self._pending_states:
+            return self._pending_states[str_key]
+        return await self._run(self._read, str_key, "state")
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        self._pending_data[_key_to_str(key)] = json.dumps(data, ensure_ascii=False)
+        self._schedule_flush()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        str_key = _key_to_str(key)
+        raw = self._pending_data.get(str_key)
+        if raw is None:
+            raw = await self._run(self._read, str_key, "data")
+        return json.loads(raw) if raw else {}
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await self._run(self._db.close)
+        self._executor.shutdown(wait=True)
+
+
+def create_redis_storage(url: str) -> BaseStorage:
+    """RedisStorage aiogram; fakeredis:// - для тестов без сервера Redis"""
+    from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+
+    key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    if url.startswith("fakeredis://"):
+        from fakeredis.aioredis import FakeRedis
+        return RedisStorage(redis=FakeRedis(), key_builder=key_builder)
+
+    return RedisStorage.from_url(url, key_builder=key_builder)
+
+
+def create_storage(kind: str = FSM_STORAGE) -> BaseStorage:
+    """Создает FSM хранилище по настройке FSM_STORAGE"""
+    kind = kind.lower()
+
+    try:
+        if kind == "redis":
+            storage = create_redis_storage(REDIS_URL)
+        elif kind == "sqlite":
+            storage = SQLiteStorage(FSM_SQLITE_PATH, flush_interval=FSM_FLUSH_INTERVAL)
+        else:
+            if kind != "memory":
+                logger.warning(f"Неизвестное FSM_STORAGE={kind}, используем memory")
+            return MemoryStorage()
+    except ImportError as e:
+        logger.error(f"Хранилище {kind} недоступно ({e}), используем memory")
+        return MemoryStorage()
+
+    logger.info(f"FSM хранилище: {kind}")
+    return storage
@@ -0,0 +1,202 @@
+"""
+Ограничение частоты запросов
+
+ThrottlingMiddleware - входящие обновления: token bucket на пользователя
+и на чат. Сверх лимита обновление отбрасывается, а пользователь один раз
+за окно получает предупреждение.
+
+SendScheduler - исходящие запросы к Bot API: перед отправкой в чат ждет
+токен из бакета чата и общего бакета бота (лимиты Telegram: ~1 сообщение
+в секунду в чат, 20 в минуту в группу, ~30 в секунду всего). На ответ
+429 (TelegramRetryAfter) ставит чат (или весь бот) на паузу retry_after
+и повторяет запрос.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Бакет токенов: rate токенов в секунду, не больше capacity"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, now: Optional[float] = None) -> float:
+        """
+        Берет токен. Возвращает 0, если токен был, иначе - сколько секунд
+        ждать до следующего (токен при этом не берется).
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class BucketMap:
+    """Бакеты по ключу; простаивающие (полные) удаляются, когда их становится много"""
+
+    def __init__(self, rate: float, capacity: float, max_size: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_size = max_size
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def get(self, key: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_size:
+                self._sweep()
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+        return bucket
+
+    def _sweep(self):
+        now = time.monotonic()
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Лимит входящих сообщений и callback'ов на пользователя и на чат"""
+
+    def __init__(self, rate: float = 1.0, burst: int = 5,
+                 chat_rate: Optional[float] = None, chat_burst: Optional[int] = None,
+                 exempt: Optional[Callable[[int], bool]] = None):
+        self.users = BucketMap(rate, burst)
+        self.chats = BucketMap(chat_rate or rate * 3, chat_burst or burst * 3)
+        self.exempt = exempt
+        self._warned_until: Dict[int, float] = {}
+        self.dropped = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = getattr(event, "from_user", None)
+        if user is None or (self.exempt and self.exempt(user.id)):
+            return await handler(event, data)
+
+        chat_id = self._chat_id(event)
+        now = time.monotonic()
+        wait = self.users.get(user.id).consume(now)
+        if not wait and chat_id is not None and chat_id != user.id:
+            wait = self.chats.get(chat_id).consume(now)
+        if not wait:
+            return await handler(event, data)
+
+        self.dropped += 1
+        await self._warn(event, user.id, wait, now)
+        return None
+
+    @staticmethod
+    def _chat_id(event: TelegramObject) -> Optional[int]:
+        if isinstance(event, Message):
+            return event.chat.id
+        if isinstance(event, CallbackQuery) and event.message is not None:
+            return event.message.chat.id
+        return None
+
+    async def _warn(self, event: TelegramObject, user_id: int, wait: float, now: float):
+        # Предупреждаем один раз за окно, остальное молча отбрасываем
+        if self._warned_until.get(user_id, 0) > now:
+            if isinstance(event, CallbackQuery):
+                await event.answer()
+            return
+        if len(self._warned_until) >= self.users.max_size:
+            self._warned_until = {key: until for key, until in self._warned_until.items() if until > now}
+        window = max(wait, 1.0 / self.users.rate)
+        self._warned_until[user_id] = now + window
+
+        text = f"⏳ Слишком много запросов, подождите {max(1, round(window))} с"
+        if isinstance(event, CallbackQuery):
+            await event.answer(text)
+        elif isinstance(event, Message):
+            await event.answer(text)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Планировщик исходящих запросов бота с учетом лимитов Telegram"""
+
+    def __init__(self, global_rate: float = 25.0, chat_rate: float = 1.0, group_rate: float = 20 / 60,
+                 chat_burst: int = 3, max_retries: int = 3):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chats = BucketMap(chat_rate, chat_burst)
+        self.groups = BucketMap(group_rate, chat_burst)
+        self.max_retries = max_retries
+        self._paused_until: Dict[Any, float] = {}
+        self.retries = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ):
+        chat_id = getattr(method, "chat_id", None)
+        attempt = 0
+        while True:
+            if chat_id is not None:
+                await self._acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self.retries += 1
+                # Лимит чата - пауза только для него, иначе (ключ None) для всех запросов бота
+                self._paused_until[chat_id] = time.monotonic() + e.retry_after
+                logger.warning(
+                    f"⏳ Telegram: flood control для {chat_id or 'бота'}, "
+                    f"повтор {type(method).__name__} через {e.retry_after} с ({attempt}/{self.max_retries})"
+                )
+                if chat_id is None:
+                    await asyncio.sleep(e.retry_after)
+
+    async def _acquire(self, chat_id: Any):
+        is_group = isinstance(chat_id, str) or chat_id < 0
+        bucket = (self.groups if is_group else self.chats).get(chat_id)
+        while True:
+            now = time.monotonic()
+            paused = max(self._paused_until.get(chat_id, 0), self._paused_until.get(None, 0))
+            if paused > now:
+                await asyncio.sleep(paused - now)
+                continue
+            self._paused_until.pop(chat_id, None)
+            wait = bucket.consume(now)
+            if not wait:
+                wait = self.global_bucket.consume(now)
+                if not wait:
+                    return
+                # Токен чата уже взят - возвращаем, чтобы не терять его при ожидании общего
+                bucket.tokens += 1
+            await asyncio.sleep(wait)
@@ -0,0 +1,66 @@
+"""
+Транслитерация кириллицы в латиницу (для slug'ов и поиска)
+"""
+
+import re
+
+TRANSLIT_TABLE = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya'
+}
+
+_TRANSLATE = str.maketrans(TRANSLIT_TABLE)
+
+# Кириллица, похожая на латиницу, в названиях с цифрами ("х5", "с200", "м3"):
+# это латинские буквы, набранные в русской раскладке, а не транслит
+HOMOGLYPH_TABLE = {
+    'х': 'x', 'с': 'c', 'о': 'o', 'а': 'a', 'е': 'e', 'р': 'p',
+    'к': 'k', 'м': 'm', 'т': 't', 'в': 'b', 'у': 'y', 'н': 'h',
+}
+
+_HOMOGLYPHS = str.maketrans(HOMOGLYPH_TABLE)
+
+# Фонетическое сближение латиницы после транслитерации: camry/камри -> kamri
+_FOLDS = (
+    ("sch", "sh"), ("ph", "f"), ("ck", "k"),
+    ("ce", "se"), ("ci", "si"), ("cy", "si"), ("c", "k"),
+    ("q", "k"), ("w", "v"), ("x", "ks"), ("j", "dzh"), ("y", "i"),
+)
+
+_REPEAT_RE = re.compile(r"(.)\1+")
+
+
+def transliterate(text: str) -> str:
+    """Транслитерирует строку в нижнем регистре (латиница и цифры не меняются)"""
+    return text.lower().translate(_TRANSLATE)
+
+
+def normalize_token(token: str) -> str:
+    """Приводит слово к поисковому ключу: транслит + фонетическое сближение"""
+    token = token.lower().replace("ё", "е")
+    if any(char.isdigit() for char in token):
+        token = token.translate(_HOMOGLYPHS)
+    token = transliterate(token)
+    for src, dst in _FOLDS:
+        token = token.replace(src, dst)
+    return _REPEAT_RE.sub(r"\1", token)
+
+
+def slugify(text: str) -> str:
+    """Создает slug из текста (для имен файлов)"""
+    result = []
+    for char in str(text).lower():
+        if char in TRANSLIT_TABLE:
+            result.append(TRANSLIT_TABLE[char])
+        elif char.isalnum() or char in ['-', '_']:
+            result.append(char)
+        elif char == ' ':
+            result.append('-')
+
+    slug = ''.join(result)
+    # Удаляем повторяющиеся дефисы
+    slug = re.sub(r'-+', '-', slug)
+    return slug.strip('-')
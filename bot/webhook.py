@@ -0,0 +1,153 @@
+"""
+Webhook режим бота на aiohttp.web
+
+Telegram присылает обновления POST-запросами; сервер проверяет секретный
+токен (без WEBHOOK_SECRET он создается при запуске), кладет обновление
+в ограниченную очередь и сразу отвечает 200. Пул обработчиков разбирает
+очередь с заданной параллельностью. При остановке сервер перестает
+принимать запросы и дожидается обработки уже принятых обновлений.
+"""
+
+import asyncio
+import logging
+import secrets
+import signal
+from typing import List, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher, types
+
+from config import (
+    WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_QUEUE_SIZE, WEBHOOK_WORKERS, WEBHOOK_DRAIN_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """HTTP сервер для приема обновлений Telegram"""
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        path: str = WEBHOOK_PATH,
+        secret: str = WEBHOOK_SECRET,
+        queue_size: int = WEBHOOK_QUEUE_SIZE,
+        workers: int = WEBHOOK_WORKERS,
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        if not secret:
+            # Без секрета любой, кто знает URL, мог бы прислать обновление от имени администратора
+            secret = secrets.token_urlsafe(32)
+            logger.warning("⚠️ WEBHOOK_SECRET не задан - создан случайный; для нескольких инстансов задайте общий")
+        self.secret = secret
+        self.workers_count = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        self.app = web.Application()
+        self.app.router.add_post(path, self.handle_update)
+        self._runner: Optional[web.AppRunner] = None
+        self._workers: List[asyncio.Task] = []
+        self._accepting = False
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Принимает обновление от Telegram"""
+        if not self._accepting:
+            # Останавливаемся: Telegram повторит доставку на другой инстанс
+            return web.Response(status=503)
+
+        # Байты, а не str: compare_digest не принимает строки с не-ASCII символами
+        if not secrets.compare_digest(
+            request.headers.get(SECRET_HEADER, "").encode("utf-8"), self.secret.encode("utf-8")
+        ):
+            return web.Response(status=401)
+
+        try:
+            update = types.Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logger.warning(f"Некорректное обновление в webhook: {e}")
+            return web.Response(status=400)
+
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            # Очередь переполнена - пусть Telegram повторит позже
+            logger.warning("Очередь обновлений переполнена")
+            return web.Response(status=503)
+
+        return web.Response()
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                logger.error(f"Ошибка обработки обновления {update.update_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT):
+        """Запускает обработчики и HTTP сервер"""
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers_count)]
+
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self._accepting = True
+
+        logger.info(
+            f"Webhook сервер слушает {host}:{port}{self.path} "
+            f"(обработчиков: {self.workers_count}, очередь: {self.queue.maxsize})"
+        )
+
+    async def shutdown(self, drain_timeout: float = WEBHOOK_DRAIN_TIMEOUT):
+        """Плавная остановка: новые запросы отклоняются, принятые дорабатываются"""
+        self._accepting = False
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Не успели обработать {self.queue.qsize()} обновлений при остановке")
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Запускает бота в режиме webhook и ждет сигнала остановки"""
+    server = WebhookServer(dp, bot)
+    await server.start()
+
+    await bot.set_webhook(
+        url=f"{WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}",
+        secret_token=server.secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: остановка по KeyboardInterrupt
+            pass
+
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("Остановка webhook сервера...")
+        await server.shutdown()
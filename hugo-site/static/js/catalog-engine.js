@@ -0,0 +1,165 @@
+// Columnar filter engine for the catalog feed
+//
+// Works directly on the feed layout written by the bot (bot/catalog_feed.py):
+// numeric fields become Int32Array columns, dictionary-encoded fields keep
+// their codes in Uint16Array columns and get one bitset per value. A query
+// intersects the bitsets of the selected values (32 cars per operation)
+// and only then checks ranges and the search text for the surviving cars.
+// Results are bitsets too, so facet counts are AND + popcount.
+
+const CATEGORICAL_FIELDS = ['brand', 'model', 'fuel_type', 'transmission', 'drive_type', 'body_type', 'condition', 'color'];
+const NUMERIC_FIELDS = ['year', 'price', 'mileage'];
+
+function popcount(word) {
+    word -= (word >>> 1) & 0x55555555;
+    word = (word & 0x33333333) + ((word >>> 2) & 0x33333333);
+    return (((word + (word >>> 4)) & 0x0F0F0F0F) * 0x01010101) >>> 24;
+}
+
+class CatalogEngine {
+    // feed: parsed cars/index.<hash>.json; text: optional search string per car
+    constructor(feed, text = null) {
+        const { dicts, columns } = feed;
+        this.count = feed.count;
+        this.words = (this.count + 31) >>> 5;
+        this.dicts = dicts;
+
+        this.columns = {};
+        NUMERIC_FIELDS.forEach(field => {
+            this.columns[field] = Int32Array.from(columns[field], value => value || 0);
+        });
+
+        this.codes = {};
+        this.lookup = {};
+        this.bitsets = {};
+        CATEGORICAL_FIELDS.forEach(field => {
+            const values = dicts[field] || [];
+            const codes = Uint16Array.from(columns[field] || []);
+            const bitsets = values.map(() => new Uint32Array(this.words));
+            for (let i = 0; i < codes.length; i++) {
+                bitsets[codes[i]][i >>> 5] |= 1 << (i & 31);
+            }
+            this.codes[field] = codes;
+            this.lookup[field] = new Map(values.map((value, code) => [value, code]));
+            this.bitsets[field] = bitsets;
+        });
+
+        this.all = new Uint32Array(this.words).fill(0xFFFFFFFF);
+        if (this.count & 31) {
+            this.all[this.words - 1] = (1 << (this.count & 31)) - 1;
+        }
+
+        this.orders = {};
+        this.text = text ? text.map(value => value.toLowerCase()) : null;
+    }
+
+    // criteria: {brand, model, body_type, ...: exact value; price_from/to,
+    // year_from/to, mileage_from/to: inclusive bounds; search: substring}
+    filter(criteria) {
+        const result = this.all.slice();
+
+        for (const field of CATEGORICAL_FIELDS) {
+            const value = criteria[field];
+            if (!value) continue;
+            const code = this.lookup[field].get(value);
+            if (code === undefined) return new Uint32Array(this.words);
+            const bitset = this.bitsets[field][code];
+            for (let w = 0; w < this.words; w++) {
+                result[w] &= bitset[w];
+            }
+        }
+
+        const checks = [];
+        NUMERIC_FIELDS.forEach(field => {
+            const from = criteria[`${field}_from`] || 0;
+            const to = criteria[`${field}_to`] || 0;
+            if (from || to) {
+                checks.push([this.columns[field], from || -0x80000000, to || 0x7FFFFFFF]);
+            }
+        });
+        const search = this.text && criteria.search ? criteria.search.toLowerCase() : '';
+
+        if (checks.length || search) {
+            for (let w = 0; w < this.words; w++) {
+                let word = result[w];
+                while (word) {
+                    const bit = word & -word;
+                    const i = (w << 5) + 31 - Math.clz32(bit);
+                    word ^= bit;
+                    if (!this.matches(i, checks, search)) {
+                        result[w] &= ~bit;
+                    }
+                }
+            }
+        }
+        return result;
+    }
+
+    matches(i, checks, search) {
+        for (let c = 0; c < checks.length; c++) {
+            const [column, from, to] = checks[c];
+            if (column[i] < from || column[i] > to) return false;
+        }
+        return !search || this.text[i].includes(search);
+    }
+
+    size(bitset) {
+        let total = 0;
+        for (let w = 0; w < this.words; w++) {
+            total += popcount(bitset[w]);
+        }
+        return total;
+    }
+
+    // Row numbers of the set bits, in feed order
+    indices(bitset) {
+        const result = new Int32Array(this.size(bitset));
+        let n = 0;
+        for (let w = 0; w < this.words; w++) {
+            let word = bitset[w];
+            while (word) {
+                const bit = word & -word;
+                result[n++] = (w << 5) + 31 - Math.clz32(bit);
+                word ^= bit;
+            }
+        }
+        return result;
+    }
+
+    // Row numbers of the set bits ordered by a numeric column. The column
+    // order is computed once, then each query is a single pass over it.
+    sorted(bitset, field, descending = false) {
+        let order = this.orders[field];
+        if (!order) {
+            const column = this.columns[field];
+            order = this.orders[field] = new Int32Array(this.count).map((_, i) => i);
+            order.sort((a, b) => column[a] - column[b] || a - b);
+        }
+        const result = new Int32Array(this.size(bitset));
+        let n = descending ? result.length - 1 : 0;
+        const step = descending ? -1 : 1;
+        for (let k = 0; k < order.length; k++) {
+            const i = order[k];
+            if (bitset[i >>> 5] & (1 << (i & 31))) {
+                result[n] = i;
+                n += step;
+            }
+        }
+        return result;
+    }
+
+    // Number of cars per value of a categorical field within a result
+    facet(bitset, field) {
+        const counts = {};
+        this.dicts[field].forEach((value, code) => {
+            const values = this.bitsets[field][code];
+            let total = 0;
+            for (let w = 0; w < this.words; w++) {
+                const word = bitset[w] & values[w];
+                if (word) total += popcount(word);
+            }
+            if (total) counts[value] = total;
+        });
+        return counts;
+    }
+}
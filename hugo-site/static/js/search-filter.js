@@ -1,10 +1,65 @@
 // Advanced Car Search and Filter System
+//
+// Filters the whole inventory, not only the cards of the current page:
+// the bot (or tools/build_catalog_feed.py in CI) publishes a columnar
+// catalog feed at cars/index.json -> cars/index.<hash>.json. While a filter
+// is active the matching cards are rendered client-side; without filters
+// the server-rendered page (with Hugo pagination) is restored. If the feed
+// can't be loaded the filter falls back to the cards present on the page.
+// Filtering over the feed is done by CatalogEngine (js/catalog-engine.js).
+// Option counts and price/year ranges come from cars/facets.json, which
+// holds precomputed counters for every prefix of the filter chain
+// brand -> body_type -> fuel_type -> transmission.
+
+const RENDER_BATCH = 24;
+
+// sort select value -> [field, descending]
+const SORT_ORDERS = {
+    price_asc: ['price', false],
+    price_desc: ['price', true],
+    year_desc: ['year', true],
+    mileage_asc: ['mileage', false]
+};
+
+const FILTER_SELECTOR = '#brand, #model, #price_from, #price_to, #year_from, #year_to, #body_type, #fuel_type, #transmission, #sort';
+const RANGE_SELECTOR = '#price_from, #price_to, #year_from, #year_to';
+
+// Histogram in facets.json -> inputs showing its range as placeholders
+const RANGE_INPUTS = {
+    price: ['price_from', 'price_to'],
+    year: ['year_from', 'year_to']
+};
+
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+function formatNumber(value) {
+    return Number(value || 0).toLocaleString('ru-RU');
+}
 
 class CarSearchFilter {
     constructor() {
         this.cars = [];
         this.filteredCars = [];
         this.currentFilters = {};
+        this.source = 'dom';
+        this.engine = null;
+        this.rendered = 0;
+
+        this.container = document.querySelector('#cars-container');
+        this.pagination = document.querySelector('.pagination')?.closest('.row') || null;
+        this.serverHtml = this.container ? this.container.innerHTML : '';
+
+        const settings = this.container?.dataset || {};
+        this.feedUrl = settings.feedUrl || '';
+        this.facetsUrl = settings.facetsUrl || '';
+        this.facets = null;
+        this.baseUrl = (settings.baseUrl || '/').replace(/\/?$/, '/');
+        this.phone = settings.phone || '';
+
         this.init();
     }
 
@@ -12,86 +67,162 @@ class CarSearchFilter {
         this.loadCarsData();
         this.bindEvents();
         this.parseUrlParams();
+        this.loadFeed();
+        this.loadFacets();
     }
 
-        // Load cars data from the page
+    // Fallback: cards rendered on the current page
     loadCarsData() {
         const carCards = document.querySelectorAll('.car-card');
         this.cars = Array.from(carCards).map(card => {
             const titleEl = card.querySelector('.card-title a');
-
-            // Get data from data attributes (preferred method)
-            const brand = card.dataset.brand || '';
-            const model = card.dataset.model || '';
-            const year = parseInt(card.dataset.year) || 0;
-            const price = parseInt(card.dataset.price) || 0;
-            const mileage = parseInt(card.dataset.mileage) || 0;
-            const engine = card.dataset.engine || '';
-            const transmission = card.dataset.transmission || '';
-            const bodyType = card.dataset.body || '';
-            const fuelType = card.dataset.fuel || '';
-            const condition = card.dataset.condition || '';
-
-            // Fallback: extract from text content if data attributes are missing
-            const titleText = titleEl ? titleEl.textContent.trim() : '';
-            const brandText = card.querySelector('.text-muted')?.textContent?.trim() || '';
-            const priceEl = card.querySelector('.badge.bg-primary, .text-primary, .price-amount');
-            const priceText = priceEl ? priceEl.textContent.trim() : '';
-
-            // Parse fallback data if needed
-            const fallbackPrice = price || parseInt(priceText.replace(/[^\d]/g, '')) || 0;
-            const fallbackBrand = brand || (brandText.includes('•') ? brandText.split('•')[0].trim().split(' ')[0] : titleText.split(' ')[0]) || '';
-            const fallbackModel = model || (brandText.includes('•') ? brandText.split('•')[0].trim().split(' ')[1] : titleText.split(' ')[1]) || '';
-            const fallbackYear = year || parseInt((brandText.includes('•') ? brandText.split('•')[1] : titleText.split(' ')[2] || '').replace(/[^\d]/g, '')) || 0;
-
-            const carData = {
+            return {
                 element: card,
-                title: titleText,
-                brand: fallbackBrand,
-                model: fallbackModel,
-                year: fallbackYear,
-                price: fallbackPrice,
-                mileage: mileage,
-                engine: engine,
-                transmission: transmission,
-                bodyType: bodyType,
-                fuelType: fuelType,
-                condition: condition,
+                title: titleEl ? titleEl.textContent.trim() : '',
+                brand: card.dataset.brand || '',
+                model: card.dataset.model || '',
+                year: parseInt(card.dataset.year) || 0,
+                price: parseInt(card.dataset.price) || 0,
+                mileage: parseInt(card.dataset.mileage) || 0,
+                transmission: card.dataset.transmission || '',
+                bodyType: card.dataset.body || '',
+                fuelType: card.dataset.fuel || '',
+                condition: card.dataset.condition || '',
                 url: titleEl ? titleEl.href : ''
             };
-
-            console.log('Car data:', carData); // Debug log
-            return carData;
         });
-
         this.filteredCars = [...this.cars];
-        console.log('Loaded cars:', this.cars.length);
-        console.log('Cars with prices:', this.cars.filter(car => car.price > 0).length);
     }
 
-    extractBodyType(card) {
-        const features = card.querySelectorAll('.car-features-list li, .feature-item');
-        for (let feature of features) {
-            const text = feature.textContent.toLowerCase();
-            if (text.includes('седан')) return 'Седан';
-            if (text.includes('внедорожник')) return 'Внедорожник';
-            if (text.includes('хэтчбек')) return 'Хэтчбек';
-            if (text.includes('универсал')) return 'Универсал';
-            if (text.includes('купе')) return 'Купе';
+    // Whole inventory from the catalog feed
+    async loadFeed() {
+        if (!this.feedUrl) return;
+        try {
+            const manifestResponse = await fetch(this.feedUrl, { cache: 'no-cache' });
+            if (!manifestResponse.ok) throw new Error(`manifest: HTTP ${manifestResponse.status}`);
+            const manifest = await manifestResponse.json();
+
+            // Data files are content-addressed, the browser may cache them forever
+            const dataUrl = new URL(manifest.file, new URL(this.feedUrl, window.location.href));
+            const dataResponse = await fetch(dataUrl);
+            if (!dataResponse.ok) throw new Error(`feed: HTTP ${dataResponse.status}`);
+
+            const feed = await dataResponse.json();
+            this.cars = this.decodeFeed(feed);
+            this.engine = new CatalogEngine(feed, this.cars.map(car => `${car.title} ${car.brand} ${car.model}`));
+            this.source = 'feed';
+            if (this.hasActiveFilters()) {
+                this.applyFilters();
+            } else {
+                this.filteredCars = [...this.cars];
+                this.updateResultsCount();
+            }
+        } catch (error) {
+            console.warn('Catalog feed unavailable, filtering the current page only:', error);
+        }
+    }
+
+    async loadFacets() {
+        if (!this.facetsUrl) return;
+        try {
+            const response = await fetch(this.facetsUrl, { cache: 'no-cache' });
+            if (!response.ok) throw new Error(`facets: HTTP ${response.status}`);
+            this.facets = await response.json();
+            this.updateFacets();
+        } catch (error) {
+            console.warn('Filter counts unavailable:', error);
+        }
+    }
+
+    // Counters for the selected prefix of the filter chain. Counts for a
+    // field use the prefix before it, so its other values stay visible.
+    facetNode(depth) {
+        const { fields, separator, facets } = this.facets;
+        const prefix = [];
+        for (let i = 0; i < depth; i++) {
+            const value = this.getInputValue(`#${fields[i]}`);
+            if (!value) break;
+            prefix.push(value);
         }
-        return '';
+        return facets[prefix.join(separator)] || null;
+    }
+
+    updateFacets() {
+        if (!this.facets) return;
+        const { fields } = this.facets;
+
+        fields.forEach((field, depth) => {
+            const select = document.getElementById(field);
+            if (!select) return;
+            const counts = this.facetNode(depth)?.[field] || {};
+            Array.from(select.options).forEach(option => {
+                if (!option.value) return;
+                if (option.dataset.label === undefined) {
+                    option.dataset.label = option.textContent.replace(/\s*\(\d+\)\s*$/, '').trim();
+                }
+                const count = counts[option.value] || 0;
+                option.textContent = `${option.dataset.label} (${count})`;
+                option.disabled = !count && option.value !== select.value;
+            });
+        });
+
+        const node = this.facetNode(fields.length);
+        Object.entries(RANGE_INPUTS).forEach(([name, [fromId, toId]]) => {
+            this.showRange(node, this.facets[`${name}_buckets`], name, fromId, toId);
+        });
     }
 
-    extractFuelType(card) {
-        const features = card.querySelectorAll('.car-features-list li, .feature-item');
-        for (let feature of features) {
-            const text = feature.textContent.toLowerCase();
-            if (text.includes('бензин')) return 'Бензин';
-            if (text.includes('дизель')) return 'Дизель';
-            if (text.includes('гибрид')) return 'Гибрид';
-            if (text.includes('электро')) return 'Электро';
+    // Placeholders: bounds of the non-empty histogram buckets
+    showRange(node, bounds, name, fromId, toId) {
+        const filled = [];
+        (node?.[name] || []).forEach((count, bucket) => {
+            if (count) filled.push(bucket);
+        });
+
+        [fromId, toId].forEach((id, end) => {
+            const input = document.getElementById(id);
+            if (!input) return;
+            if (input.dataset.placeholder === undefined) {
+                input.dataset.placeholder = input.placeholder;
+            }
+            let bound = null;
+            if (filled.length) {
+                bound = end ? bounds[filled[filled.length - 1] + 1] : bounds[filled[0]];
+            }
+            input.placeholder = bound ? (name === 'price' ? formatNumber(bound) : String(bound)) :
+                input.dataset.placeholder;
+        });
+    }
+
+    decodeFeed(feed) {
+        const { dicts, columns } = feed;
+        const value = (field, i) => dicts[field][columns[field][i]] || '';
+        const cars = new Array(feed.count);
+
+        for (let i = 0; i < feed.count; i++) {
+            const car = {
+                element: null,
+                slug: columns.slug[i],
+                brand: value('brand', i),
+                model: value('model', i),
+                year: columns.year[i] || 0,
+                price: columns.price[i] || 0,
+                mileage: columns.mileage[i] || 0,
+                engineVolume: columns.engine_volume[i] || 0,
+                transmission: value('transmission', i),
+                bodyType: value('body_type', i),
+                fuelType: value('fuel_type', i),
+                condition: value('condition', i),
+                image: columns.image[i] || '',
+                url: `${this.baseUrl}cars/${columns.slug[i]}/`
+            };
+            // Same as Listing.title in the bot
+            const engine = Number.isInteger(car.engineVolume) ? car.engineVolume.toFixed(1) : car.engineVolume;
+            car.title = `${car.brand} ${car.model} ${engine} ${car.transmission}, ${car.year}` +
+                (car.mileage ? `, ${car.mileage} км` : '');
+            cars[i] = car;
         }
-        return 'Бензин'; // Default
+        return cars;
     }
 
     bindEvents() {
@@ -105,16 +236,18 @@ class CarSearchFilter {
         });
 
         // Real-time filtering
-        const filterInputs = document.querySelectorAll(
-            '#brand, #model, #price_from, #price_to, #year_from, #year_to, #body_type, #fuel_type, #transmission'
-        );
-
-        filterInputs.forEach(input => {
+        document.querySelectorAll(FILTER_SELECTOR).forEach(input => {
             input.addEventListener('change', () => {
                 this.applyFilters();
             });
         });
 
+        // Price/year bounds while typing, with debounce
+        const typed = this.debounce(() => this.applyFilters(), 200);
+        document.querySelectorAll(RANGE_SELECTOR).forEach(input => {
+            input.addEventListener('input', typed);
+        });
+
         // Search input with debounce
         const searchInput = document.querySelector('#search, input[name="q"]');
         if (searchInput) {
@@ -148,6 +281,7 @@ class CarSearchFilter {
             body_type: urlParams.get('body_type') || '',
             fuel_type: urlParams.get('fuel_type') || '',
             transmission: urlParams.get('transmission') || '',
+            sort: urlParams.get('sort') || '',
             search: urlParams.get('q') || urlParams.get('search') || ''
         };
 
@@ -159,14 +293,17 @@ class CarSearchFilter {
             }
         });
 
-        // Apply initial filters
-        if (Object.values(this.currentFilters).some(val => val !== '' && val !== 0)) {
+        // Apply initial filters (again once the feed is loaded)
+        if (this.hasActiveFilters()) {
             setTimeout(() => this.applyFilters(), 100);
         }
     }
 
+    hasActiveFilters() {
+        return Object.values(this.currentFilters).some(val => val !== '' && val !== 0);
+    }
+
     applyFilters() {
-        // Get current filter values
         this.currentFilters = {
             brand: this.getInputValue('#brand'),
             model: this.getInputValue('#model'),
@@ -177,111 +314,165 @@ class CarSearchFilter {
             body_type: this.getInputValue('#body_type'),
             fuel_type: this.getInputValue('#fuel_type'),
             transmission: this.getInputValue('#transmission'),
+            sort: this.getInputValue('#sort'),
             search: this.getInputValue('#search, input[name="q"]')
         };
 
-                console.log('Applying filters:', this.currentFilters);
-
-        // Filter cars
-        this.filteredCars = this.cars.filter(car => {
-            // Brand filter
-            if (this.currentFilters.brand &&
-                !car.brand.toLowerCase().includes(this.currentFilters.brand.toLowerCase())) {
-                console.log(`Filtered out ${car.title} by brand: ${car.brand} vs ${this.currentFilters.brand}`);
-                return false;
-            }
-
-            // Model filter
-            if (this.currentFilters.model &&
-                !car.model.toLowerCase().includes(this.currentFilters.model.toLowerCase())) {
-                console.log(`Filtered out ${car.title} by model: ${car.model} vs ${this.currentFilters.model}`);
-                return false;
-            }
-
-            // Price filters
-            if (this.currentFilters.price_from > 0 && car.price < this.currentFilters.price_from) {
-                console.log(`Filtered out ${car.title} by price_from: ${car.price} < ${this.currentFilters.price_from}`);
-                return false;
-            }
-            if (this.currentFilters.price_to > 0 && car.price > this.currentFilters.price_to) {
-                console.log(`Filtered out ${car.title} by price_to: ${car.price} > ${this.currentFilters.price_to}`);
-                return false;
-            }
-
-            // Year filters
-            if (this.currentFilters.year_from > 0 && car.year < this.currentFilters.year_from) {
-                console.log(`Filtered out ${car.title} by year_from: ${car.year} < ${this.currentFilters.year_from}`);
-                return false;
-            }
-            if (this.currentFilters.year_to > 0 && car.year > this.currentFilters.year_to) {
-                console.log(`Filtered out ${car.title} by year_to: ${car.year} > ${this.currentFilters.year_to}`);
-                return false;
-            }
-
-            // Body type filter
-            if (this.currentFilters.body_type &&
-                !car.bodyType.toLowerCase().includes(this.currentFilters.body_type.toLowerCase())) {
-                console.log(`Filtered out ${car.title} by body_type: ${car.bodyType} vs ${this.currentFilters.body_type}`);
-                return false;
-            }
-
-            // Fuel type filter
-            if (this.currentFilters.fuel_type &&
-                !car.fuelType.toLowerCase().includes(this.currentFilters.fuel_type.toLowerCase())) {
-                console.log(`Filtered out ${car.title} by fuel_type: ${car.fuelType} vs ${this.currentFilters.fuel_type}`);
-                return false;
-            }
-
-            // Transmission filter
-            if (this.currentFilters.transmission &&
-                !car.transmission.toLowerCase().includes(this.currentFilters.transmission.toLowerCase())) {
-                console.log(`Filtered out ${car.title} by transmission: ${car.transmission} vs ${this.currentFilters.transmission}`);
-                return false;
-            }
-
-            // Search filter (title, brand, model)
-            if (this.currentFilters.search) {
-                const searchText = this.currentFilters.search.toLowerCase();
-                const searchableText = `${car.title} ${car.brand} ${car.model}`.toLowerCase();
-                if (!searchableText.includes(searchText)) {
-                    console.log(`Filtered out ${car.title} by search: ${searchableText} vs ${searchText}`);
-                    return false;
-                }
-            }
-
-            console.log(`Passed all filters: ${car.title}`);
-            return true;
-        });
-
-        console.log(`Filter results: ${this.filteredCars.length} of ${this.cars.length} cars`);
+        if (this.engine) {
+            this.filteredCars = this.filterFeed();
+        } else {
+            this.filteredCars = this.filterPage();
+        }
 
         this.renderResults();
         this.updateUrl();
         this.updateResultsCount();
+        this.updateFacets();
+    }
+
+    filterFeed() {
+        const matches = this.engine.filter(this.currentFilters);
+        const order = SORT_ORDERS[this.currentFilters.sort];
+        const indices = order ?
+            this.engine.sorted(matches, order[0], order[1]) :
+            this.engine.indices(matches);
+        return Array.from(indices, i => this.cars[i]);
+    }
+
+    filterPage() {
+        const f = this.currentFilters;
+        const search = f.search.toLowerCase();
+
+        // Select values come from the same enums as the data: exact match
+        const cars = this.cars.filter(car =>
+            (!f.brand || car.brand === f.brand) &&
+            (!f.model || car.model === f.model) &&
+            (!f.price_from || car.price >= f.price_from) &&
+            (!f.price_to || car.price <= f.price_to) &&
+            (!f.year_from || car.year >= f.year_from) &&
+            (!f.year_to || car.year <= f.year_to) &&
+            (!f.body_type || car.bodyType === f.body_type) &&
+            (!f.fuel_type || car.fuelType === f.fuel_type) &&
+            (!f.transmission || car.transmission === f.transmission) &&
+            (!search || `${car.title} ${car.brand} ${car.model}`.toLowerCase().includes(search))
+        );
+
+        const order = SORT_ORDERS[f.sort];
+        if (order) {
+            const [field, descending] = order;
+            cars.sort((a, b) => descending ? b[field] - a[field] : a[field] - b[field]);
+        }
+        return cars;
     }
 
     renderResults() {
-        // Hide all cars
+        if (this.source === 'feed') {
+            this.renderFeedResults();
+        } else {
+            this.renderPageResults();
+        }
+        this.toggleNoResultsMessage();
+    }
+
+    // Fallback mode: show/hide the cards of the current page
+    renderPageResults() {
+        const visible = new Set(this.filteredCars);
         this.cars.forEach(car => {
-            car.element.style.display = 'none';
-            car.element.parentElement.style.display = 'none';
+            const display = visible.has(car) ? 'block' : 'none';
+            car.element.style.display = display;
+            car.element.parentElement.style.display = display;
         });
+    }
 
-        // Show filtered cars
-        this.filteredCars.forEach(car => {
-            car.element.style.display = 'block';
-            car.element.parentElement.style.display = 'block';
-        });
+    renderFeedResults() {
+        if (!this.container) return;
 
-        // Show/hide no results message
-        this.toggleNoResultsMessage();
+        if (!this.hasActiveFilters()) {
+            // Back to the server-rendered page and its pagination
+            this.container.innerHTML = this.serverHtml;
+            if (this.pagination) this.pagination.style.display = '';
+            this.rendered = 0;
+            return;
+        }
 
-        // Add animation
-        this.filteredCars.forEach((car, index) => {
-            setTimeout(() => {
-                car.element.classList.add('fade-in-up');
-            }, index * 50);
-        });
+        if (this.pagination) this.pagination.style.display = 'none';
+        this.container.innerHTML = '';
+        this.rendered = 0;
+        this.renderMore();
+    }
+
+    renderMore() {
+        this.container.querySelector('.show-more-cars')?.remove();
+
+        const batch = this.filteredCars.slice(this.rendered, this.rendered + RENDER_BATCH);
+        this.container.insertAdjacentHTML('beforeend', batch.map(car => this.cardHtml(car)).join(''));
+        this.rendered += batch.length;
+
+        if (this.rendered < this.filteredCars.length) {
+            const more = document.createElement('div');
+            more.className = 'col-12 text-center show-more-cars';
+            more.innerHTML = `<button type="button" class="btn btn-outline-primary">
+                Показать еще (${this.filteredCars.length - this.rendered})
+            </button>`;
+            more.querySelector('button').addEventListener('click', () => this.renderMore());
+            this.container.appendChild(more);
+        }
+    }
+
+    // Mirrors layouts/partials/car-card.html
+    cardHtml(car) {
+        const image = escapeHtml(this.baseUrl + (car.image || 'images/cars/placeholder.svg').replace(/^\//, ''));
+        const title = escapeHtml(car.title);
+        const url = escapeHtml(car.url);
+        return `
+            <div class="col-lg-4 col-md-6">
+                <div class="car-card card h-100 border-0 shadow-sm">
+                    <div class="car-image-wrapper position-relative overflow-hidden">
+                        <img src="${image}" class="card-img-top" alt="${title}" loading="lazy">
+                        ${car.condition ? `<span class="badge bg-success position-absolute top-0 start-0 m-3">${escapeHtml(car.condition)}</span>` : ''}
+                        <div class="price-badge position-absolute top-0 end-0 m-3">
+                            <span class="badge bg-primary fs-6 fw-bold">${formatNumber(car.price)} ₽</span>
+                        </div>
+                    </div>
+                    <div class="card-body p-4">
+                        <h5 class="card-title mb-2">
+                            <a href="${url}" class="text-decoration-none text-dark">${title}</a>
+                        </h5>
+                        <p class="text-muted mb-3">${escapeHtml(car.brand)} ${escapeHtml(car.model)} • ${car.year} год</p>
+                        <div class="car-features mb-3">
+                            <div class="row g-2 text-sm">
+                                <div class="col-4">
+                                    <div class="feature-item text-center">
+                                        <i class="fas fa-tachometer-alt text-primary mb-1"></i>
+                                        <div class="text-muted small">${formatNumber(car.mileage)} км</div>
+                                    </div>
+                                </div>
+                                <div class="col-4">
+                                    <div class="feature-item text-center">
+                                        <i class="fas fa-gas-pump text-primary mb-1"></i>
+                                        <div class="text-muted small">${escapeHtml(car.fuelType)}</div>
+                                    </div>
+                                </div>
+                                <div class="col-4">
+                                    <div class="feature-item text-center">
+                                        <i class="fas fa-cog text-primary mb-1"></i>
+                                        <div class="text-muted small">${escapeHtml(car.transmission)}</div>
+                                    </div>
+                                </div>
+                            </div>
+                        </div>
+                        <div class="d-flex gap-2">
+                            <a href="${url}" class="btn btn-primary flex-fill">
+                                <i class="fas fa-info-circle me-1"></i>
+                                Подробнее
+                            </a>
+                            <a href="tel:${escapeHtml(this.phone)}" class="btn btn-outline-primary">
+                                <i class="fas fa-phone"></i>
+                            </a>
+                        </div>
+                    </div>
+                </div>
+            </div>`;
     }
 
     toggleNoResultsMessage() {
@@ -318,10 +509,12 @@ class CarSearchFilter {
 
         // Update page title
         const titleEl = document.querySelector('h1, .page-title');
-        if (titleEl && this.filteredCars.length !== this.cars.length) {
+        if (titleEl) {
             const originalTitle = titleEl.dataset.originalTitle || titleEl.textContent;
             titleEl.dataset.originalTitle = originalTitle;
-            titleEl.textContent = `${originalTitle} (${this.filteredCars.length})`;
+            titleEl.textContent = this.filteredCars.length !== this.cars.length ?
+                `${originalTitle} (${this.filteredCars.length})` :
+                originalTitle;
         }
     }
 
@@ -343,9 +536,7 @@ class CarSearchFilter {
 
     resetFilters() {
         // Clear form inputs
-        const inputs = document.querySelectorAll(
-            '#brand, #model, #price_from, #price_to, #year_from, #year_to, #body_type, #fuel_type, #transmission, #search, input[name="q"]'
-        );
+        const inputs = document.querySelectorAll(`${FILTER_SELECTOR}, #search, input[name="q"]`);
         inputs.forEach(input => {
             input.value = '';
             if (input.type === 'select-one') {
@@ -362,6 +553,7 @@ class CarSearchFilter {
         this.renderResults();
         this.updateUrl();
         this.updateResultsCount();
+        this.updateFacets();
 
         // Update floating labels
         if (window.updateFloatingLabels) {
@@ -416,7 +608,5 @@ document.addEventListener('DOMContentLoaded', function() {
 
         // Make it globally accessible
         window.carFilter = carFilter;
-
-        console.log('Car Search Filter initialized');
     }
 });
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Модули бота импортируются как в bot/main.py: from listing import ...
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
@@ -0,0 +1,36 @@
+from catalog_facets import CatalogFacets
+from listing import NOT_SPECIFIED, Listing
+
+
+def test_listing_without_brand_keeps_root_node(tmp_path):
+    facets = CatalogFacets(tmp_path)
+    for listing in (
+        Listing(brand="BMW", model="X5", year=2019, price=4_500_000, slug="bmw-x5"),
+        Listing(brand="BMW", model="X6", year=2021, price=6_000_000, slug="bmw-x6"),
+        Listing(brand=NOT_SPECIFIED, model="X", year=2015, price=500_000, slug="no-brand"),
+    ):
+        facets.apply("add", listing)
+
+    nodes = facets.snapshot()["facets"]
+    assert nodes[""]["count"] == 3
+    assert nodes[""]["brand"] == {"BMW": 2}
+    assert nodes["BMW"]["count"] == 2
+
+
+def test_remove_listing_without_brand(tmp_path):
+    facets = CatalogFacets(tmp_path)
+    listing = Listing(brand=NOT_SPECIFIED, model="X", year=2015, slug="no-brand")
+    facets.apply("add", listing)
+    facets.apply("remove", listing)
+    assert facets.snapshot()["facets"][""]["count"] == 0
+
+
+def test_write_only_when_changed(tmp_path):
+    facets = CatalogFacets(tmp_path)
+    facets.apply("add", Listing(brand="BMW", model="X5", year=2019, slug="bmw-x5"))
+    assert facets.write()
+    assert not facets.write()
+    # Новый экземпляр сравнивает с файлом на диске
+    again = CatalogFacets(tmp_path)
+    again.apply("add", Listing(brand="BMW", model="X5", year=2019, slug="bmw-x5"))
+    assert not again.write()
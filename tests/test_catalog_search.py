@@ -0,0 +1,34 @@
+from catalog_search import CatalogSearch, parse_query
+from listing import Listing
+
+
+class FakeIndex:
+    def __init__(self, listings):
+        self.entries = {listing.slug: listing for listing in listings}
+
+    def add_listener(self, callback):
+        pass
+
+
+def make_search():
+    return CatalogSearch(FakeIndex([
+        Listing(brand="BMW", model="X5", year=2019, price=4_500_000, slug="bmw-x5"),
+        Listing(brand="BMW", model="X6", year=2021, price=6_000_000, slug="bmw-x6"),
+        Listing(brand="BMW", model="3 серия", year=2017, price=2_100_000, slug="bmw-3"),
+    ]))
+
+
+def test_bare_year_after_do_is_year_bound():
+    assert parse_query("до 2020")[1] == {"year": (None, 2020)}
+    assert parse_query("до 2000 тыс")[1] == {"price": (None, 2_000_000)}
+    assert parse_query("до 2000000")[1] == {"price": (None, 2_000_000)}
+
+
+def test_cyrillic_model_with_digits():
+    result = make_search().search("бмв х5")
+    assert [listing.slug for listing in result["results"]] == ["bmw-x5"]
+
+
+def test_cyrillic_model_with_year_bound():
+    result = make_search().search("бмв х6 до 2020")
+    assert result["total"] == 0
@@ -0,0 +1,16 @@
+from fuzzy_match import build_model_index, normalize_key
+
+
+def test_cyrillic_homoglyphs_in_model_with_digits():
+    assert normalize_key("х5") == normalize_key("X5")
+    assert normalize_key("Х6") == normalize_key("X6")
+    assert normalize_key("с200") == normalize_key("C200")
+
+
+def test_cyrillic_x5_matches_bmw_model():
+    index = build_model_index(["X5", "X6", "3 серия"])
+    assert index.lookup("х5")[0] == ("X5", 1.0)
+
+
+def test_words_without_digits_are_transliterated():
+    assert normalize_key("камри") == normalize_key("Camry")
@@ -0,0 +1,32 @@
+import asyncio
+import importlib.util
+import json
+from argparse import Namespace
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location(
+    "import_cars", Path(__file__).resolve().parent.parent / "tools" / "import_cars.py")
+import_cars = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(import_cars)
+
+
+def run_import(tmp_path, lines, concurrency=1):
+    feed = tmp_path / "feed.jsonl"
+    feed.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    args = Namespace(
+        input=str(feed), format="auto", delimiter=",", content=str(tmp_path / "cars"),
+        concurrency=concurrency, checkpoint=None, checkpoint_every=500, restart=False,
+    )
+    return asyncio.run(asyncio.wait_for(import_cars.import_file(args), timeout=10))
+
+
+def test_mixed_validity_jsonl_finishes(tmp_path):
+    valid = json.dumps({"brand": "BMW", "model": "X5", "year": 2020, "price": 3_000_000})
+    stats = run_import(tmp_path, ['"foo"', "[1]", '{"brand": "BMW"}', "{broken", valid])
+
+    assert stats.rows == 5
+    assert stats.invalid == 4
+    assert stats.written == 1
+    assert len(list((tmp_path / "cars").glob("*.md"))) == 1
+    checkpoint = json.loads((tmp_path / "feed.jsonl.checkpoint").read_text(encoding="utf-8"))
+    assert checkpoint["row"] == 5
@@ -0,0 +1,37 @@
+from listing import Listing
+from listing_index import ListingIndex
+from listing_template import render_listing
+
+CAR = {"brand": "BMW", "model": "X5", "year": 2019, "price": 4_500_000, "mileage": 50_000}
+
+
+def write_listing(path, slug, **fields):
+    (path / f"{slug}.md").write_text(render_listing(Listing(**{**CAR, **fields})), encoding="utf-8")
+
+
+def test_duplicate_found_after_first_copy_removed(tmp_path):
+    write_listing(tmp_path, "bmw-a")
+    write_listing(tmp_path, "bmw-b")
+    index = ListingIndex(tmp_path)
+    index.load()
+
+    first = index.find_duplicate(CAR)
+    (tmp_path / f"{first}.md").unlink()
+    index.sync()
+
+    assert index.find_duplicate(CAR) == ({"bmw-a", "bmw-b"} - {first}).pop()
+    (tmp_path / "bmw-a.md").unlink(missing_ok=True)
+    (tmp_path / "bmw-b.md").unlink(missing_ok=True)
+    index.sync()
+    assert index.find_duplicate(CAR) is None
+
+
+def test_vin_found_after_first_copy_removed(tmp_path):
+    vin = "WBAKS410X0C123456"
+    write_listing(tmp_path, "bmw-a", vin=vin, price=1)
+    write_listing(tmp_path, "bmw-b", vin=vin, price=2)
+    index = ListingIndex(tmp_path)
+    index.load()
+
+    index.remove("bmw-a")
+    assert index.find_duplicate({"vin": vin}) == "bmw-b"
@@ -0,0 +1,23 @@
+from listing import Listing
+from listing_template import extract_sections, md_block, md_inline, render_body
+
+PAYLOAD = '<script>alert("x")</script><img src=x onerror=alert(1)>'
+
+
+def test_html_is_escaped_in_inline_and_block_text():
+    assert "<" not in md_inline(PAYLOAD) and ">" not in md_inline(PAYLOAD)
+    assert md_block("a < b & c > d") == "a &lt; b &amp; c &gt; d"
+
+
+def test_html_payload_in_listing_body():
+    listing = Listing(brand="BMW", model=PAYLOAD, year=2020, color="<b>черный</b>", description=PAYLOAD)
+    body = render_body(listing, {"Комплектация": PAYLOAD})
+    assert "<script" not in body and "<img" not in body and "<b>" not in body
+    assert "&lt;script&gt;" in body
+
+
+def test_sections_survive_rerender():
+    listing = Listing(brand="BMW", model="X5", year=2020)
+    sections = {"Комплектация": "R&D <пакет> {{< shortcode >}}"}
+    body = render_body(listing, sections)
+    assert render_body(listing, extract_sections(body)) == body
@@ -4,78 +4,35 @@
 Создает файлы .md с правильной структурой для динамической фильтрации.
 """
 
-import os
-import datetime
+import sys
 from pathlib import Path
 
-def create_car_file(car_data):
-    """Создает файл автомобиля с правильной структурой"""
-
-    # Генерируем имя файла
-    filename = f"{car_data['brand'].lower().replace('-', '').replace(' ', '-')}-{car_data['model'].lower().replace(' ', '-').replace('/', '-')}-{car_data['year']}.md"
-    filepath = Path("../hugo-site/content/cars") / filename
-
-    # Шаблон файла
-    template = f"""---
-title: "{car_data['brand']} {car_data['model']} {car_data['year']}"
-date: {datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S+03:00')}
-draft: false
-image: "images/cars/placeholder.svg"
-
-# КРИТИЧЕСКИ ВАЖНО! Эти поля используются для динамической фильтрации
-brand: "{car_data['brand']}"
-model: "{car_data['model']}"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
 
-year: {car_data['year']}
-price: {car_data['price']}
-mileage: {car_data.get('mileage', 50000)}
-engine_volume: {car_data.get('engine_volume', '2.0')}
-fuel_type: "{car_data.get('fuel_type', 'Бензин')}"
-transmission: "{car_data.get('transmission', 'AT')}"
-drive_type: "{car_data.get('drive_type', 'Передний')}"
-body_type: "{car_data.get('body_type', 'Седан')}"
-color: "{car_data.get('color', 'Белый')}"
-condition: "{car_data.get('condition', 'Хорошее')}"
-vin: "{car_data.get('vin', 'XXXXXXXXXXXXXXXXX')}"
-owners_count: {car_data.get('owners_count', 1)}
-pts_original: {str(car_data.get('pts_original', True)).lower()}
-customs_cleared: {str(car_data.get('customs_cleared', True)).lower()}
-exchange_possible: {str(car_data.get('exchange_possible', True)).lower()}
-credit_available: {str(car_data.get('credit_available', True)).lower()}
-description: "{car_data.get('description', f'{car_data["brand"]} {car_data["model"]} {car_data["year"]} в хорошем состоянии')}"
-tags: {car_data.get('tags', '["автомобиль"]')}
-weight: {car_data.get('weight', 1)}
----
+from listing import Listing  # noqa: E402
+from listing_template import render_listing  # noqa: E402
 
-## Характеристики {car_data['brand']} {car_data['model']} {car_data['year']}
+PLACEHOLDER_IMAGE = "images/cars/placeholder.svg"
 
-| Параметр | Значение |
-|----------|----------|
-| **Марка** | {car_data['brand']} |
-| **Модель** | {car_data['model']} |
-| **Год выпуска** | {car_data['year']} |
-| **Цена** | {car_data['price']:,} ₽ |
-| **Пробег** | {car_data.get('mileage', 50000):,} км |
-| **Объем двигателя** | {car_data.get('engine_volume', '2.0')} л |
-| **Тип топлива** | {car_data.get('fuel_type', 'Бензин')} |
-| **Коробка передач** | {car_data.get('transmission', 'AT')} |
-| **Привод** | {car_data.get('drive_type', 'Передний')} |
-| **Тип кузова** | {car_data.get('body_type', 'Седан')} |
-| **Цвет** | {car_data.get('color', 'Белый')} |
-| **Состояние** | {car_data.get('condition', 'Хорошее')} |
 
-## Описание
-
-{car_data.get('description', f'{car_data["brand"]} {car_data["model"]} {car_data["year"]} в хорошем состоянии.')}
+def create_car_file(car_data):
+    """Создает файл автомобиля с правильной структурой"""
 
-### Комплектация:
-{car_data.get('equipment', '- Стандартная комплектация')}
+    # Значения по умолчанию и проверка справочников - в Listing
+    data = dict(car_data)
+    data.setdefault('images', [PLACEHOLDER_IMAGE])
+    data.setdefault('description', f"{data['brand']} {data['model']} {data['year']} в хорошем состоянии.")
+    listing = Listing.from_dict(data, strict=True)
 
-### Техническое состояние:
-{car_data.get('technical_condition', '- Автомобиль в исправном состоянии')}
+    # Генерируем имя файла
+    filename = f"{listing.brand.lower().replace('-', '').replace(' ', '-')}-{listing.model.lower().replace(' ', '-').replace('/', '-')}-{listing.year}.md"
+    filepath = Path("../hugo-site/content/cars") / filename
 
-**{car_data.get('additional_info', 'Возможен обмен, кредит, лизинг.')}**
-"""
+    # Общий шаблон объявления + разделы, которых нет у объявлений из бота
+    template = render_listing(listing, sections={
+        "Комплектация": car_data.get('equipment', '- Стандартная комплектация'),
+        "Техническое состояние": car_data.get('technical_condition', '- Автомобиль в исправном состоянии'),
+    })
 
     # Создаем директорию если не существует
     filepath.parent.mkdir(parents=True, exist_ok=True)
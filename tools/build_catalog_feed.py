@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Генерация данных каталога для сайта: static/cars/index.json (фильтр),
+static/cars/facets.json (счетчики фильтров), static/cars/models-data.json
+(марки и модели на главной) и static/cars/b/ (страницы марок).
+
+Бот обновляет файлы сам при каждом изменении объявлений; инструмент
+нужен, когда сайт собирается без бота (GitHub Actions, ручные правки
+content/cars). Запускать перед hugo.
+
+Использование:
+    python build_catalog_feed.py
+    python build_catalog_feed.py --site hugo-site
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from catalog_facets import CatalogFacets  # noqa: E402
+from catalog_feed import CatalogFeed  # noqa: E402
+from catalog_shards import CatalogShards  # noqa: E402
+from listing_index import ListingIndex  # noqa: E402
+from models_data import ModelsData  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Каталог объявлений в JSON для сайта")
+    parser.add_argument("--site", default="../hugo-site", help="Путь к Hugo сайту")
+    args = parser.parse_args()
+
+    site = Path(args.site)
+    content_path = site / "content" / "cars"
+    if not content_path.is_dir():
+        print(f"❌ Директория не найдена: {content_path}")
+        sys.exit(1)
+
+    index = ListingIndex(content_path)
+    feed = CatalogFeed(site / "static" / "cars")
+    facets = CatalogFacets(site / "static" / "cars")
+    models_data = ModelsData(site / "static" / "cars")
+    shards = CatalogShards(site / "static" / "cars")
+    for export in (feed, facets, models_data, shards):
+        export.track(index)
+    index.load()
+    name = feed.write()
+    facets.write()
+    models_data.write()
+    written = shards.write()
+
+    print(f"✅ Каталог: {index.count()} объявлений -> static/cars/{name}")
+    print(f"✅ Счетчики фильтров: {len(facets.nodes)} узлов -> static/cars/facets.json")
+    print(f"✅ Марки и модели: {len(models_data.brands)} марок -> static/cars/models-data.json")
+    print(f"✅ Страницы марок: {len(shards.members)} шардов, обновлено {written} -> static/cars/b/")
+
+
+if __name__ == "__main__":
+    main()
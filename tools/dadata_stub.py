@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Локальная заглушка Dadata API (справочник марок) для тестов.
+
+Отвечает на POST .../suggest/car_brand в формате Dadata: марки из
+LOCAL_CAR_BRANDS бота плюс --extra. Поведение для проверки обработки
+ошибок:
+    --status 500   - всегда отвечать этим кодом
+    --delay 2      - задержка ответа (секунды)
+
+Использование:
+    python dadata_stub.py --port 8099 --extra "Haval,Chery"
+    DADATA_API_KEY=test DADATA_BRANDS_URL=http://127.0.0.1:8099/suggestions/api/4_1/rs/suggest/car_brand
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from car_brands import LOCAL_CAR_BRANDS  # noqa: E402
+
+BRANDS_PATH = "/suggestions/api/4_1/rs/suggest/car_brand"
+
+
+def create_app(brands, status: int = 200, delay: float = 0) -> web.Application:
+    stats = {"requests": 0}
+
+    async def suggest_brands(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        if not request.headers.get("Authorization", "").startswith("Token "):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        if delay:
+            await asyncio.sleep(delay)
+        if status != 200:
+            return web.json_response({"message": "stub error"}, status=status)
+
+        body = await request.json()
+        query = str(body.get("query", "")).lower()
+        count = int(body.get("count", 10))
+        suggestions = [
+            {"value": brand, "unrestricted_value": brand, "data": {"id": brand.upper(), "name": brand}}
+            for brand in brands if query in brand.lower()
+        ][:count]
+        return web.json_response({"suggestions": suggestions})
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_post(BRANDS_PATH, suggest_brands)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка Dadata API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--extra", default="", help="Дополнительные марки через запятую")
+    parser.add_argument("--status", type=int, default=200, help="HTTP код ответа")
+    parser.add_argument("--delay", type=float, default=0, help="Задержка ответа, секунды")
+    args = parser.parse_args()
+
+    brands = list(LOCAL_CAR_BRANDS) + [brand.strip() for brand in args.extra.split(",") if brand.strip()]
+    print(f"🧪 Заглушка Dadata: http://{args.host}:{args.port}{BRANDS_PATH} ({len(brands)} марок)")
+    web.run_app(create_app(brands, args.status, args.delay), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
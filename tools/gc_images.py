@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Сборка мусора в хранилище фотографий.
+
+Удаляет из hugo-site/static/images/cars файлы с хэш-именами,
+на которые не ссылается ни одно объявление в content/cars.
+
+Использование:
+    python gc_images.py --dry-run
+    python gc_images.py --min-age-hours 48
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from image_store import ImageStore  # noqa: E402
+from listing_index import ListingIndex  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Удаление фотографий без объявлений")
+    parser.add_argument("--site", default="../hugo-site", help="Путь к Hugo сайту")
+    parser.add_argument("--min-age-hours", type=float, default=24,
+                        help="Не трогать файлы моложе N часов (фото неподтвержденных объявлений)")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет удалено")
+    args = parser.parse_args()
+
+    site = Path(args.site)
+    index = ListingIndex(site / "content" / "cars")
+    store = ImageStore(site / "static" / "images" / "cars")
+    store.track(index)
+    index.load()
+
+    print(f"🚗 Объявлений: {index.count()}, фото в использовании: {len(store.refs)}")
+
+    files, size = store.gc(min_age=args.min_age_hours * 3600, dry_run=args.dry_run)
+
+    action = "Будет удалено" if args.dry_run else "Удалено"
+    print(f"🧹 {action} файлов: {files} ({size / 1024 / 1024:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Заглушка бинарника hugo для тестов и бенчмарков.
+
+Понимает --source и --destination: пишет в destination index.html
+со списком объявлений из content/cars. Поведение настраивается
+переменными окружения:
+    HUGO_STUB_DELAY=0.5   - имитация времени сборки (секунды)
+    HUGO_STUB_FAIL=1      - завершиться с ошибкой
+
+Использование: HUGO_BIN=tools/hugo_stub.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default=".")
+    parser.add_argument("--destination", default=None)
+    args, _ = parser.parse_known_args()
+
+    time.sleep(float(os.getenv("HUGO_STUB_DELAY", "0")))
+
+    if os.getenv("HUGO_STUB_FAIL"):
+        print("Error: hugo stub failure requested", file=sys.stderr)
+        sys.exit(1)
+
+    source = Path(args.source)
+    destination = Path(args.destination) if args.destination else source / "public"
+    destination.mkdir(parents=True, exist_ok=True)
+
+    cars = sorted(p.stem for p in (source / "content" / "cars").glob("*.md") if p.name != "_index.md")
+    items = "\n".join(f"<li>{name}</li>" for name in cars)
+    (destination / "index.html").write_text(f"<ul>\n{items}\n</ul>\n", encoding="utf-8")
+
+    print(f"Pages | {len(cars)}")
+
+
+if __name__ == "__main__":
+    main()
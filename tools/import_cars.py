@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Массовый импорт объявлений из фидов дилеров (CSV или JSONL).
+
+Строки читаются потоково, проверяются через Listing и рендерятся тем же
+шаблоном, что и объявления из бота. Файлы пишутся параллельно (не больше
+--concurrency одновременно) и атомарно. Имя файла - марка-модель-год-хэш,
+поэтому машины одной модели и года не перезаписывают друг друга.
+
+Прогресс сохраняется в checkpoint: прерванный импорт продолжается
+с места остановки.
+
+Использование:
+    python import_cars.py feed.csv
+    python import_cars.py feed.jsonl --concurrency 64
+    python import_cars.py feed.csv --restart
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from atomic_io import atomic_write_text  # noqa: E402
+from listing import Listing, format_date  # noqa: E402
+from listing_template import render_listing, stable_slug  # noqa: E402
+
+# Колонки CSV со списками значений ("a.jpg;b.jpg")
+LIST_COLUMNS = ("images", "images_card", "images_thumb", "tags")
+MAX_ERRORS_SHOWN = 10
+
+
+def read_csv(path: Path, delimiter: str) -> Iterator[Tuple[int, Dict]]:
+    """Строки CSV файла по одной: (номер строки, данные)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for number, row in enumerate(csv.DictReader(f, delimiter=delimiter), 1):
+            for column in LIST_COLUMNS:
+                if row.get(column):
+                    row[column] = [item.strip() for item in row[column].split(";") if item.strip()]
+            yield number, row
+
+
+def read_jsonl(path: Path) -> Iterator[Tuple[int, Dict]]:
+    """Строки JSONL файла по одной: (номер строки, данные)"""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, {"__error__": f"некорректный JSON: {e}"}
+                continue
+            if not isinstance(row, dict):
+                row = {"__error__": "ожидался JSON-объект"}
+            yield number, row
+
+
+def read_rows(path: Path, fmt: str, delimiter: str) -> Iterator[Tuple[int, Dict]]:
+    if fmt == "auto":
+        fmt = "jsonl" if path.suffix.lower() in (".jsonl", ".ndjson") else "csv"
+    if fmt == "jsonl":
+        return read_jsonl(path)
+    return read_csv(path, delimiter)
+
+
+class Checkpoint:
+    """Номер строки, до которой (включительно) все строки обработаны"""
+
+    def __init__(self, path: Path, source: Path):
+        self.path = path
+        self.source = str(source.resolve())
+        self.row = 0
+        self._done: set = set()
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("source") == self.source:
+            self.row = int(data.get("row", 0))
+
+    def mark_done(self, number: int):
+        # Записи завершаются не по порядку: двигаем границу только по сплошному префиксу
+        self._done.add(number)
+        while self.row + 1 in self._done:
+            self.row += 1
+            self._done.discard(self.row)
+
+    def skip_gap(self, previous: int, number: int):
+        """
+        Отмечает номера строк между двумя прочитанными, которых нет в файле
+        (пустые строки JSONL). Строки в очереди и в записи сюда не попадают:
+        они отмечаются mark_done только после записи.
+        """
+        for missing in range(previous + 1, number):
+            self.mark_done(missing)
+
+    def save(self):
+        atomic_write_text(self.path, json.dumps({"source": self.source, "row": self.row}))
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+        self.written = 0
+        self.unchanged = 0
+        self.invalid = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+
+    def error(self, number: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS_SHOWN:
+            self.errors.append(f"строка {number}: {message}")
+
+
+async def import_file(args) -> ImportStats:
+    source = Path(args.input)
+    content_path = Path(args.content)
+    content_path.mkdir(parents=True, exist_ok=True)
+
+    checkpoint = Checkpoint(Path(args.checkpoint or f"{source}.checkpoint"), source)
+    if not args.restart:
+        checkpoint.load()
+    if checkpoint.row:
+        print(f"⏩ Продолжаем со строки {checkpoint.row + 1}")
+
+    stats = ImportStats()
+    date = format_date()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+
+    def write(path: Path, content: str) -> bool:
+        try:
+            if path.read_text(encoding="utf-8") == content:
+                return False
+        except FileNotFoundError:
+            pass
+        atomic_write_text(path, content)
+        return True
+
+    async def worker():
+        while True:
+            number, row = await queue.get()
+            processed = False
+            try:
+                try:
+                    if "__error__" in row:
+                        raise ValueError(row["__error__"])
+                    listing = Listing.from_dict(row, strict=True)
+                    slug = stable_slug(listing)
+                    content = render_listing(listing, date)
+                except Exception as e:
+                    # Ошибка строки не должна останавливать воркер: иначе queue.join() не дождется
+                    stats.error(number, str(e) or type(e).__name__)
+                else:
+                    path = content_path / f"{slug}.md"
+                    try:
+                        if await asyncio.to_thread(write, path, content):
+                            stats.written += 1
+                        else:
+                            stats.unchanged += 1
+                    except Exception as e:
+                        stats.error(number, f"ошибка записи {path.name}: {e}")
+                processed = True
+            finally:
+                # Строка, запись которой прервана отменой импорта, повторится при продолжении
+                if processed:
+                    checkpoint.mark_done(number)
+                    if number % args.checkpoint_every == 0:
+                        checkpoint.save()
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+    # Последняя прочитанная строка: пропуски знает только читатель
+    previous = checkpoint.row
+    try:
+        for number, row in read_rows(source, args.format, args.delimiter):
+            if number <= checkpoint.row:
+                stats.skipped += 1
+                continue
+            checkpoint.skip_gap(previous, number)
+            previous = number
+            stats.rows += 1
+            await queue.put((number, row))
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        checkpoint.save()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт объявлений из CSV/JSONL")
+    parser.add_argument("input", help="Файл фида (.csv или .jsonl)")
+    parser.add_argument("--format", choices=("auto", "csv", "jsonl"), default="auto")
+    parser.add_argument("--delimiter", default=",", help="Разделитель CSV")
+    parser.add_argument("--content", default="../hugo-site/content/cars", help="Директория объявлений")
+    parser.add_argument("--concurrency", type=int, default=32, help="Одновременных записей")
+    parser.add_argument("--checkpoint", help="Файл прогресса (по умолчанию <input>.checkpoint)")
+    parser.add_argument("--checkpoint-every", type=int, default=500, help="Сохранять прогресс каждые N строк")
+    parser.add_argument("--restart", action="store_true", help="Игнорировать сохраненный прогресс")
+    args = parser.parse_args()
+
+    print(f"🚗 Импорт {args.input}...")
+    stats = asyncio.run(import_file(args))
+    elapsed = time.monotonic() - stats.started
+
+    print(f"\n✅ Обработано строк: {stats.rows} за {elapsed:.1f} с "
+          f"({stats.rows / elapsed if elapsed else 0:.0f} строк/с)")
+    print(f"📝 Записано файлов: {stats.written}, без изменений: {stats.unchanged}")
+    if stats.skipped:
+        print(f"⏩ Пропущено (уже импортированы): {stats.skipped}")
+    if stats.invalid:
+        print(f"⚠️ Ошибок: {stats.invalid}")
+        for message in stats.errors:
+            print(f"   • {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Перегенерация всех объявлений каталога текущим шаблоном.
+
+Нужна после изменения схемы front matter или шаблона (SCHEMA_VERSION
+в bot/listing.py): каждый файл content/cars разбирается, к данным
+применяются недостающие миграции (bot/listing_migrations.py), и файл
+рендерится заново. Переписываются только файлы, у которых изменился
+результат; запись атомарная. Файлы обрабатываются в пуле процессов.
+
+Файлы с полями, которых нет в модели Listing, или с недопустимыми
+значениями справочников не трогаются (чтобы не потерять данные),
+пока не указан --force.
+
+Использование:
+    python rerender_catalog.py --dry-run
+    python rerender_catalog.py --dry-run --show-diff 5
+    python rerender_catalog.py --workers 8
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from atomic_io import atomic_write_text  # noqa: E402
+from listing import SCHEMA_VERSION, Listing, format_date, parse_front_matter  # noqa: E402
+from listing_migrations import migrate  # noqa: E402
+from listing_template import extract_sections, render_listing  # noqa: E402
+
+KNOWN_KEYS = {field.name for field in fields(Listing)} | {"title", "draft", "image", "schema_version"}
+
+
+class FileResult(NamedTuple):
+    name: str
+    status: str  # changed | unchanged | skipped | error
+    migrations: List[int]
+    added: int
+    removed: int
+    message: str = ""
+    diff: Optional[str] = None
+
+
+def rerender_file(path: str, dry_run: bool, force: bool, keep_diff: bool) -> FileResult:
+    """Перегенерирует один файл (выполняется в процессе пула)"""
+    name = os.path.basename(path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+
+        params = parse_front_matter(text)
+        if not params:
+            return FileResult(name, "skipped", [], 0, 0, "нет front matter")
+        if params.get("draft") is True:
+            return FileResult(name, "skipped", [], 0, 0, "черновик")
+
+        unknown = set(params) - KNOWN_KEYS
+        if unknown and not force:
+            return FileResult(name, "skipped", [], 0, 0, f"неизвестные поля: {', '.join(sorted(unknown))}")
+
+        params, applied = migrate(params)
+        if not params.get("date"):
+            # Без даты в файле берем mtime, чтобы повторный запуск давал тот же результат
+            params["date"] = format_date(datetime.fromtimestamp(os.stat(path).st_mtime))
+        try:
+            listing = Listing.from_dict(params, strict=not force, slug=Path(path).stem)
+        except ValueError as e:
+            return FileResult(name, "skipped", applied, 0, 0, str(e))
+
+        body = text[text.find("\n---", 3) + 4:]
+        content = render_listing(listing, sections=extract_sections(body))
+    except (OSError, UnicodeDecodeError) as e:
+        return FileResult(name, "error", [], 0, 0, str(e))
+
+    if content == text:
+        return FileResult(name, "unchanged", applied, 0, 0)
+
+    diff_lines = list(difflib.unified_diff(
+        text.splitlines(), content.splitlines(), f"a/{name}", f"b/{name}", lineterm="",
+    ))
+    added = sum(1 for line in diff_lines if line.startswith("+") and not line.startswith("+++"))
+    removed = sum(1 for line in diff_lines if line.startswith("-") and not line.startswith("---"))
+
+    if not dry_run:
+        try:
+            atomic_write_text(path, content)
+        except OSError as e:
+            return FileResult(name, "error", applied, 0, 0, str(e))
+
+    return FileResult(name, "changed", applied, added, removed,
+                      diff="\n".join(diff_lines) if keep_diff else None)
+
+
+def iter_listings(content_path: Path) -> Iterator[str]:
+    with os.scandir(content_path) as it:
+        for item in it:
+            if item.name.endswith(".md") and item.name != "_index.md" and item.is_file():
+                yield item.path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перегенерация объявлений каталога")
+    parser.add_argument("--content", default="../hugo-site/content/cars", help="Директория объявлений")
+    parser.add_argument("--workers", type=int, default=None, help="Процессов (по умолчанию - по числу CPU)")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать, что изменится")
+    parser.add_argument("--show-diff", type=int, default=0, metavar="N", help="Показать diff первых N файлов")
+    parser.add_argument("--force", action="store_true",
+                        help="Переписывать и файлы с неизвестными полями/значениями (они будут потеряны)")
+    args = parser.parse_args()
+
+    content_path = Path(args.content)
+    if not content_path.is_dir():
+        print(f"❌ Директория не найдена: {content_path}")
+        sys.exit(1)
+
+    print(f"🔄 Перегенерация объявлений (схема v{SCHEMA_VERSION}){' - пробный запуск' if args.dry_run else ''}...")
+    started = time.monotonic()
+
+    statuses: Counter = Counter()
+    migrations: Counter = Counter()
+    added = removed = 0
+    diffs: List[str] = []
+    problems: List[str] = []
+
+    worker = partial(rerender_file, dry_run=args.dry_run, force=args.force, keep_diff=args.show_diff > 0)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for result in pool.map(worker, iter_listings(content_path), chunksize=32):
+            statuses[result.status] += 1
+            migrations.update(result.migrations)
+            added += result.added
+            removed += result.removed
+            if result.diff and len(diffs) < args.show_diff:
+                diffs.append(result.diff)
+            if result.message and result.status in ("skipped", "error"):
+                problems.append(f"{result.name}: {result.message}")
+
+    elapsed = time.monotonic() - started
+    total = sum(statuses.values())
+
+    for diff in diffs:
+        print(f"\n{diff}")
+
+    action = "Будет переписано" if args.dry_run else "Переписано"
+    print(f"\n✅ Обработано файлов: {total} за {elapsed:.1f} с")
+    print(f"📝 {action}: {statuses['changed']} (+{added} / -{removed} строк), без изменений: {statuses['unchanged']}")
+    if migrations:
+        applied = ", ".join(f"v{version}: {count}" for version, count in sorted(migrations.items()))
+        print(f"🧬 Миграции: {applied}")
+    if problems:
+        print(f"⚠️ Пропущено: {statuses['skipped']}, ошибок: {statuses['error']}")
+        for message in problems[:20]:
+            print(f"   • {message}")
+        if len(problems) > 20:
+            print(f"   ... и еще {len(problems) - 20}")
+
+
+if __name__ == "__main__":
+    main()